@@ -5,12 +5,96 @@
 """
 
 import os
+import time
+import queue
+import atexit
 import logging
 import datetime
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 import sys
 import threading
 
+
+class DropOnFullQueueHandler(QueueHandler):
+    """
+    非阻塞的队列处理器
+    队列满时直接丢弃日志并计数，保证调用线程永远不会因为日志阻塞
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _HandlerRouter(logging.Handler):
+    """
+    队列模式下后台写线程使用的分发处理器
+    按日志器名称把记录转发给该日志器登记的真实处理器（控制台/文件）
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.routes = {}
+
+    def add_route(self, name, handler):
+        self.routes.setdefault(name, []).append(handler)
+
+    def emit(self, record):
+        for handler in self.routes.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def flush(self):
+        for handlers in self.routes.values():
+            for handler in handlers:
+                handler.flush()
+
+    def close(self):
+        for handlers in self.routes.values():
+            for handler in handlers:
+                handler.close()
+        self.routes.clear()
+        super().close()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    令牌桶限流过滤器
+    每秒最多放行 rate 条日志（允许 burst 条突发），被限流的条数会附加在下一条放行的日志后面
+    """
+
+    def __init__(self, rate=20.0, burst=50):
+        super().__init__()
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+        self.total_suppressed = 0
+
+    def filter(self, record):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens < 1.0:
+                self._suppressed += 1
+                self.total_suppressed += 1
+                return False
+            self._tokens -= 1.0
+            suppressed, self._suppressed = self._suppressed, 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} [已限流丢弃 {suppressed} 条]"
+            record.args = None
+        return True
+
 class LogManager:
     """
     日志管理器类
@@ -30,7 +114,8 @@ class LogManager:
             return cls._instance
     
     def __init__(self, log_dir="log", app_name="SickVision", level=logging.INFO, 
-                 console_output=True, file_output=True, max_backup_count=30):
+                 console_output=True, file_output=True, max_backup_count=30,
+                 use_queue=False, queue_size=10000):
         """
         初始化日志管理器
         
@@ -41,6 +126,8 @@ class LogManager:
             console_output (bool): 是否输出到控制台
             file_output (bool): 是否输出到文件
             max_backup_count (int): 最大备份日志文件数量
+            use_queue (bool): 是否启用队列模式，日志由单独的后台线程写入控制台和文件
+            queue_size (int): 队列模式下的队列容量，队列满时丢弃新日志
         """
         if self._initialized:
             return
@@ -52,12 +139,98 @@ class LogManager:
         self.file_output = file_output
         self.max_backup_count = max_backup_count
         self.loggers = {}
+        self.rate_limits = {}
+
+        # 队列模式相关
+        self._queue = None
+        self._queue_handler = None
+        self._router = None
+        self._listener = None
         
         # 创建日志目录
         if not os.path.exists(self.log_dir):
             os.makedirs(self.log_dir)
         
         self._initialized = True
+
+        if use_queue:
+            self.enable_queue(queue_size)
+
+    @property
+    def queue_mode(self):
+        """是否处于队列模式"""
+        return self._listener is not None
+
+    def enable_queue(self, queue_size=10000):
+        """
+        切换到队列模式：日志器只挂一个非阻塞的 QueueHandler，
+        由一个 QueueListener 后台线程负责所有控制台和文件输出
+
+        Args:
+            queue_size (int): 队列容量
+        """
+        if self._listener is not None:
+            return
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._queue_handler = DropOnFullQueueHandler(self._queue)
+        self._router = _HandlerRouter()
+
+        # 已创建的日志器的处理器迁移到后台线程
+        for name, logger in self.loggers.items():
+            for handler in logger.handlers[:]:
+                logger.removeHandler(handler)
+                self._router.add_route(name, handler)
+            logger.addHandler(self._queue_handler)
+
+        self._listener = QueueListener(self._queue, self._router)
+        self._listener.start()
+        atexit.register(self.shutdown)
+
+    def shutdown(self):
+        """停止后台写线程，写完队列中剩余的日志并关闭所有处理器"""
+        if self._listener is None:
+            return
+        self._listener.stop()  # 会先处理完队列中已有的记录
+        self._listener = None
+        for name, logger in self.loggers.items():
+            logger.removeHandler(self._queue_handler)
+            for handler in self._router.routes.get(name, ()):
+                logger.addHandler(handler)
+        self._router.routes.clear()
+        self._router = None
+        self._queue_handler = None
+        self._queue = None
+
+    def get_dropped_count(self):
+        """队列模式下因队列满而丢弃的日志条数"""
+        return self._queue_handler.dropped if self._queue_handler is not None else 0
+
+    def set_rate_limit(self, name, rate=20.0, burst=50):
+        """
+        为指定日志器设置限流，rate 为 None 时取消限流
+
+        Args:
+            name (str): 日志器名称，None 表示默认日志器
+            rate (float | None): 每秒允许的日志条数
+            burst (int): 允许的突发条数
+        """
+        logger = self.get_logger(name)
+        old = self.rate_limits.pop(logger.name, None)
+        if old is not None:
+            logger.removeFilter(old)
+        if rate is not None:
+            rate_filter = RateLimitFilter(rate, burst)
+            logger.addFilter(rate_filter)
+            self.rate_limits[logger.name] = rate_filter
+
+    def _attach_handler(self, logger, handler):
+        """队列模式下把处理器登记到后台线程，否则直接挂到日志器上"""
+        if self._router is not None:
+            self._router.add_route(logger.name, handler)
+            if self._queue_handler not in logger.handlers:
+                logger.addHandler(self._queue_handler)
+        else:
+            logger.addHandler(handler)
     
     def get_logger(self, name=None):
         """
@@ -93,7 +266,7 @@ class LogManager:
         if self.console_output:
             console_handler = logging.StreamHandler(sys.stdout)
             console_handler.setFormatter(formatter)
-            logger.addHandler(console_handler)
+            self._attach_handler(logger, console_handler)
         
         # 添加文件处理器（按日期生成文件名）
         if self.file_output:
@@ -115,7 +288,7 @@ class LogManager:
             # 设置后缀模板，使轮转文件名称符合日期
             file_handler.suffix = "%Y-%m-%d.log"
             file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
+            self._attach_handler(logger, file_handler)
         
         self.loggers[name] = logger
         return logger
@@ -167,7 +340,7 @@ class LogManager:
             encoding=encoding
         )
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        self._attach_handler(logger, file_handler)
         
     def add_console_handler(self, name):
         """
@@ -189,7 +362,7 @@ class LogManager:
         # 添加控制台处理器
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        self._attach_handler(logger, console_handler)
     
     def get_all_loggers(self):
         """
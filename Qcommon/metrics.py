@@ -0,0 +1,304 @@
+"""
+@Description :   轻量级性能指标注册表
+                 提供计数器、HDR 风格的对数分桶直方图（p50/p99/max）和基于单调时钟的计时器，
+                 可在代码中读取、在界面中显示或导出为文本
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import time
+import threading
+import functools
+
+
+class Counter:
+    """线程安全的计数器"""
+
+    def __init__(self, name):
+        self.name = name
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def reset(self):
+        with self._lock:
+            self._value = 0
+
+
+class Gauge:
+    """
+    瞬时值指标，可以直接 set，也可以传入回调在读取时计算（采集开销只发生在读取时）
+    """
+
+    def __init__(self, name, func=None):
+        self.name = name
+        self.func = func
+        self._value = 0.0
+
+    def set(self, value):
+        self._value = value
+
+    @property
+    def value(self):
+        if self.func is not None:
+            try:
+                return float(self.func())
+            except Exception:
+                return float("nan")
+        return self._value
+
+    def reset(self):
+        self._value = 0.0
+
+
+class Histogram:
+    """
+    HDR 风格的对数-线性分桶直方图
+
+    数值按整数微秒记录。小于 2^SUB_BITS 的值精确分桶，更大的值在每个二进制数量级内
+    再细分为 2^(SUB_BITS-1) 个线性子桶，相对误差不超过 1/2^(SUB_BITS-1)（约 6%），
+    内存只与出现过的桶数有关。
+    """
+    SUB_BITS = 5
+    SUB_COUNT = 1 << SUB_BITS
+    HALF_COUNT = SUB_COUNT >> 1
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._buckets = {}
+            self.count = 0
+            self.total_us = 0
+            self.min_us = None
+            self.max_us = 0
+
+    @classmethod
+    def _bucket_index(cls, value):
+        if value < cls.SUB_COUNT:
+            return value
+        shift = value.bit_length() - cls.SUB_BITS
+        return shift * cls.HALF_COUNT + (value >> shift)
+
+    @classmethod
+    def _bucket_upper(cls, index):
+        """桶的上界（包含），用于百分位估计"""
+        if index < cls.SUB_COUNT:
+            return index
+        shift = index // cls.HALF_COUNT - 1
+        mantissa = index - shift * cls.HALF_COUNT
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds):
+        """
+        记录一个耗时
+
+        Args:
+            seconds (float): 耗时（秒）
+        """
+        value = int(seconds * 1e6)
+        if value < 0:
+            value = 0
+        index = self._bucket_index(value)
+        with self._lock:
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+            self.count += 1
+            self.total_us += value
+            if self.min_us is None or value < self.min_us:
+                self.min_us = value
+            if value > self.max_us:
+                self.max_us = value
+
+    def percentile(self, p):
+        """
+        估计百分位数
+
+        Args:
+            p (float): 0~100
+
+        Returns:
+            float: 毫秒，没有数据时返回 0
+        """
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            target = max(1, int(round(self.count * p / 100.0)))
+            seen = 0
+            for index in sorted(self._buckets):
+                seen += self._buckets[index]
+                if seen >= target:
+                    return min(self._bucket_upper(index), self.max_us) / 1000.0
+            return self.max_us / 1000.0
+
+    def summary(self):
+        """
+        Returns:
+            dict: count / avg_ms / min_ms / p50_ms / p90_ms / p99_ms / max_ms
+        """
+        count = self.count
+        return {
+            "count": count,
+            "avg_ms": self.total_us / count / 1000.0 if count else 0.0,
+            "min_ms": (self.min_us or 0) / 1000.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_us / 1000.0,
+        }
+
+
+class Timer:
+    """
+    基于单调时钟的计时上下文，退出时把耗时写入直方图
+
+    Example:
+        with MetricsRegistry().timer("detect.infer"):
+            ...
+    """
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.histogram.record(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """
+    指标注册表（单例）
+
+    指标按名称创建，重复获取返回同一个对象。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(MetricsRegistry, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._create_lock = threading.Lock()
+        self._initialized = True
+
+    def counter(self, name):
+        """获取（必要时创建）计数器"""
+        counter = self.counters.get(name)
+        if counter is None:
+            with self._create_lock:
+                counter = self.counters.setdefault(name, Counter(name))
+        return counter
+
+    def gauge(self, name, func=None):
+        """
+        获取（必要时创建）瞬时值指标
+
+        Args:
+            name (str): 指标名称
+            func (callable, optional): 读取时调用的回调，传入时会替换已有回调
+        """
+        with self._create_lock:
+            gauge = self.gauges.setdefault(name, Gauge(name))
+            if func is not None:
+                gauge.func = func
+        return gauge
+
+    def histogram(self, name):
+        """获取（必要时创建）直方图"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._create_lock:
+                histogram = self.histograms.setdefault(name, Histogram(name))
+        return histogram
+
+    def timer(self, name):
+        """返回写入指定直方图的计时上下文"""
+        return Timer(self.histogram(name))
+
+    def observe(self, name, seconds):
+        """直接记录一个已测得的耗时（秒）"""
+        self.histogram(name).record(seconds)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {"counters": {名称: 值}, "gauges": {名称: 值}, "histograms": {名称: summary()}}
+        """
+        return {
+            "counters": {name: c.value for name, c in sorted(dict(self.counters).items())},
+            "gauges": {name: g.value for name, g in sorted(dict(self.gauges).items())},
+            "histograms": {name: h.summary() for name, h in sorted(dict(self.histograms).items())},
+        }
+
+    def format_text(self):
+        """把所有指标格式化为文本表格"""
+        snap = self.snapshot()
+        lines = [f"{'指标':<32}{'次数':>8}{'平均':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'最大':>9}  (ms)"]
+        for name, s in snap["histograms"].items():
+            lines.append(f"{name:<32}{s['count']:>8}{s['avg_ms']:>9.2f}{s['p50_ms']:>9.2f}"
+                         f"{s['p90_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['max_ms']:>9.2f}")
+        if snap["counters"] or snap["gauges"]:
+            lines.append("")
+            for name, value in snap["counters"].items():
+                lines.append(f"{name:<32}{value:>8}")
+            for name, value in snap["gauges"].items():
+                lines.append(f"{name:<32}{value:>8.2f}")
+        return "\n".join(lines)
+
+    def reset(self):
+        """清空所有指标的数据（保留指标对象）"""
+        for counter in list(self.counters.values()):
+            counter.reset()
+        for gauge in list(self.gauges.values()):
+            gauge.reset()
+        for histogram in list(self.histograms.values()):
+            histogram.reset()
+
+
+def timed(name):
+    """
+    计时装饰器，把函数耗时写入名为 name 的直方图，抛出异常时另计 name.errors 计数
+
+    Args:
+        name (str): 直方图名称
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            registry = MetricsRegistry()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                registry.counter(f"{name}.errors").inc()
+                raise
+            finally:
+                registry.histogram(name).record(time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,159 @@
+"""
+@Description :   Prometheus 文本格式的指标 HTTP 服务
+                 只依赖标准库，在后台线程中响应 /metrics 抓取，
+                 指标只在被抓取时才格式化，不给帧处理循环增加额外开销
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import re
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Qcommon.metrics import MetricsRegistry
+from Qcommon.LogManager import LogManager
+
+# 输出的百分位
+QUANTILES = (0.5, 0.9, 0.99)
+
+_INVALID_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def metric_name(name, prefix="sickvision"):
+    """把 camera.getFrame 形式的名称转换为合法的 Prometheus 指标名"""
+    return f"{prefix}_{_INVALID_CHARS.sub('_', name)}"
+
+
+def _escape(value):
+    """标签值转义：反斜杠、双引号和换行"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=None):
+    items = dict(labels or {})
+    items.update(extra or {})
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(items.items()))
+    return "{" + body + "}"
+
+
+def _format_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    return repr(float(value))
+
+
+def render_prometheus(registry=None, labels=None, prefix="sickvision"):
+    """
+    把注册表中的全部指标渲染为 Prometheus 文本格式
+
+    计数器输出为 counter（名称带 _total），瞬时值为 gauge，
+    直方图输出为以秒为单位的 summary（分位数 + _sum + _count）以及一个 _max gauge
+
+    Args:
+        registry (MetricsRegistry, optional): 指标注册表，默认使用全局单例
+        labels (dict, optional): 附加到每条指标上的标签，例如 {"cell": "cell01"}
+        prefix (str): 指标名前缀
+
+    Returns:
+        str: Prometheus 文本
+    """
+    registry = registry or MetricsRegistry()
+    label_str = _format_labels(labels)
+    lines = []
+
+    for name, counter in sorted(dict(registry.counters).items()):
+        full = metric_name(name, prefix) + "_total"
+        lines.append(f"# TYPE {full} counter")
+        lines.append(f"{full}{label_str} {_format_value(counter.value)}")
+
+    for name, gauge in sorted(dict(registry.gauges).items()):
+        full = metric_name(name, prefix)
+        lines.append(f"# TYPE {full} gauge")
+        lines.append(f"{full}{label_str} {_format_value(gauge.value)}")
+
+    for name, histogram in sorted(dict(registry.histograms).items()):
+        full = metric_name(name, prefix) + "_seconds"
+        lines.append(f"# TYPE {full} summary")
+        for q in QUANTILES:
+            q_labels = _format_labels(labels, {"quantile": q})
+            lines.append(f"{full}{q_labels} {_format_value(histogram.percentile(q * 100) / 1000.0)}")
+        lines.append(f"{full}_sum{label_str} {_format_value(histogram.total_us / 1e6)}")
+        lines.append(f"{full}_count{label_str} {histogram.count}")
+        lines.append(f"# TYPE {full}_max gauge")
+        lines.append(f"{full}_max{label_str} {_format_value(histogram.max_us / 1e6)}")
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """处理 /metrics 请求"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_prometheus(self.server.registry, self.server.labels).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 不向 stderr 输出每次抓取的访问日志
+        pass
+
+
+class MetricsServer:
+    """
+    指标 HTTP 服务
+
+    Example:
+        server = MetricsServer(port=9108, labels={"cell": "cell01"})
+        server.start()
+        ...
+        server.stop()
+    """
+
+    def __init__(self, host="0.0.0.0", port=9108, labels=None, registry=None):
+        """
+        Args:
+            host (str): 监听地址
+            port (int): 监听端口，0 表示自动分配
+            labels (dict, optional): 附加到每条指标上的标签
+            registry (MetricsRegistry, optional): 指标注册表，默认使用全局单例
+        """
+        self.host = host
+        self.port = port
+        self.labels = labels or {}
+        self.registry = registry or MetricsRegistry()
+        self.logger = LogManager().get_logger()
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        """在后台守护线程中启动服务"""
+        if self._httpd is not None:
+            return
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.registry = self.registry
+        self._httpd.labels = self.labels
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        self.logger.info(f"指标服务已启动: http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        """停止服务"""
+        if self._httpd is None:
+            return
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join(2.0)
+        self._httpd = None
+        self._thread = None
+        self.logger.info("指标服务已停止")
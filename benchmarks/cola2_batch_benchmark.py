@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+@Description :   CoLa2 流水线批量请求基准测试
+                 用本机 CoLa2 设备模拟器模拟不同的往返延迟，对比逐个 readVariable/writeVariable
+                 与 Control.batch() 流水线发送同样数量请求的总耗时
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import os
+import sys
+import time
+import struct
+import argparse
+
+# 项目根目录
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 直接以 common 包导入 sick/common，避免触发 sick/__init__ 中的 numpy 依赖
+sys.path.insert(0, os.path.join(ROOT_DIR, "sick"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common.Control import Control  # noqa: E402
+from fake_cola2_device import FakeCola2Device  # noqa: E402
+
+
+def make_variables(count):
+    return {f"var{i:03d}".encode(): struct.pack(">I", i) for i in range(count)}
+
+
+def run_sequential(control, names):
+    start = time.perf_counter()
+    values = [control.readVariable(name) for name in names]
+    # 写回读到的值，两种方式测量时设备状态一致
+    for name, value in zip(names, values):
+        control.writeVariable(name, value)
+    return time.perf_counter() - start, values
+
+
+def run_batch(control, variables, names, window):
+    start = time.perf_counter()
+    with control.batch(window) as batch:
+        reads = [batch.read(name) for name in names]
+        for name in names:
+            batch.write(name, variables[name])
+    values = [r.result() for r in reads]
+    return time.perf_counter() - start, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CoLa2 流水线批量请求基准测试")
+    parser.add_argument("--variables", type=int, default=20, help="读写的变量个数（每个变量读一次写一次）")
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0.0, 1.0, 5.0], help="模拟的往返延迟")
+    parser.add_argument("--window", type=int, default=16, help="流水线窗口（同时在途的请求数）")
+    parser.add_argument("--jitter-ms", type=float, default=0.5, help="随机附加延迟，使响应乱序返回")
+    args = parser.parse_args()
+
+    variables = make_variables(args.variables)
+    names = list(variables)
+    print(f"每组 {len(names) * 2} 个请求，流水线窗口 {args.window}")
+    print(f"{'往返延迟':<10}{'逐个(ms)':>12}{'批量(ms)':>12}{'加速比':>10}")
+    for latency_ms in args.latency_ms:
+        device = FakeCola2Device(latency_s=latency_ms / 1000.0, jitter_s=args.jitter_ms / 1000.0,
+                                 variables=variables).start()
+        control = Control("127.0.0.1", "Cola2", device.port)
+        control.open()
+        try:
+            control.readVariable(names[0])  # 建立会话，不计入测量
+            sequential_s, expected = run_sequential(control, names)
+            batch_s, values = run_batch(control, variables, names, args.window)
+            assert values == expected, "批量读取结果与逐个读取不一致"
+        finally:
+            control.close()
+            device.stop()
+        print(f"{latency_ms:<10.1f}{sequential_s * 1000:>12.1f}{batch_s * 1000:>12.1f}{sequential_s / batch_s:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
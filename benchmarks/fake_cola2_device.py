@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+@Description :   基准测试用的 CoLa2 设备模拟器
+                 在本机监听 TCP 端口，支持建立会话、读写变量和调用方法，
+                 每个响应在收到请求 latency_s 之后发出，用来模拟网络往返和设备处理时间；
+                 请求可以流水线发送，jitter_s 大于 0 时响应顺序可能与请求顺序不同
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import heapq
+import random
+import socket
+import struct
+import threading
+import time
+
+STX = b"\x02\x02\x02\x02"
+HEADER = struct.Struct(">IHcc")
+# CoLa 错误码：变量不存在
+ERROR_UNKNOWN_VARIABLE = 5
+
+
+class FakeCola2Device:
+    """
+    CoLa2 设备模拟器
+
+    Example:
+        device = FakeCola2Device(latency_s=0.002, variables={b"framePeriodUs": struct.pack(">I", 33333)})
+        device.start()
+        control = Control("127.0.0.1", "Cola2", device.port)
+        ...
+        device.stop()
+    """
+
+    def __init__(self, latency_s=0.0, jitter_s=0.0, variables=None, methods=None, session_timeout_s=None):
+        """
+        Args:
+            latency_s (float): 每个请求的响应延迟（秒）
+            jitter_s (float): 附加的随机延迟上限（秒），使流水线请求乱序返回
+            variables (dict, optional): {变量名(bytes): 值(bytes)}
+            methods (dict, optional): {方法名(bytes): 返回值(bytes)}，未列出的方法返回空
+            session_timeout_s (float, optional): 会话超时，默认使用客户端建立会话时给出的超时
+        """
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.variables = dict(variables or {})
+        self.methods = dict(methods or {})
+        self.session_timeout_s = session_timeout_s
+        self.sessions = 0
+        self.requests = 0
+        self.expired = 0
+        self.port = None
+        self._server = None
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    # ------------------ 服务 ------------------
+    def start(self):
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(("127.0.0.1", 0))
+        self._server.listen(4)
+        self._server.settimeout(0.2)
+        self.port = self._server.getsockname()[1]
+        self._spawn(self._accept_loop)
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        for t in self._threads:
+            t.join(2.0)
+        self._server.close()
+
+    def _spawn(self, target, *args):
+        t = threading.Thread(target=target, args=args, daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def _accept_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._spawn(self._connection, conn)
+
+    def _connection(self, conn):
+        outbox = []
+        cond = threading.Condition()
+        closed = [False]
+        self._spawn(self._sender, conn, outbox, cond, closed)
+        state = {"session": 0, "timeout": 30, "last": 0.0}
+        buffer = bytearray()
+        conn.settimeout(0.2)
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    data = conn.recv(65536)
+                except socket.timeout:
+                    continue
+                if not data:
+                    break
+                buffer += data
+                while len(buffer) >= 8:
+                    if buffer[:4] != STX:
+                        raise RuntimeError("模拟设备收到无效的帧头")
+                    length, = struct.unpack_from(">I", buffer, 4)
+                    if len(buffer) < 8 + length:
+                        break
+                    packet = bytes(buffer[8:8 + length])
+                    del buffer[:8 + length]
+                    response = self._handle(packet[2:], state)
+                    due = time.monotonic() + self.latency_s + random.uniform(0, self.jitter_s)
+                    with cond:
+                        heapq.heappush(outbox, (due, id(response), response))
+                        cond.notify()
+        except OSError:
+            pass
+        finally:
+            with cond:
+                closed[0] = True
+                cond.notify()
+
+    def _sender(self, conn, outbox, cond, closed):
+        try:
+            while True:
+                with cond:
+                    while not outbox and not closed[0]:
+                        cond.wait()
+                    if closed[0] and not outbox:
+                        break
+                    due = outbox[0][0]
+                    wait = due - time.monotonic()
+                    if wait > 0:
+                        cond.wait(wait)
+                        continue
+                    _, _, response = heapq.heappop(outbox)
+                conn.sendall(response)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    # ------------------ 协议 ------------------
+    @staticmethod
+    def _frame(session, req_id, cmd, mode, payload):
+        body = b"\x00\x00" + HEADER.pack(session, req_id, cmd, mode) + payload
+        return STX + struct.pack(">I", len(body)) + body
+
+    def _handle(self, packet, state):
+        session, req_id, cmd, mode = HEADER.unpack_from(packet)
+        payload = packet[HEADER.size:]
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            if cmd == b"O":
+                self.sessions += 1
+                state["timeout"] = payload[0]
+                state["session"] = 0x1000 + self.sessions
+                state["last"] = now
+                return self._frame(state["session"], req_id, b"O", b"A", b"")
+            timeout = self.session_timeout_s if self.session_timeout_s is not None else state["timeout"]
+            if session != state["session"] or now - state["last"] > timeout:
+                self.expired += 1
+                return self._frame(session, req_id, b"F", b"A", struct.pack(">H", 1))
+            state["last"] = now
+
+        name, _, value = payload.partition(b" ")
+        if cmd == b"R":
+            if name not in self.variables:
+                return self._frame(session, req_id, b"F", b"A", struct.pack(">H", ERROR_UNKNOWN_VARIABLE))
+            return self._frame(session, req_id, b"R", b"A", b" " + name + b" " + self.variables[name])
+        if cmd == b"W":
+            self.variables[name] = value
+            return self._frame(session, req_id, b"W", b"A", b" " + name)
+        if cmd == b"M":
+            return self._frame(session, req_id, b"A", b"N", b" " + name + b" " + self.methods.get(name, b""))
+        return self._frame(session, req_id, b"F", b"A", struct.pack(">H", 1))
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+@Description :   CoLa 帧读取器（FrameReader）模糊测试
+                 以录制的设备响应字节流为种子：默认用 Control 连接本机 CoLa2 设备模拟器，
+                 录下套接字实际收到的字节；也可以用 --input 读入之前用 --record 保存的录制文件。
+                 ColaB 流由同样的负载按 ColaB 帧格式（带校验字节）生成。
+                 每一轮在帧之间随机插入垃圾字节和长度超限的伪帧头，按随机大小分片投递，
+                 并随机插入接收超时，检查 FrameReader 解出的帧与原始帧完全一致
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import os
+import sys
+import random
+import socket
+import struct
+import argparse
+
+# 项目根目录
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 直接以 common 包导入 sick/common，避免触发 sick/__init__ 中的 numpy 依赖
+sys.path.insert(0, os.path.join(ROOT_DIR, "sick"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common.Control import Control  # noqa: E402
+from common.Protocol.ColaBase import ColaBase  # noqa: E402
+from common.Protocol.FrameReader import FrameReader, STX  # noqa: E402
+from fake_cola2_device import FakeCola2Device  # noqa: E402
+
+# 模糊测试使用的最大帧长度，伪帧头的长度一定大于它
+MAX_LENGTH = 1 << 20
+
+
+class RecordingSocket:
+    """包装套接字，记录 recv/recv_into 收到的所有字节"""
+
+    def __init__(self, sock):
+        self._sock = sock
+        self.received = bytearray()
+
+    def recv(self, bufsize, *args):
+        data = self._sock.recv(bufsize, *args)
+        self.received += data
+        return data
+
+    def recv_into(self, buffer, nbytes=0, *args):
+        n = self._sock.recv_into(buffer, nbytes, *args)
+        self.received += bytes(memoryview(buffer)[:n])
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+
+class ChunkedSocket:
+    """按随机大小分片返回数据的假套接字，可随机抛出接收超时"""
+
+    def __init__(self, data, rng, max_chunk, timeout_rate):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.rng = rng
+        self.max_chunk = max_chunk
+        self.timeout_rate = timeout_rate
+
+    def recv_into(self, buffer, nbytes=0, *args):
+        if self.rng.random() < self.timeout_rate:
+            raise socket.timeout("timed out")
+        size = len(buffer) if nbytes == 0 else min(nbytes, len(buffer))
+        n = min(size, self.rng.randint(1, self.max_chunk), len(self.data) - self.pos)
+        buffer[:n] = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+
+def record_cola2_stream(variables):
+    """用 Control 读写模拟设备，返回套接字收到的原始字节"""
+    methods = {b"GetBlobClientConfig": struct.pack(">HH", 1, 2) + bytes(range(256)) * 8}
+    device = FakeCola2Device(variables=variables, methods=methods).start()
+    control = Control("127.0.0.1", "Cola2", device.port)
+    control.open()
+    recorder = RecordingSocket(control.sock_sopas)
+    control.sock_sopas = recorder
+    try:
+        for name, value in variables.items():
+            control.readVariable(name, useCache=False)
+            control.writeVariable(name, value)
+        control.invokeMethod(b"GetBlobClientConfig")
+        with control.batch(8) as batch:
+            for name in variables:
+                batch.read(name)
+    finally:
+        control.close()
+        device.stop()
+    return bytes(recorder.received)
+
+
+def split_frames(stream, extra_bytes):
+    """参考实现：把无垃圾的录制流整体切分成帧"""
+    frames = []
+    pos = 0
+    while pos < len(stream):
+        if stream[pos:pos + 4] != STX:
+            raise RuntimeError(f"录制流在偏移 {pos} 处不是帧头")
+        length, = struct.unpack_from(">I", stream, pos + 4)
+        end = pos + 8 + length + extra_bytes
+        frames.append(stream[pos:end])
+        pos = end
+    return frames
+
+
+def colab_frames(cola2_frames):
+    """用 CoLa2 帧的负载生成 ColaB 帧（帧尾带校验字节）"""
+    return [ColaBase.encodeFraming(None, frame[8:]) for frame in cola2_frames]
+
+
+def garbage(rng):
+    """生成一段不含 0x02 的随机字节，或一个长度超限的伪帧头"""
+    noise = bytes(rng.choice(range(3, 256)) for _ in range(rng.randint(1, 24)))
+    if rng.random() < 0.5:
+        return noise
+    bogus_length = struct.pack(">I", rng.randint(MAX_LENGTH + 1, 0xFFFFFFFF))
+    # 长度字段不能含 0x02，否则可能与后面的字节拼成新的 STX
+    bogus_length = bytes(b if b != 2 else 3 for b in bogus_length)
+    return rng.choice([b"", b"\x02", b"\x02\x02"]) + noise[:3] + STX + bogus_length
+
+
+def read_frame(reader, extra_bytes):
+    while True:
+        try:
+            return reader.readFrame(extra_bytes)
+        except socket.timeout:
+            continue  # 已接收的部分保留在缓冲区中，重试后继续
+
+
+def fuzz_once(frames, extra_bytes, rng, max_chunk, garbage_rate, timeout_rate):
+    pieces = []
+    injected = 0
+    for frame in frames:
+        if rng.random() < garbage_rate:
+            pieces.append(garbage(rng))
+            injected += 1
+        pieces.append(frame)
+    sock = ChunkedSocket(b"".join(pieces), rng, max_chunk, timeout_rate)
+    reader = FrameReader(sock, maxLength=MAX_LENGTH, bufferSize=rng.choice([16, 64, 4096]))
+    for expected in frames:
+        header, payload = read_frame(reader, extra_bytes)
+        if header + payload != expected:
+            raise AssertionError(f"帧内容不一致: 期望 {len(expected)} 字节，得到 {len(header) + len(payload)} 字节")
+    # 流已读完，再读必须报告连接关闭
+    try:
+        read_frame(reader, extra_bytes)
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("流结束后仍读出了帧")
+    return injected, reader.skippedBytes, reader.rejectedLengths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CoLa 帧读取器模糊测试")
+    parser.add_argument("--input", help="录制的 CoLa2 响应字节流文件（不含垃圾字节），默认现场录制")
+    parser.add_argument("--record", help="把现场录制的字节流保存到该文件")
+    parser.add_argument("--iterations", type=int, default=300, help="每种协议的测试轮数")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--max-chunk", type=int, default=64, help="每次 recv 最多返回的字节数")
+    parser.add_argument("--garbage-rate", type=float, default=0.3, help="每个帧前插入垃圾的概率")
+    parser.add_argument("--timeout-rate", type=float, default=0.05, help="每次 recv 抛出超时的概率")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "rb") as f:
+            stream = f.read()
+    else:
+        variables = {f"var{i:02d}".encode(): struct.pack(">I", i * 0x02020202 & 0xFFFFFFFF) for i in range(16)}
+        stream = record_cola2_stream(variables)
+        if args.record:
+            with open(args.record, "wb") as f:
+                f.write(stream)
+    cola2 = split_frames(stream, 0)
+    streams = {"Cola2": (cola2, 0), "ColaB": (colab_frames(cola2), 1)}
+    print(f"录制流 {len(stream)} 字节，{len(cola2)} 帧")
+
+    rng = random.Random(args.seed)
+    for name, (frames, extra_bytes) in streams.items():
+        injected = skipped = rejected = 0
+        for _ in range(args.iterations):
+            i, s, r = fuzz_once(frames, extra_bytes, rng, args.max_chunk, args.garbage_rate, args.timeout_rate)
+            injected += i
+            skipped += s
+            rejected += r
+        print(f"{name}: {args.iterations} 轮通过，插入垃圾 {injected} 段，跳过 {skipped} 字节，拒绝超限长度 {rejected} 次")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+@Description :   启动耗时基准测试
+                 在独立解释器中分别测量各模块的导入耗时和内存占用，
+                 可选测量从进程启动到处理完第一帧的耗时，并与基线对比做回归检查
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# 项目根目录
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, "benchmarks", "startup_baseline.json")
+
+# 需要测量的模块（按启动路径上的依赖顺序）
+MODULES = [
+    "rknn.ByteTracker",
+    "rknn.RknnYolo",
+    "sick.SickSDK",
+    "epson.EpsonRobot",
+    "workflows.system_loader",
+    "ui.main_window",
+]
+
+# 子进程中的路径设置，与 run.py 保持一致
+_PRELUDE = """
+import sys, os, time, resource
+root = {root!r}
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, 'Qcommon'))
+sys.path.insert(0, os.path.join(root, 'rknn'))
+"""
+
+_IMPORT_SNIPPET = _PRELUDE + """
+import importlib, json
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+error = None
+try:
+    if {needs_common!r}:
+        import sick.common
+        sys.modules['common'] = sick.common
+    importlib.import_module({module!r})
+except Exception as e:
+    error = '%s: %s' % (type(e).__name__, e)
+elapsed = time.perf_counter() - start
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'import_s': elapsed, 'rss_kb': rss_after - rss_before, 'error': error}}))
+"""
+
+_FIRST_FRAME_SNIPPET = _PRELUDE + """
+import json
+start = time.perf_counter()
+import sick.common
+sys.modules['common'] = sick.common
+from sick.SickSDK import QtVisionSick
+camera = QtVisionSick(ipAddr={ip!r}, port={port})
+camera.connect(use_single_step=False)
+connected = time.perf_counter()
+success, depth, image = camera.get_frame()
+frame = time.perf_counter()
+detected = frame
+if {model!r}:
+    from rknn.RknnYolo import RKNN_YOLO
+    detector = RKNN_YOLO({model!r})
+    detector.detect(image)
+    detected = time.perf_counter()
+    detector.release()
+camera.disconnect()
+print(json.dumps({{'connect_s': connected - start, 'first_frame_s': frame - start,
+                  'first_detection_s': detected - start}}))
+"""
+
+
+def _run_snippet(code, timeout):
+    """在全新的解释器中执行代码片段并解析最后一行 JSON 输出"""
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=timeout)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "子进程无输出")
+    return json.loads(lines[-1])
+
+
+def measure_imports(repeat=3, timeout=120):
+    """
+    测量每个模块的冷启动导入耗时
+
+    Args:
+        repeat (int): 每个模块重复次数，取最小值以降低噪声
+        timeout (float): 单次子进程超时时间（秒）
+
+    Returns:
+        dict: {模块名: {"import_s": 秒, "rss_kb": 增量内存, "error": 错误信息}}
+    """
+    results = {}
+    for module in MODULES:
+        samples = []
+        for _ in range(repeat):
+            code = _IMPORT_SNIPPET.format(root=ROOT_DIR, module=module,
+                                          needs_common=module.split(".")[0] not in ("rknn", "epson"))
+            samples.append(_run_snippet(code, timeout))
+        best = min(samples, key=lambda s: s["import_s"])
+        results[module] = best
+    return results
+
+
+def measure_first_frame(ip, port, model_path=None, timeout=120):
+    """
+    测量从进程启动到取得第一帧（以及可选的第一次检测）的耗时
+
+    Returns:
+        dict: connect_s / first_frame_s / first_detection_s
+    """
+    code = _FIRST_FRAME_SNIPPET.format(root=ROOT_DIR, ip=ip, port=port, model=model_path or "")
+    return _run_snippet(code, timeout)
+
+
+def check_regression(results, baseline, tolerance):
+    """
+    与基线比较，耗时超过 基线 * (1 + tolerance) 视为回归
+
+    Returns:
+        list: 回归项描述
+    """
+    regressions = []
+    for key, value in results.items():
+        base = baseline.get(key)
+        if base is None or value is None:
+            continue
+        if value > base * (1 + tolerance):
+            regressions.append(f"{key}: {value * 1000:.1f} ms > 基线 {base * 1000:.1f} ms (+{tolerance:.0%})")
+    return regressions
+
+
+def _flatten(import_results, frame_results):
+    """把结果整理成 {指标名: 秒} 的形式，便于保存和比较"""
+    flat = {}
+    for module, sample in import_results.items():
+        if sample.get("error") is None:
+            flat[f"import:{module}"] = sample["import_s"]
+    for key, value in (frame_results or {}).items():
+        flat[f"startup:{key}"] = value
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SickVision 启动耗时基准测试")
+    parser.add_argument("--repeat", type=int, default=3, help="每个模块的测量次数")
+    parser.add_argument("--camera-ip", help="指定相机IP后测量首帧耗时")
+    parser.add_argument("--camera-port", type=int, default=2122)
+    parser.add_argument("--model", help="同时测量首帧检测耗时的模型路径")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的相对劣化比例")
+    args = parser.parse_args()
+
+    import_results = measure_imports(args.repeat)
+    print("=== 模块导入耗时 ===")
+    for module, sample in import_results.items():
+        if sample.get("error"):
+            print(f"{module:<28} 导入失败: {sample['error']}")
+        else:
+            print(f"{module:<28} {sample['import_s'] * 1000:8.1f} ms  {sample['rss_kb'] / 1024:7.1f} MB")
+
+    frame_results = None
+    if args.camera_ip:
+        frame_results = measure_first_frame(args.camera_ip, args.camera_port, args.model)
+        print("=== 首帧耗时 ===")
+        for key, value in frame_results.items():
+            print(f"{key:<28} {value * 1000:8.1f} ms")
+
+    results = _flatten(import_results, frame_results)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+        print(f"基线已保存到: {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = check_regression(results, baseline, args.tolerance)
+        if regressions:
+            print("=== 启动耗时回归 ===")
+            for item in regressions:
+                print(item)
+            return 1
+        print("未发现启动耗时回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+@Description :   SICK 协议调试日志开销基准测试
+                 对比旧的立即格式化写法与延迟格式化写法在 DEBUG 关闭/开启时的单次调用耗时，
+                 以及 WireTrace 关闭时每帧的额外开销
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import os
+import sys
+import timeit
+import logging
+import argparse
+
+# 项目根目录
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 直接以 common 包导入 sick/common，避免触发 sick/__init__ 中的 numpy 依赖
+sys.path.insert(0, os.path.join(ROOT_DIR, "sick"))
+
+from common.Trace import HexDump, WireTrace, to_hex  # noqa: E402
+
+logger = logging.getLogger("common.benchmark")
+
+HEADER = bytes(range(11))
+TELEGRAM = bytes(i % 256 for i in range(1024))
+
+
+def legacy_to_hex(bStr):
+    """改造前 Stream.to_hex / ColaBase.to_hex 的实现（逐字节 += 拼接）"""
+    fStr = '==> hexDump\n'
+    cnt = 0
+    for b in bytearray(bStr):
+        if cnt == 0:
+            fStr += '    '
+        cnt += 1
+        fStr += '{:02X} '.format(b)
+        if cnt % 4 == 0:
+            fStr += ' '
+        if cnt % 16 == 0:
+            fStr += '\n'
+            cnt = 0
+    if cnt != 0:
+        fStr += '\n'
+    fStr += 'hexDump <=='
+    return fStr
+
+
+class _FormatOnlyHandler(logging.Handler):
+    """只格式化不输出，用于测量 DEBUG 开启时的格式化开销"""
+
+    def emit(self, record):
+        self.format(record)
+
+
+def _per_call_ns(stmt, number):
+    """取 5 次测量中的最小值，换算为单次调用纳秒"""
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e9
+
+
+def run(number):
+    results = {}
+    for payload_name, payload in (("header(11B)", HEADER), ("telegram(1KB)", TELEGRAM)):
+        for debug in (False, True):
+            logger.setLevel(logging.DEBUG if debug else logging.WARNING)
+            n = number if not debug else max(1, number // 20)
+            eager = _per_call_ns(lambda: logger.debug("dump: %s" % legacy_to_hex(payload)), n)
+            lazy = _per_call_ns(lambda: logger.debug("dump: %s", HexDump(payload)), n)
+            state = "DEBUG开启" if debug else "DEBUG关闭"
+            results[f"{payload_name} {state} 立即格式化"] = eager
+            results[f"{payload_name} {state} 延迟格式化"] = lazy
+    logger.setLevel(logging.WARNING)
+
+    WireTrace.disable()
+    results["WireTrace关闭 每帧检查"] = _per_call_ns(lambda: WireTrace.enabled and WireTrace.frame(HEADER, 0, 0.0), number)
+    results["to_hex 旧实现 1KB"] = _per_call_ns(lambda: legacy_to_hex(TELEGRAM), max(1, number // 100))
+    results["to_hex 新实现 1KB"] = _per_call_ns(lambda: to_hex(TELEGRAM), max(1, number // 100))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SICK 协议调试日志开销基准测试")
+    parser.add_argument("--number", type=int, default=100000, help="每项测量的调用次数")
+    args = parser.parse_args()
+
+    # 保证新旧实现输出一致
+    assert to_hex(TELEGRAM) == legacy_to_hex(TELEGRAM)
+    assert to_hex(HEADER) == legacy_to_hex(HEADER)
+
+    # 开启 DEBUG 时不实际输出，只测量格式化开销
+    logger.addHandler(_FormatOnlyHandler())
+    logger.propagate = False
+
+    for name, ns in run(args.number).items():
+        print(f"{name:<40} {ns:12.1f} ns/次")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
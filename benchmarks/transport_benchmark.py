@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+@Description :   数据流传输参数基准测试
+                 在本机启动一个模拟相机的 BLOB 发送端，按固定帧周期发送帧（帧内带发送时间），
+                 分别用默认套接字和 TransportProfile.stream() 接收，对比
+                 用户态 time.time() 时间戳与内核接收时间戳（SO_TIMESTAMPNS）的抖动和尾延迟。
+                 --load 可以启动占用 GIL 的后台线程，模拟解析/推理线程对接收线程的调度干扰
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import os
+import sys
+import time
+import socket
+import struct
+import argparse
+import threading
+import statistics
+
+# 项目根目录
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 直接以 common 包导入 sick/common，避免触发 sick/__init__ 中的 numpy 依赖
+sys.path.insert(0, os.path.join(ROOT_DIR, "sick"))
+
+from common.Stream import Streaming  # noqa: E402
+from common.Transport import TransportProfile  # noqa: E402
+
+
+def _build_frame(payload_size, send_time):
+    """BLOB 帧：帧头 + 8 字节发送时间 + 填充 + 校验字节"""
+    body = struct.pack(">d", send_time) + bytes(max(0, payload_size - 8))
+    # pkgLength 包含 protocolVersion(2) 和 packetType(1)
+    header = struct.pack(">IIHB", 0x02020202, len(body) + 3, 0x0001, 0x62)
+    return header + body + b"\x00"
+
+
+def _sender(server, frames, period_s, payload_size, ready):
+    conn, _ = server.accept()
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    ready.set()
+    next_time = time.perf_counter()
+    try:
+        for _ in range(frames):
+            next_time += period_s
+            while time.perf_counter() < next_time:
+                pass
+            conn.sendall(_build_frame(payload_size, time.time()))
+    finally:
+        conn.close()
+
+
+def _load(stop):
+    """纯 Python 计算，占用 GIL"""
+    x = 0
+    while not stop.is_set():
+        for i in range(10000):
+            x += i * i
+
+
+def _stats_us(values):
+    values = sorted(v * 1e6 for v in values)
+    n = len(values)
+    return {
+        "mean": statistics.fmean(values),
+        "std": statistics.pstdev(values),
+        "p50": values[n // 2],
+        "p99": values[min(n - 1, int(n * 0.99))],
+        "max": values[-1],
+    }
+
+
+def run_case(profile, frames, period_s, payload_size, load_threads):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+    ready = threading.Event()
+    sender = threading.Thread(target=_sender, args=(server, frames, period_s, payload_size, ready), daemon=True)
+    sender.start()
+
+    stream = Streaming("127.0.0.1", port, profile=profile)
+    stream.openStream()
+    ready.wait()
+
+    stop = threading.Event()
+    loaders = [threading.Thread(target=_load, args=(stop,), daemon=True) for _ in range(load_threads)]
+    for t in loaders:
+        t.start()
+
+    user_latency = []
+    kernel_latency = []
+    try:
+        for _ in range(frames):
+            stream.getFrame()
+            send_time, = struct.unpack_from(">d", stream.frame, 11)
+            user_latency.append(stream.frame_header_time_s - send_time)
+            if stream.frame_kernel_time_s is not None:
+                kernel_latency.append(stream.frame_kernel_time_s - send_time)
+    finally:
+        stop.set()
+        for t in loaders:
+            t.join()
+        stream.closeStream()
+        sender.join()
+        server.close()
+    return stream.kernel_timestamps, user_latency, kernel_latency
+
+
+def _print_row(name, values):
+    s = _stats_us(values)
+    print(f"{name:<28}{s['mean']:>10.1f}{s['std']:>10.1f}{s['p50']:>10.1f}{s['p99']:>10.1f}{s['max']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据流传输参数基准测试")
+    parser.add_argument("--frames", type=int, default=500, help="每组发送的帧数")
+    parser.add_argument("--period-ms", type=float, default=10.0, help="帧周期（毫秒）")
+    parser.add_argument("--payload", type=int, default=300000, help="每帧负载字节数")
+    parser.add_argument("--load", type=int, default=2, help="占用 GIL 的后台线程数")
+    args = parser.parse_args()
+
+    period_s = args.period_ms / 1000.0
+    print(f"帧数 {args.frames}，帧周期 {args.period_ms} ms，负载 {args.payload} B，后台负载线程 {args.load}")
+    print(f"{'发送→时间戳 (us)':<28}{'平均':>10}{'标准差':>10}{'p50':>10}{'p99':>10}{'最大':>10}")
+
+    _, user_default, _ = run_case(TransportProfile(), args.frames, period_s, args.payload, args.load)
+    _print_row("默认套接字 time.time()", user_default)
+
+    active, user_tuned, kernel_tuned = run_case(TransportProfile.stream(), args.frames, period_s,
+                                                args.payload, args.load)
+    _print_row("stream 配置 time.time()", user_tuned)
+    if active and kernel_tuned:
+        _print_row("stream 配置 内核时间戳", kernel_tuned)
+    else:
+        print("当前平台不支持 SO_TIMESTAMPNS，未采集内核时间戳")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
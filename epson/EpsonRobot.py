@@ -9,6 +9,7 @@ import time
 import logging
 from typing import Tuple, Optional, Dict, Any
 from Qcommon.LogManager import LogManager
+from Qcommon.metrics import MetricsRegistry, timed
 
 class EpsonRobot:
     """
@@ -45,6 +46,7 @@ class EpsonRobot:
             self.logger.info(f"已经连接到机器人: {self.ip}")
             return True
             
+        MetricsRegistry().counter("robot.connect_attempts").inc()
         try:
             # 关闭之前的连接（如果有）
             self._close_sockets()
@@ -91,6 +93,7 @@ class EpsonRobot:
             
             # 连接成功
             self.is_connected = True
+            MetricsRegistry().counter("robot.connects").inc()
             return True
             
         except socket.timeout:
@@ -125,6 +128,7 @@ class EpsonRobot:
             self.status_socket = None
 
 
+    @timed("robot.send_command")
     def send_command(self, command: str, wait_for_response: bool = False, timeout: float = 5.0) -> Optional[str]:
         """
         通过命令通道发送命令到机器人
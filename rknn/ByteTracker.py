@@ -6,10 +6,22 @@
 """
 
 import numpy as np
-from collections import defaultdict, deque
-import copy
-import torch
-from scipy.optimize import linear_sum_assignment
+from collections import deque
+from Qcommon.metrics import timed
+
+
+def linear_sum_assignment(cost_matrix):
+    """
+    匈牙利算法匹配，scipy 仅在首次匹配时导入，避免拖慢启动
+
+    Args:
+        cost_matrix: 代价矩阵
+
+    Returns:
+        (row_indices, col_indices)
+    """
+    from scipy.optimize import linear_sum_assignment as _linear_sum_assignment
+    return _linear_sum_assignment(cost_matrix)
 
 
 class STrack(object):
@@ -462,6 +474,7 @@ class ByteTracker(object):
         
         self.kalman_filter = KalmanFilter()
 
+    @timed("tracker.update")
     def update(self, detection_results):
         """
         使用当前帧的检测结果更新跟踪器
@@ -0,0 +1,212 @@
+"""
+@Description :   模型管理器
+                 按模型路径和运行参数缓存已加载的 RKNN_YOLO 实例，加载后执行若干次预热推理，
+                 记录加载和预热耗时；“测试模型”和“启动系统”共用同一个实例，NPU 运行时只初始化一次。
+                 实例按引用计数使用，不再使用的实例在模型文件被替换或超过缓存上限时释放
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import os
+import time
+import threading
+
+from Qcommon.LogManager import LogManager
+from Qcommon.metrics import MetricsRegistry
+
+
+class ModelManager:
+    """
+    模型管理器（单例）
+
+    缓存键由模型文件的绝对路径、修改时间和构造参数组成，模型文件被替换后会重新加载。
+    同一个键并发调用 get 时只加载一次，其余调用等待加载完成后得到同一个实例。
+
+    每次 get 对应一次 release：release 只归还引用，没有使用者的实例仍保留在缓存中供下次复用，
+    在以下情况才真正释放 NPU 资源：
+        - 同一模型文件已加载了更新的版本（旧版本不会再被 get 返回）
+        - 没有使用者的实例超过 max_entries 个，按最久未使用的顺序释放
+        - 调用 release() 不传参数
+
+    Example:
+        detector = ModelManager().get("models/best.rknn", tracking=True)
+        print(ModelManager().stats())
+        ModelManager().release(detector)
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(ModelManager, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self, warmup_runs=2, max_entries=2):
+        """
+        Args:
+            warmup_runs (int): 默认的预热推理次数（只在第一次创建单例时生效）
+            max_entries (int): 最多缓存多少个没有使用者的实例（只在第一次创建单例时生效）
+        """
+        if self._initialized:
+            return
+        self.warmup_runs = warmup_runs
+        self.max_entries = max_entries
+        self.logger = LogManager().get_logger()
+        self.metrics = MetricsRegistry()
+        # 缓存键 -> {"detector", "path", "options", "load_s", "warmup_s", "warmup_runs", "loaded_at",
+        #           "hits", "refs", "last_used"}
+        self._entries = {}
+        self._key_locks = {}
+        self._entries_lock = threading.Lock()
+        self._initialized = True
+
+    @staticmethod
+    def _key(model_path, options):
+        path = os.path.abspath(model_path)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        return path, mtime, tuple(sorted(options.items()))
+
+    @staticmethod
+    def _alive(detector):
+        """实例是否仍持有推理后端（被外部 release 后需要重新加载）"""
+        return detector.rknn is not None or detector.pc_yolo is not None
+
+    def _warmup(self, detector, runs):
+        """用全零图像执行预热推理，使首帧不再承担运行时初始化的开销"""
+        if runs <= 0:
+            return
+        import numpy as np
+        if detector.pc_yolo is not None:
+            dummy = np.zeros((detector.input_height, detector.input_width), dtype=np.uint8)
+        else:
+            dummy = np.zeros((detector.input_height, detector.input_width, 3), dtype=np.uint8)
+        for _ in range(runs):
+            detector.detect(dummy)
+
+    def get(self, model_path, warmup_runs=None, **options):
+        """
+        获取已加载并预热的模型实例，缓存中没有时加载
+
+        Args:
+            model_path (str): 模型文件路径
+            warmup_runs (int, optional): 预热推理次数，默认使用 self.warmup_runs
+            **options: RKNN_YOLO 的构造参数（target、conf_threshold、tracking 等）
+
+        Returns:
+            RKNN_YOLO: 模型实例
+
+        Raises:
+            RuntimeError: 模型加载失败
+        """
+        key = self._key(model_path, options)
+        with self._entries_lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._alive(entry["detector"]):
+                with self._entries_lock:
+                    entry["hits"] += 1
+                    entry["refs"] += 1
+                    entry["last_used"] = time.monotonic()
+                self.metrics.counter("model.cache_hits").inc()
+                return entry["detector"]
+            entry = self._load(model_path, self.warmup_runs if warmup_runs is None else warmup_runs, options)
+            with self._entries_lock:
+                self._entries[key] = entry
+        self._evict()
+        return entry["detector"]
+
+    def _load(self, model_path, warmup_runs, options):
+        from rknn.RknnYolo import RKNN_YOLO
+        start = time.perf_counter()
+        detector = RKNN_YOLO(model_path, **options)
+        if not self._alive(detector):
+            raise RuntimeError("模型加载失败")
+        load_s = time.perf_counter() - start
+        start = time.perf_counter()
+        try:
+            self._warmup(detector, warmup_runs)
+        except Exception:
+            detector.release()
+            raise
+        warmup_s = time.perf_counter() - start
+        self.metrics.observe("model.load", load_s)
+        self.metrics.observe("model.warmup", warmup_s)
+        self.logger.info(f"模型 {os.path.basename(model_path)} 加载耗时 {load_s:.2f} 秒，"
+                         f"预热 {warmup_runs} 次耗时 {warmup_s:.2f} 秒")
+        return {
+            "detector": detector,
+            "path": os.path.abspath(model_path),
+            "options": dict(options),
+            "load_s": load_s,
+            "warmup_s": warmup_s,
+            "warmup_runs": warmup_runs,
+            "loaded_at": time.time(),
+            "hits": 0,
+            "refs": 1,
+            "last_used": time.monotonic(),
+        }
+
+    def info(self, detector):
+        """
+        Returns:
+            dict: 该实例的缓存信息（path/load_s/warmup_s/warmup_runs/hits），不是本管理器加载的返回 None
+        """
+        with self._entries_lock:
+            for entry in self._entries.values():
+                if entry["detector"] is detector:
+                    return {k: v for k, v in entry.items() if k != "detector"}
+        return None
+
+    def stats(self):
+        """
+        Returns:
+            list: 所有已缓存模型的信息
+        """
+        with self._entries_lock:
+            return [{k: v for k, v in entry.items() if k != "detector"} for entry in self._entries.values()]
+
+    def release(self, detector=None):
+        """
+        归还模型实例，没有使用者且已过时或超出缓存上限的实例会被释放
+
+        Args:
+            detector (RKNN_YOLO, optional): 要归还的实例，None 表示立即释放全部缓存的实例
+        """
+        if detector is None:
+            with self._entries_lock:
+                entries = list(self._entries.values())
+                self._entries.clear()
+            for entry in entries:
+                entry["detector"].release()
+            return
+        with self._entries_lock:
+            entry = next((e for e in self._entries.values() if e["detector"] is detector), None)
+            if entry is not None:
+                entry["refs"] = max(0, entry["refs"] - 1)
+                entry["last_used"] = time.monotonic()
+        if entry is None:
+            # 不是本管理器加载的实例，直接释放
+            detector.release()
+            return
+        self._evict()
+
+    def _evict(self):
+        """释放没有使用者的过时版本，以及超出 max_entries 的最久未使用实例"""
+        with self._entries_lock:
+            latest = {}
+            for (path, mtime, options), entry in self._entries.items():
+                if mtime is not None and mtime > latest.get((path, options), float("-inf")):
+                    latest[(path, options)] = mtime
+            idle = [key for key, entry in self._entries.items() if entry["refs"] <= 0]
+            stale = [key for key in idle if key[1] is not None and key[1] < latest[(key[0], key[2])]]
+            fresh = sorted((key for key in idle if key not in stale),
+                           key=lambda key: self._entries[key]["last_used"])
+            evicted = stale + fresh[:max(0, len(fresh) - self.max_entries)]
+            entries = [self._entries.pop(key) for key in evicted]
+        for entry in entries:
+            self.logger.info(f"释放模型 {os.path.basename(entry['path'])}")
+            entry["detector"].release()
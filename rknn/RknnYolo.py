@@ -8,34 +8,34 @@
 
 import os
 import sys
-import urllib
-import urllib.request
 import time
 import numpy as np
-import argparse
 import cv2,math
 import platform
-from math import ceil
-from itertools import product as product
-from shapely.geometry import Polygon
 
 # 导入ByteTrack跟踪器
 from ByteTracker import ByteTracker
+from Qcommon.metrics import MetricsRegistry
 
 # -------- 平台适配导入 --------
 USING_PC = sys.platform.startswith("win") or platform.system().lower().startswith("windows")
 
-try:
-    if USING_PC:
-        from ultralytics import YOLO as UltralyticsYOLO
-        RKNN = None  # 占位，PC 上不用
-    else:
-        from rknn.api import RKNN
-        UltralyticsYOLO = None
-except ImportError:
-    # 如果对应包缺失
-    RKNN = None
-    UltralyticsYOLO = None
+# 推理后端在首次创建模型时才导入（ultralytics 会连带导入 torch，代价很高）
+RKNN = None
+UltralyticsYOLO = None
+
+
+def _load_backend():
+    """按平台延迟导入推理后端，对应包缺失时保持为 None"""
+    global RKNN, UltralyticsYOLO
+    try:
+        if USING_PC:
+            if UltralyticsYOLO is None:
+                from ultralytics import YOLO as UltralyticsYOLO
+        elif RKNN is None:
+            from rknn.api import RKNN
+    except ImportError:
+        pass
 
 class RKNN_YOLO:
     """
@@ -76,11 +76,14 @@ class RKNN_YOLO:
         self.with_tracking = tracking  # 跟踪器开关
         
         try:
+            _load_backend()
             if USING_PC:
                 if UltralyticsYOLO is None:
                     raise RuntimeError("未安装 ultralytics 库，无法在 Windows 平台加载 YOLO 模型")
                 self.pc_yolo = UltralyticsYOLO(model_path)
             else:
+                if RKNN is None:
+                    raise RuntimeError("未安装 rknn-toolkit2 库，无法加载 RKNN 模型")
                 # 初始化RKNN
                 self.rknn = RKNN(verbose=True)
                 ret = self.rknn.load_rknn(model_path)
@@ -305,7 +308,7 @@ class RKNN_YOLO:
         对输入图像进行目标检测
         
         Args:
-            image (numpy.ndarray): 输入图像，BGR格式
+            image (numpy.ndarray): 输入图像，BGR格式或单通道灰度图
             
         Returns:
             list: 检测结果列表，每个元素为DetectBox对象
@@ -327,27 +330,33 @@ class RKNN_YOLO:
         if self.rknn is None:
             raise RuntimeError("当前实例未加载任何模型")
 
+        metrics = MetricsRegistry()
         # 预处理
-        image_h, image_w = image.shape[:2]
-        img_resized = cv2.resize(image, (self.input_width, self.input_height), interpolation=cv2.INTER_LINEAR)
-        img_rgb = cv2.cvtColor(img_resized, cv2.COLOR_BGR2RGB)
-        img_rgb = np.expand_dims(img_rgb, 0)
+        with metrics.timer("detect.pre"):
+            image_h, image_w = image.shape[:2]
+            img_resized = cv2.resize(image, (self.input_width, self.input_height), interpolation=cv2.INTER_LINEAR)
+            # 流水线传入的是相机的单通道强度图，模型输入需要 3 通道
+            code = cv2.COLOR_GRAY2RGB if img_resized.ndim == 2 else cv2.COLOR_BGR2RGB
+            img_rgb = cv2.cvtColor(img_resized, code)
+            img_rgb = np.expand_dims(img_rgb, 0)
         
         # 推理
-        results = self.rknn.inference(inputs=[img_rgb], data_format='nhwc')
+        with metrics.timer("detect.infer"):
+            results = self.rknn.inference(inputs=[img_rgb], data_format='nhwc')
         # 后处理
-        pred_boxes = self._postprocess(results)
+        with metrics.timer("detect.post"):
+            pred_boxes = self._postprocess(results)
 
-        # 转换回原始图像尺寸
-        for box in pred_boxes:
-            box.pt1x = int(box.pt1x / self.input_width * image_w)
-            box.pt1y = int(box.pt1y / self.input_height * image_h)
-            box.pt2x = int(box.pt2x / self.input_width * image_w)
-            box.pt2y = int(box.pt2y / self.input_height * image_h)
-            box.pt3x = int(box.pt3x / self.input_width * image_w)
-            box.pt3y = int(box.pt3y / self.input_height * image_h)
-            box.pt4x = int(box.pt4x / self.input_width * image_w)
-            box.pt4y = int(box.pt4y / self.input_height * image_h)
+            # 转换回原始图像尺寸
+            for box in pred_boxes:
+                box.pt1x = int(box.pt1x / self.input_width * image_w)
+                box.pt1y = int(box.pt1y / self.input_height * image_h)
+                box.pt2x = int(box.pt2x / self.input_width * image_w)
+                box.pt2y = int(box.pt2y / self.input_height * image_h)
+                box.pt3x = int(box.pt3x / self.input_width * image_w)
+                box.pt3y = int(box.pt3y / self.input_height * image_h)
+                box.pt4x = int(box.pt4x / self.input_width * image_w)
+                box.pt4y = int(box.pt4y / self.input_height * image_h)
 
         return pred_boxes
     
@@ -26,6 +26,10 @@ sys.path.insert(0, rknn_path)
 import sick.common
 sys.modules['common'] = sick.common
 
+# 日志使用队列模式，由后台线程统一写控制台和文件，采集/机器人线程不阻塞在 I/O 上
+from Qcommon.LogManager import LogManager
+LogManager(use_queue=True)
+
 # 直接导入ui模块
 from ui.main_window import main
 
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+无界面启动视觉系统（不依赖 PyQt5）
+"""
+
+import sys
+import os
+import argparse
+
+# 获取项目路径
+current_file = os.path.abspath(__file__)
+project_root = os.path.dirname(current_file)  # SickVision目录
+
+# 添加路径到sys.path
+sys.path.insert(0, project_root)  # 添加SickVision目录
+
+# 添加Qcommon到路径中
+qcommon_path = os.path.join(project_root, 'Qcommon')
+rknn_path = os.path.join(project_root, 'rknn')
+sys.path.insert(0, qcommon_path)
+sys.path.insert(0, rknn_path)
+
+# 将sick.common模块映射为common模块
+import sick.common
+sys.modules['common'] = sick.common
+
+# 日志使用队列模式，由后台线程统一写控制台和文件，采集/机器人线程不阻塞在 I/O 上
+from Qcommon.LogManager import LogManager
+LogManager(use_queue=True)
+
+from workflows.headless_runner import HeadlessRunner
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SickVision 无界面运行")
+    parser.add_argument("--model", help="模型路径，默认使用 models 目录中的第一个 .rknn 文件")
+    parser.add_argument("--config-dir", help="配置目录，默认使用项目下的 config 目录")
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="统计信息打印间隔（秒）")
+    parser.add_argument("--metrics-port", type=int, help="启动 Prometheus 指标服务的端口")
+    parser.add_argument("--cell", help="工位名称，作为指标的 cell 标签")
+    parser.add_argument("--adaptive-rate", nargs=2, type=float, metavar=("MIN_FPS", "MAX_FPS"),
+                        help="启用自适应帧周期，相机帧率在 MIN_FPS~MAX_FPS 之间跟随处理能力调整")
+    args = parser.parse_args()
+
+    runner = HeadlessRunner(model_path=args.model, config_dir=args.config_dir,
+                            stats_interval=args.stats_interval,
+                            metrics_port=args.metrics_port, cell=args.cell,
+                            adaptive_rate=args.adaptive_rate)
+    sys.exit(runner.run())
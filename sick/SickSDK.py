@@ -6,15 +6,185 @@
 """
 
 from common.Control import Control
+from common.ConfigProfile import ConfigProfile
 from common.Streaming import Data
 from common.Stream import Streaming
 from common.Streaming.BlobServerConfiguration import BlobClientConfig
+from common.Streaming.DeviceTime import ClockSync
+from common.Streaming.StreamHealth import StreamHealth
+from common.Transport import TransportProfile
 from Qcommon.decorators import retry, require_connection, safe_disconnect
-import cv2
 import numpy as np
 import time
 from Qcommon.LogManager import LogManager
+from Qcommon.metrics import MetricsRegistry
 import socket
+import struct
+import threading
+import weakref
+from collections import deque
+
+
+class BandwidthProfile:
+    """
+    数据流带宽配置
+    选择需要的深度图通道以及 AG 设备的极坐标/笛卡尔数据，
+    设备端关闭不需要的数据传输，解析端跳过不需要的通道
+    """
+    CHANNELS = ("distance", "intensity", "confidence")
+
+    def __init__(self, channels=("intensity", "distance"), polar=False, cartesian=False, link_mbps=1000.0):
+        """
+        Args:
+            channels (tuple): 需要解析的深度图通道，取值见 CHANNELS，
+                decode_frame 生成图像需要 intensity
+            polar (bool): AG 设备是否传输极坐标数据（同时开启极坐标数据缩减）
+            cartesian (bool): AG 设备是否传输笛卡尔数据（同时开启笛卡尔数据缩减）
+            link_mbps (float): 网络链路带宽，用于估算链路允许的最大帧率
+        """
+        unknown = set(channels) - set(self.CHANNELS)
+        if unknown:
+            raise ValueError(f"未知的通道: {sorted(unknown)}，可选: {self.CHANNELS}")
+        if "intensity" not in channels:
+            raise ValueError("decode_frame 需要 intensity 通道")
+        self.channels = frozenset(channels)
+        self.polar = polar
+        self.cartesian = cartesian
+        self.link_mbps = link_mbps
+
+    @classmethod
+    def production(cls, link_mbps=1000.0):
+        """生产配置：强度图用于检测，距离用于计算抓取高度"""
+        return cls(channels=("intensity", "distance"), link_mbps=link_mbps)
+
+    @classmethod
+    def full(cls, link_mbps=1000.0):
+        """解析全部深度图通道"""
+        return cls(channels=cls.CHANNELS, link_mbps=link_mbps)
+
+    def __repr__(self):
+        return (f"BandwidthProfile(channels={sorted(self.channels)}, polar={self.polar}, "
+                f"cartesian={self.cartesian}, link_mbps={self.link_mbps})")
+
+
+class StreamWatchdog:
+    """
+    数据流看门狗
+    按帧周期计算数据流的卡顿超时，数据流或控制通道出错时只重连出故障的通道，
+    记录每次故障（incident）的检测耗时、重连耗时、重连次数和停机时间
+    """
+
+    CHANNELS = ("stream", "control")
+
+    def __init__(self, stall_frames=3, min_timeout_s=0.2, max_attempts=5, backoff_s=0.2, history=100):
+        """
+        Args:
+            stall_frames (int): 连续多少个帧周期收不到帧视为卡顿
+            min_timeout_s (float): 卡顿超时的下限（秒），避免高帧率时误判
+            max_attempts (int): 每次故障最多重连次数，全部失败后抛出 ConnectionError
+            backoff_s (float): 第一次重连失败后的等待时间，之后每次加倍
+            history (int): 保留的故障记录条数
+        """
+        self.stall_frames = stall_frames
+        self.min_timeout_s = min_timeout_s
+        self.max_attempts = max_attempts
+        self.backoff_s = backoff_s
+        self.metrics = MetricsRegistry()
+        self.logger = LogManager().get_logger()
+        self.incidents = deque(maxlen=history)
+        self.reconnects = {channel: 0 for channel in self.CHANNELS}
+        self.last_frame_time = None
+        self._open = {}
+        # 重连数据流时可能需要先恢复控制通道，recover 会在同一线程中嵌套调用
+        self._lock = threading.RLock()
+
+    def stall_timeout_s(self, frame_period_us):
+        """
+        Args:
+            frame_period_us (int): 当前帧周期（微秒）
+
+        Returns:
+            float: 数据流接收超时（秒）
+        """
+        return max(self.min_timeout_s, self.stall_frames * (frame_period_us or 0) / 1e6)
+
+    def frame_received(self):
+        """收到一帧完整数据，结束未结束的数据流故障"""
+        now = time.monotonic()
+        self.last_frame_time = now
+        if "stream" in self._open:
+            self._close("stream", now)
+
+    def recover(self, channel, error, reconnect):
+        """
+        处理一次通道故障：记录故障开始，带退避重试重连
+
+        Args:
+            channel (str): "stream" 或 "control"
+            error (Exception): 检测到的错误
+            reconnect (callable): 重连函数，失败时抛出异常
+
+        Raises:
+            ConnectionError: 全部重连尝试失败
+        """
+        with self._lock:
+            now = time.monotonic()
+            incident = self._open.get(channel)
+            if incident is None:
+                # 数据流的停机从最后一帧算起，控制通道从检测到错误算起
+                start = self.last_frame_time if channel == "stream" and self.last_frame_time else now
+                incident = {"channel": channel, "reason": str(error) or type(error).__name__,
+                            "start": start, "detected_s": now - start, "attempts": 0,
+                            "reconnect_s": 0.0, "downtime_s": None}
+                self._open[channel] = incident
+                self.logger.warning(f"{channel} 通道故障，{incident['detected_s']:.2f} 秒后发现: {incident['reason']}")
+            delay = self.backoff_s
+            for attempt in range(self.max_attempts):
+                incident["attempts"] += 1
+                begin = time.monotonic()
+                try:
+                    reconnect()
+                except Exception as e:
+                    incident["reconnect_s"] += time.monotonic() - begin
+                    self.logger.warning(f"{channel} 通道第 {incident['attempts']} 次重连失败: {str(e)}")
+                    if attempt + 1 < self.max_attempts:
+                        time.sleep(delay)
+                        delay *= 2
+                    continue
+                elapsed = time.monotonic() - begin
+                incident["reconnect_s"] += elapsed
+                self.reconnects[channel] += 1
+                self.metrics.counter(f"camera.reconnects.{channel}").inc()
+                self.metrics.observe("camera.reconnect", elapsed)
+                self.logger.info(f"{channel} 通道已重连，耗时 {elapsed * 1000:.0f} 毫秒")
+                if channel == "control":
+                    self._close(channel, time.monotonic())
+                return
+            self.metrics.counter("camera.reconnect_failures").inc()
+            raise ConnectionError(f"{channel} 通道重连 {self.max_attempts} 次均失败") from error
+
+    def _close(self, channel, now):
+        incident = self._open.pop(channel, None)
+        if incident is None:
+            return
+        incident["downtime_s"] = now - incident["start"]
+        self.incidents.append(incident)
+        self.metrics.observe("camera.downtime", incident["downtime_s"])
+        self.logger.info(f"{channel} 通道恢复，停机 {incident['downtime_s']:.2f} 秒，"
+                         f"重连 {incident['attempts']} 次共 {incident['reconnect_s']:.2f} 秒")
+
+    def report(self):
+        """
+        Returns:
+            dict: reconnects 各通道重连次数，open 未恢复的通道，
+                  incidents 最近的故障记录（channel/reason/detected_s/attempts/reconnect_s/downtime_s）
+        """
+        return {
+            "reconnects": dict(self.reconnects),
+            "open": sorted(self._open),
+            "incidents": [dict(i) for i in self.incidents],
+        }
+
 
 class QtVisionSick:
     """
@@ -23,7 +193,10 @@ class QtVisionSick:
     该类获取的流默认为TCP流,如果需要UDP流,请参考sick_visionary_python_samples/visionary_StreamingDemo.py
     """
     
-    def __init__(self, ipAddr="192.168.10.5", port=2122, protocol="Cola2"):
+    def __init__(self, ipAddr="192.168.10.5", port=2122, protocol="Cola2",
+                 stream_profile=None, control_profile=None, bandwidth_profile=None,
+                 frame_period_us=33333, session_timeout_s=30, keep_alive=True, discovery=None,
+                 watchdog=None):
         """
         初始化西克相机
         
@@ -31,18 +204,144 @@ class QtVisionSick:
             ipAddr (str): 相机IP地址
             port (int): 相机控制端口
             protocol (str): 通信协议
+            stream_profile (TransportProfile, optional): 数据流套接字参数，
+                默认使用大接收缓冲区、keepalive 和内核接收时间戳
+            control_profile (TransportProfile, optional): 控制通道套接字参数，
+                默认关闭 Nagle、开启 TCP_QUICKACK 和 keepalive
+            bandwidth_profile (BandwidthProfile, optional): 数据流带宽配置，
+                连接时写入设备，默认不修改设备配置并解析全部通道
+            frame_period_us (int): 连接时设置的帧周期（微秒），默认约 30 fps
+            session_timeout_s (int): CoLa2 会话超时（1~255 秒）
+            keep_alive (bool): 控制通道空闲时在后台刷新 CoLa2 会话，
+                避免空闲后的第一条指令先要重新建立会话
+            discovery (Discovery, optional): 设备发现服务，缓存中已知的设备连接前不再做 TCP 探测，
+                连接成功后刷新缓存，失败时从缓存中移除
+            watchdog (StreamWatchdog, optional): 数据流看门狗，数据流在几个帧周期内收不到帧
+                或控制通道出错时只重连该通道，默认 StreamWatchdog()
         """
         self.ipAddr = ipAddr
         self.control_port = port  # 控制端口
         self.streaming_port = 2114  # 数据流端口
         self.protocol = protocol
+        self.stream_profile = stream_profile or TransportProfile.stream()
+        self.control_profile = control_profile or TransportProfile.control()
+        self.bandwidth_profile = bandwidth_profile
+        self.frame_period_us = frame_period_us
+        self.session_timeout_s = session_timeout_s
+        self.keep_alive = keep_alive
+        self.discovery = discovery
+        self.watchdog = watchdog if watchdog is not None else StreamWatchdog()
+        # 连接时应用的配置文件，控制通道重连后用它核对设备配置
+        self._profile = None
+        # 单步模式下两次触发之间的最小间隔（秒），0 表示不限制
+        self.trigger_interval_s = 0.0
+        self._last_trigger = 0.0
+        self.device_name = ""
+        # 最近一帧的字节数和数据格式，用于带宽统计
+        self.last_frame_bytes = 0
+        self._last_xml = None
         self.deviceControl = None
         self.streaming_device = None
         self.is_connected = False
         self.logger = LogManager().get_logger()
+        self.metrics = MetricsRegistry()
+        # 设备时钟与主机时钟同步，用于计算每帧的真实采集时间
+        self.clock_sync = ClockSync()
+        self.last_receive_time_s = None
+        self.last_device_timestamp_us = 0
+        self.last_capture_time_s = None
+        # 帧号丢帧/重复帧/校验失败统计以及可选的质量门限
+        self.stream_health = StreamHealth()
+        self._export_metrics()
         self.camera_params = None  # 存储相机参数
         self.use_single_step = True  # 默认使用单步模式
         
+    def _login(self, control):
+        """
+        内部方法：登录控制通道并按需启动会话保活
+        
+        Args:
+            control (Control): 已打开的控制通道
+        """
+        try:
+            control.login(Control.USERLEVEL_SERVICE, 'CUST_SERV')
+            self.logger.info("以服务级别登录成功")
+        except Exception as e:
+            self.logger.warning(f"Service level login failed, trying client level: {str(e)}")
+            control.login(Control.USERLEVEL_AUTH_CLIENT, 'CLIENT')
+            self.logger.info("以客户端级别登录成功")
+        
+        # 控制通道内部加锁，保活线程与采集、调速等线程的指令串行执行
+        if self.keep_alive:
+            control.startKeepAlive()
+
+    def _arm_stream_timeout(self):
+        """内部方法：按当前帧周期设置数据流接收超时，卡顿几个帧周期即可被发现"""
+        self.streaming_device.setTimeout(self.watchdog.stall_timeout_s(self.frame_period_us))
+
+    def reconnect_stream(self):
+        """
+        只重连数据流通道
+        
+        设备配置保持不变，不重新登录也不重新设置参数；连续模式下重新发送开始采集，
+        控制连接也已失效时先重连控制通道
+        
+        Raises:
+            ConnectionError: 数据流连接失败
+        """
+        if self.streaming_device is not None:
+            try:
+                self.streaming_device.closeStream()
+            except Exception as e:
+                self.logger.debug(f"关闭旧数据流时出错: {str(e)}")
+        stream = Streaming(self.ipAddr, self.streaming_port, profile=self.stream_profile)
+        stream.openStream()
+        self.streaming_device = stream
+        self._arm_stream_timeout()
+        if not self.use_single_step:
+            try:
+                self.deviceControl.startStream()
+            except OSError as e:
+                # 相机重启或断线后控制连接也已失效，先重连控制通道再开始采集
+                self.watchdog.recover("control", e, self.reconnect_control)
+                self.deviceControl.startStream()
+
+    def reconnect_control(self):
+        """
+        只重连控制通道
+        
+        新连接沿用旧连接的变量缓存（设备标识、帧周期等不再重新读取）；
+        连接时应用过配置文件的，重连后与设备核对并只写回不同的变量
+        """
+        old = self.deviceControl
+        if old is not None:
+            old.stopKeepAlive()
+            try:
+                old.close()
+            except Exception as e:
+                self.logger.debug(f"关闭旧控制连接时出错: {str(e)}")
+        control = Control(self.ipAddr, self.protocol, self.control_port,
+                          profile=self.control_profile, sessionTimeout=self.session_timeout_s)
+        if old is not None:
+            control.cache = old.cache
+        control.open()
+        try:
+            self._login(control)
+            if self._profile is not None:
+                self._profile.apply(control)
+        except Exception:
+            control.close()
+            raise
+        self.deviceControl = control
+
+    def _trigger(self):
+        """内部方法：单步模式下触发一帧，控制通道断开时先重连控制通道"""
+        try:
+            self.deviceControl.singleStep()
+        except OSError as e:
+            self.watchdog.recover("control", e, self.reconnect_control)
+            self.deviceControl.singleStep()
+
     def _check_camera_available(self):
         """
         检查相机是否可访问
@@ -62,12 +361,14 @@ class QtVisionSick:
             return False
     
     @retry(max_retries=3, delay=1.0, logger_name=__name__)
-    def connect(self, use_single_step=True):
+    def connect(self, use_single_step=True, profile=None):
         """
         连接相机并初始化流
         
         Args:
             use_single_step (bool): 是否使用单步模式
+            profile (ConfigProfile | str, optional): 配置文件或其路径，给出时与设备当前配置比较，
+                只把不同的变量在一次流水线批量请求中写入，代替逐条设置帧周期和数据流参数
             
         Returns:
             bool: 连接是否成功
@@ -75,51 +376,51 @@ class QtVisionSick:
         Raises:
             Exception: 连接过程中的任何异常
         """
-        if not self._check_camera_available():
+        self.metrics.counter("camera.connect_attempts").inc()
+        known = self.discovery.lookup(self.ipAddr) if self.discovery is not None else None
+        if known is not None:
+            self.metrics.counter("camera.probe_skipped").inc()
+            self.logger.info(f"设备已知，跳过可达性探测: {known}")
+        elif not self._check_camera_available():
             raise ConnectionError(f"Camera at {self.ipAddr}:{self.control_port} is not accessible")
             
         self.use_single_step = use_single_step
         
         # 创建设备控制实例
-        self.deviceControl = Control(self.ipAddr, self.protocol, self.control_port)
+        self.deviceControl = Control(self.ipAddr, self.protocol, self.control_port,
+                                     profile=self.control_profile, sessionTimeout=self.session_timeout_s)
         
         # 打开连接
-        self.deviceControl.open()
+        try:
+            self.deviceControl.open()
+        except Exception:
+            # 缓存的设备信息已失效，重试时重新探测
+            if self.discovery is not None:
+                self.discovery.forget(self.ipAddr)
+            raise
         
         # 尝试登录 - 在连接时登录，保持登录状态
-        try:
-            self.deviceControl.login(Control.USERLEVEL_SERVICE, 'CUST_SERV')
-            self.logger.info("以服务级别登录成功")
-        except Exception as e:
-            self.logger.warning(f"Service level login failed, trying client level: {str(e)}")
-            self.deviceControl.login(Control.USERLEVEL_AUTH_CLIENT, 'CLIENT')
-            self.logger.info("以客户端级别登录成功")
+        self._login(self.deviceControl)
         
         # 获取设备信息
         name, version = self.deviceControl.getIdent()
-        self.logger.info(f"Connected to device: {name.decode('utf-8')}, version: {version.decode('utf-8')}")
+        self.device_name = name.decode('utf-8')
+        self.logger.info(f"Connected to device: {self.device_name}, version: {version.decode('utf-8')}")
         
-        # 尝试设置较低的帧速率以减少延迟
-        try:
-            # 获取当前帧周期 (微秒)
-            current_frame_period = self.deviceControl.getFramePeriodUs()
-            self.logger.info(f"当前帧周期: {current_frame_period} 微秒")
-            
-            # 设置较低的帧率 (例如 30 fps = 33333 微秒)
-            self.deviceControl.setFramePeriodUs(33333)
-            new_frame_period = self.deviceControl.getFramePeriodUs()
-            self.logger.info(f"设置新帧周期: {new_frame_period} 微秒")
-        except Exception as e:
-            self.logger.warning(f"设置帧率失败: {str(e)}")
+        # 按带宽配置关闭不需要的数据传输（需在打开数据流之前完成）
+        if self.bandwidth_profile is not None:
+            self._configure_data_transfer(self.bandwidth_profile)
         
-        # 配置流设置
-        streamingSettings = BlobClientConfig()
-        streamingSettings.setTransportProtocol(self.deviceControl, streamingSettings.PROTOCOL_TCP)
-        streamingSettings.setBlobTcpPort(self.deviceControl, self.streaming_port)
+        if profile is not None:
+            self.apply_profile(profile)
+        else:
+            self._configure_stream_defaults()
         
         # 初始化流
-        self.streaming_device = Streaming(self.ipAddr, self.streaming_port)
+        self.streaming_device = Streaming(self.ipAddr, self.streaming_port, profile=self.stream_profile)
         self.streaming_device.openStream()
+        self._arm_stream_timeout()
+        self.logger.info(f"数据流内核接收时间戳: {'已启用' if self.streaming_device.kernel_timestamps else '不可用'}")
         
         # 根据模式决定流的处理方式
         if self.use_single_step:
@@ -131,6 +432,9 @@ class QtVisionSick:
             self.deviceControl.startStream()
         
         self.is_connected = True
+        if self.discovery is not None:
+            self.discovery.confirm(self.ipAddr, self.protocol, self.control_port)
+        self.metrics.counter("camera.connects").inc()
         self.logger.info("Successfully connected to camera")
         return True
     @require_connection
@@ -176,13 +480,87 @@ class QtVisionSick:
         Returns:
             tuple: (success, depth_data, intensity_image)
         """
-        self.streaming_device.getFrame()
-        wholeFrame = self.streaming_device.frame
+        return self.decode_frame(self._receive_frame())
+
+    def _receive_frame(self):
+        """
+        内部方法：从数据流接收一帧并记录接收耗时
+        
+        Returns:
+            bytearray: 原始帧数据
+        """
+        try:
+            with self.metrics.timer("camera.getFrame"):
+                self.streaming_device.getFrame()
+        except (OSError, RuntimeError) as e:
+            # 卡顿（超时）、连接断开或帧头错位：只重连数据流，本帧放弃
+            self.metrics.counter("camera.stream_errors").inc()
+            self.watchdog.recover("stream", e, self.reconnect_stream)
+            raise
+        self.watchdog.frame_received()
+        # Streaming 自身记录的从收到帧头到收完整帧的耗时
+        self.metrics.observe("camera.stream_recv", self.streaming_device.frame_revc_time_s)
+        self.metrics.counter("camera.frames").inc()
+        kernel_time_s = self.streaming_device.frame_kernel_time_s
+        if kernel_time_s is not None:
+            # 帧头到达内核到接收线程读到帧头之间的调度等待
+            self.metrics.observe("camera.socket_wait", self.streaming_device.frame_header_time_s - kernel_time_s)
+        self.last_receive_time_s = self.streaming_device.frame_acq_time_s
+        return self.streaming_device.frame
+
+    @require_connection
+    def grab_raw_frame(self):
+        """
+        只从数据流接收一帧原始数据，不做解析
+        供流水线的采集阶段使用，解析交给 decode_frame 在其他线程完成
+        
+        Returns:
+            bytearray: 原始帧数据
+        """
+        if self.use_single_step:
+            if self.trigger_interval_s > 0:
+                # 按调速设置的帧周期限制触发频率
+                wait = self._last_trigger + self.trigger_interval_s - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+            self._last_trigger = time.monotonic()
+            self._trigger()
+        return self._receive_frame()
+
+    def decode_frame(self, wholeFrame, receive_time_s=None):
+        """
+        解析一帧原始数据
+        
+        解析后用设备时间戳和主机接收时间更新时钟同步，
+        结果保存在 last_device_timestamp_us / last_capture_time_s 中
+        
+        Args:
+            wholeFrame (bytearray): grab_raw_frame 或 Streaming.getFrame 得到的原始帧
+            receive_time_s (float, optional): 该帧的主机接收时间（time.time()），
+                默认使用最近一次接收的时间，跨线程解析时应显式传入
+            
+        Returns:
+            tuple: (success, depth_data, intensity_image)
+        """
         # 解析数据
         myData = Data.Data()
-        myData.read(wholeFrame)
+        channels = self.bandwidth_profile.channels if self.bandwidth_profile is not None else None
+        with self.metrics.timer("camera.Data.read"):
+            myData.read(wholeFrame, channels=channels)
+        self.last_frame_bytes = len(wholeFrame)
+        self._last_xml = myData.xmlParser
+        if myData.corrupted:
+            self.metrics.counter("camera.frames_corrupted").inc()
         if not myData.hasDepthMap:
             raise ValueError("No depth map data available")
+        depthmap = myData.depthmap
+        reason = self.stream_health.update(depthmap.frameNumber, myData.corrupted,
+                                           depthmap.dataQuality, depthmap.deviceStatus)
+        if reason is not None:
+            # 未通过质量门限的帧不再解析图像，直接丢弃
+            self.metrics.counter("camera.frames_rejected").inc()
+            self.logger.debug(f"帧 {depthmap.frameNumber} 未通过质量门限: {reason}")
+            return False, None, None
         # 获取深度数据
         distance_data = list(myData.depthmap.distance)
         # 获取强度数据
@@ -192,10 +570,226 @@ class QtVisionSick:
         # 重塑数据为图像
         image = np.array(intensityData).reshape((numRows, numCols))
         # 直接调整对比度，不进行归一化
+        import cv2
         adjusted_image = cv2.convertScaleAbs(image, alpha=0.05, beta=1)
         # 保存相机参数
         self.camera_params = myData.cameraParams
+        self._update_frame_timing(myData.depthmap.timestamp_us,
+                                  receive_time_s if receive_time_s is not None else self.last_receive_time_s)
         return True, distance_data, adjusted_image
+
+    def _configure_stream_defaults(self):
+        """内部方法：逐条设置帧周期和 TCP 数据流参数（未使用配置文件时）"""
+        # 尝试设置较低的帧速率以减少延迟
+        try:
+            # 获取当前帧周期 (微秒)
+            current_frame_period = self.deviceControl.getFramePeriodUs()
+            self.logger.info(f"当前帧周期: {current_frame_period} 微秒")
+        
+            # 设置较低的帧率 (默认 30 fps = 33333 微秒)
+            self.deviceControl.setFramePeriodUs(self.frame_period_us)
+            new_frame_period = self.deviceControl.getFramePeriodUs()
+            self.frame_period_us = new_frame_period
+            self.logger.info(f"设置新帧周期: {new_frame_period} 微秒")
+        except Exception as e:
+            self.logger.warning(f"设置帧率失败: {str(e)}")
+    
+        # 配置流设置
+        streamingSettings = BlobClientConfig()
+        streamingSettings.setTransportProtocol(self.deviceControl, streamingSettings.PROTOCOL_TCP)
+        streamingSettings.setBlobTcpPort(self.deviceControl, self.streaming_port)
+
+    def apply_profile(self, profile):
+        """
+        应用设备配置文件：一次批量读取比较差异，再一次流水线批量写入不同的变量
+        
+        数据流固定使用 TCP 和 streaming_port，配置文件中的对应值会被覆盖
+        
+        Args:
+            profile (ConfigProfile | str): 配置文件或其路径
+            
+        Returns:
+            dict: 实际写入的变量 {变量名: 值}
+        """
+        if isinstance(profile, str):
+            profile = ConfigProfile.load(profile)
+        profile = profile.updated({
+            b"BlobTransportProtocolAPI": struct.pack(">B", BlobClientConfig().PROTOCOL_TCP),
+            b"BlobTcpPortAPI": struct.pack(">H", self.streaming_port),
+        })
+        start = time.perf_counter()
+        written = profile.apply(self.deviceControl)
+        self._profile = profile
+        self.metrics.observe("camera.profile_apply", time.perf_counter() - start)
+        self.frame_period_us = self.deviceControl.getFramePeriodUs()
+        self.logger.info(f"已应用配置文件，写入 {len(written)} 个变量: "
+                         f"{[name.decode('ascii') for name in written]}，帧周期 {self.frame_period_us} 微秒")
+        return written
+
+    @require_connection
+    def save_profile(self, path, names=None):
+        """
+        把设备当前配置保存为配置文件
+        
+        Args:
+            path (str): 文件路径
+            names (list, optional): 要保存的变量名（bytes），默认 ConfigProfile.DEFAULT_VARIABLES
+            
+        Returns:
+            ConfigProfile: 保存的配置
+        """
+        profile = ConfigProfile.capture(self.deviceControl, names)
+        profile.save(path)
+        self.logger.info(f"设备配置已保存到 {path}，共 {len(profile.values)} 个变量")
+        return profile
+
+    @require_connection
+    def apply_bandwidth_profile(self, profile):
+        """
+        应用带宽配置：写入设备的数据传输开关，并调整解析的通道
+        
+        Args:
+            profile (BandwidthProfile): 带宽配置
+        """
+        self._configure_data_transfer(profile)
+        self.bandwidth_profile = profile
+
+    def _configure_data_transfer(self, profile):
+        """
+        内部方法：按带宽配置设置设备的数据传输
+        
+        只有 AG 设备支持极坐标/笛卡尔数据及其缩减，其他设备始终传输完整深度图，
+        不需要的通道只在解析时跳过
+        """
+        if " AG " not in self.device_name:
+            self.logger.info(f"设备不支持选择数据传输，只在解析时跳过未使用的通道: {profile}")
+            return
+        control = self.deviceControl
+        steps = [
+            ("深度图传输", control.enableDepthMapDataTransfer),
+            ("极坐标传输", control.enablePolar2DDataTransfer if profile.polar else control.disablePolar2DDataTransfer),
+            ("极坐标缩减", control.activatePolar2DReduction if profile.polar else control.deactivatePolar2DReduction),
+            ("笛卡尔传输", control.enableCartesianDataTransfer if profile.cartesian else control.disableCartesianDataTransfer),
+            ("笛卡尔缩减", control.activateCartesianReduction if profile.cartesian else control.deactivateCartesianReduction),
+        ]
+        for name, step in steps:
+            try:
+                step()
+            except Exception as e:
+                self.logger.warning(f"设置{name}失败: {str(e)}")
+        if profile.polar or profile.cartesian:
+            control.waitForReductionParamsApplied()
+        self.logger.info(f"已应用带宽配置: {profile}")
+
+    def bandwidth_report(self):
+        """
+        根据最近一帧统计带宽
+        
+        Returns:
+            dict: frame_bytes 每帧字节数，channel_bytes 各通道字节数，
+                  decoded_channels 解析的通道，link_fps 链路允许的最大帧率，
+                  decode_fps 按解析耗时 p50 估算的最大帧率，achievable_fps 两者较小值；
+                  还没有收到帧时返回 None
+        """
+        if not self.last_frame_bytes or self._last_xml is None:
+            return None
+        xml = self._last_xml
+        pixels = (xml.imageWidth or 0) * (xml.imageHeight or 0)
+        distance_bytes = getattr(xml, "numBytesPerZValue" if xml.stereo else "numBytesPerDistanceValue", 0)
+        channel_bytes = {
+            "distance": pixels * distance_bytes,
+            "intensity": pixels * getattr(xml, "numBytesPerIntensityValue", 0),
+            "confidence": pixels * getattr(xml, "numBytesPerConfidenceValue", 0),
+        }
+        link_mbps = self.bandwidth_profile.link_mbps if self.bandwidth_profile is not None else 1000.0
+        link_fps = link_mbps * 1e6 / 8 / self.last_frame_bytes
+        decode_ms = self.metrics.histogram("camera.Data.read").percentile(50)
+        decode_fps = 1000.0 / decode_ms if decode_ms > 0 else float("inf")
+        channels = self.bandwidth_profile.channels if self.bandwidth_profile is not None else BandwidthProfile.CHANNELS
+        return {
+            "frame_bytes": self.last_frame_bytes,
+            "channel_bytes": channel_bytes,
+            "decoded_channels": sorted(channels),
+            "link_fps": link_fps,
+            "decode_fps": decode_fps,
+            "achievable_fps": min(link_fps, decode_fps),
+        }
+
+    @require_connection
+    def set_frame_period_us(self, period_us):
+        """
+        调整帧周期
+        
+        连续模式下写入设备的 framePeriodUs；单步模式下设备按触发采集，
+        改为限制 grab_raw_frame 的触发间隔，不占用控制通道
+        
+        Args:
+            period_us (int): 帧周期（微秒）
+            
+        Returns:
+            int: 实际生效的帧周期（微秒）
+        """
+        period_us = int(period_us)
+        if self.use_single_step:
+            self.trigger_interval_s = period_us / 1e6
+        else:
+            self.deviceControl.setFramePeriodUs(period_us)
+            self.metrics.counter("camera.frame_period_writes").inc()
+            # 设备可能对帧周期做限幅，写入已使缓存失效，这里读回设备实际使用的值
+            period_us = self.deviceControl.getFramePeriodUs()
+        self.frame_period_us = period_us
+        self._arm_stream_timeout()
+        return period_us
+
+    def set_quality_gate(self, gate):
+        """
+        设置质量门限，未通过的帧在 decode_frame 中直接丢弃（返回 success=False）
+        
+        Args:
+            gate (QualityGate): 质量门限，None 表示不过滤
+        """
+        self.stream_health.gate = gate
+
+    def _export_metrics(self):
+        """
+        内部方法：把数据流健康和控制通道统计注册为读取时计算的指标
+        
+        指标注册在全局单例上，回调只通过弱引用访问本实例，
+        重新创建相机对象后旧实例可以被正常回收
+        """
+        health = self.stream_health
+        self.metrics.gauge("camera.stream.lost", lambda: health.lost)
+        self.metrics.gauge("camera.stream.duplicates", lambda: health.duplicates)
+        self.metrics.gauge("camera.stream.restarts", lambda: health.restarts)
+        self.metrics.gauge("camera.stream.rejected", lambda: health.rejected)
+        self.metrics.gauge("camera.stream.loss_rate", lambda: health.rolling()["loss_rate"])
+        camera_ref = weakref.ref(self)
+
+        def control_stat(getter):
+            def read():
+                camera = camera_ref()
+                control = camera.deviceControl if camera is not None else None
+                return getter(control) if control else 0
+            return read
+
+        self.metrics.gauge("camera.control.session_recreations", control_stat(lambda c: c.sessionRecreations))
+        self.metrics.gauge("camera.control.keep_alives", control_stat(lambda c: c.keepAlives))
+        self.metrics.gauge("camera.control.cache_hits", control_stat(lambda c: c.cache.hits))
+        self.metrics.gauge("camera.control.cache_misses", control_stat(lambda c: c.cache.misses))
+
+    def _update_frame_timing(self, device_us, receive_time_s):
+        """
+        内部方法：用设备时间戳更新时钟同步并计算该帧在主机时钟上的采集时间
+        
+        Args:
+            device_us (int): 设备时间戳（epoch 微秒）
+            receive_time_s (float): 主机接收时间（秒）
+        """
+        self.last_device_timestamp_us = device_us
+        delay = self.clock_sync.update(device_us, receive_time_s)
+        self.last_capture_time_s = self.clock_sync.device_to_host(device_us)
+        if delay is not None:
+            self.metrics.observe("camera.capture_to_receive", max(0.0, delay))
     
     @require_connection    
     def start_continuous_mode(self):
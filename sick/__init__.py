@@ -11,6 +11,7 @@ from . import common as _common
 _sys.modules.setdefault('common', _common)
 
 # 现在导入SickSDK（其中会用到common模块）
-from .SickSDK import QtVisionSick
+from .SickSDK import QtVisionSick, BandwidthProfile, StreamWatchdog
+from common.Protocol.Discovery import Discovery
 
-__all__ = ["QtVisionSick"] 
\ No newline at end of file
+__all__ = ["QtVisionSick", "BandwidthProfile", "StreamWatchdog", "Discovery"] 
\ No newline at end of file
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Device configuration profiles.
+
+A ConfigProfile holds the raw values of a set of device variables. It can be
+captured from a device in one batched read, stored in a JSON file and later
+applied to the same or a replacement device: the profile is diffed against the
+live values (again one batched read) and only the variables that differ are
+written, all in one pipelined batch.
+
+Example:
+    profile = ConfigProfile.capture(control)
+    profile.save('camera.json')
+    ...
+    profile = ConfigProfile.load('camera.json')
+    changed = profile.apply(control)
+"""
+
+import binascii
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+class ConfigProfile(object):
+    """ Raw values of device variables that make up a device configuration. """
+
+    # variables captured by default; variables the device does not know are left out
+    DEFAULT_VARIABLES = [
+        b'mjCurrentJobId',
+        b'framePeriodUs',
+        b'integrationTimeUs',
+        b'integrationTimeUsColor',
+        b'acquisitionMode',
+        b'acquisitionModeStereo',
+        b'frontendMode',
+        b'nonAmbiguityMode',
+        b'distanceMode',
+        b'enDepthAPI',
+        b'enPolarAPI',
+        b'enHeightAPI',
+        b'enPolar',
+        b'enCart',
+        b'BlobTransportProtocolAPI',
+        b'BlobTcpPortAPI',
+        b'BlobUdpReceiverPortAPI',
+        b'BlobUdpReceiverIPAPI',
+        b'BlobUdpControlPortAPI',
+        b'BlobUdpMaxPacketSizeAPI',
+        b'BlobUdpIdleTimeBetweenPacketsAPI',
+    ]
+
+    # the job is selected with a method call and reloads the job parameters,
+    # so it is applied before the remaining variables are compared
+    JOB_VARIABLE = b'mjCurrentJobId'
+    JOB_SELECT_METHOD = b'mjSelectJob'
+
+    def __init__(self, values, deviceName=None, deviceVersion=None):
+        """
+        values(dict): {variable name (bytes): raw value (bytes)}, applied in this order
+        deviceName(str): name of the device the profile was captured from
+        deviceVersion(str): firmware version of that device
+        """
+        self.values = dict(values)
+        self.deviceName = deviceName
+        self.deviceVersion = deviceVersion
+
+    @classmethod
+    def capture(cls, control, names=None, window=16):
+        """ Read the configuration of a device in one batched request.
+
+        control(Control): open control channel
+        names(list): variables to capture, default DEFAULT_VARIABLES
+        """
+        names = cls.DEFAULT_VARIABLES if names is None else names
+        deviceName, deviceVersion = control.getIdent()
+        values = control.snapshotConfig(names, window)
+        logger.info("captured %d of %d variables from %s", len(values), len(names), deviceName)
+        return cls(values, deviceName.decode('utf-8'), deviceVersion.decode('utf-8'))
+
+    def updated(self, values):
+        """ Returns a copy of this profile with some values replaced or added. """
+        merged = dict(self.values)
+        merged.update(values)
+        return ConfigProfile(merged, self.deviceName, self.deviceVersion)
+
+    def save(self, path):
+        data = {
+            'format': FORMAT_VERSION,
+            'deviceName': self.deviceName,
+            'deviceVersion': self.deviceVersion,
+            'variables': {name.decode('ascii'): binascii.hexlify(value).decode('ascii')
+                          for name, value in self.values.items()},
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('format') != FORMAT_VERSION:
+            raise RuntimeError("unsupported profile format {!r} in {}".format(data.get('format'), path))
+        values = {name.encode('ascii'): binascii.unhexlify(value) for name, value in data['variables'].items()}
+        return cls(values, data.get('deviceName'), data.get('deviceVersion'))
+
+    def diff(self, control, window=16):
+        """ Compare the profile with the live device.
+
+        returns: dict {name: (live value, profile value)} of the variables that differ,
+                 the live value is None if the device could not read the variable
+        """
+        live = control.snapshotConfig(list(self.values), window)
+        return {name: (live.get(name), value) for name, value in self.values.items() if live.get(name) != value}
+
+    def _selectJob(self, control, window):
+        wanted = self.values.get(self.JOB_VARIABLE)
+        if wanted is None:
+            return False
+        current = control.snapshotConfig([self.JOB_VARIABLE], window).get(self.JOB_VARIABLE)
+        if current == wanted:
+            return False
+        logger.info("selecting job %s", binascii.hexlify(wanted).decode('ascii'))
+        control.invokeMethod(self.JOB_SELECT_METHOD, wanted)
+        return True
+
+    def apply(self, control, window=16):
+        """ Write the variables that differ from the live device in one pipelined batch.
+
+        The device needs to be logged in with a user level that may write the variables.
+
+        returns: dict {name: value} of the variables that were written (including the job)
+        raises: RuntimeError if some writes were rejected, the others are applied anyway
+        """
+        if self.deviceName is not None:
+            deviceName, _ = control.getIdent()
+            if deviceName.decode('utf-8') != self.deviceName:
+                logger.warning("profile was captured from %s, applying it to %s",
+                               self.deviceName, deviceName.decode('utf-8'))
+
+        written = {}
+        if self._selectJob(control, window):
+            written[self.JOB_VARIABLE] = self.values[self.JOB_VARIABLE]
+        changes = self.diff(control, window)
+        changes.pop(self.JOB_VARIABLE, None)
+        if not changes:
+            logger.info("device configuration matches the profile")
+            return written
+
+        with control.batch(window) as batch:
+            results = [batch.write(name, value) for name, (_, value) in changes.items()]
+        failed = []
+        for result in results:
+            if result.error is None:
+                # not cached: the device may clamp a value (e.g. framePeriodUs), the next
+                # read has to fetch what was actually set
+                written[result.name] = self.values[result.name]
+            else:
+                failed.append((result.name, result.error))
+        logger.info("profile applied, %d of %d variables written", len(written), len(self.values))
+        if failed:
+            raise RuntimeError("profile variables not written: {}".format(
+                ", ".join("{} ({})".format(name.decode('ascii'), error) for name, error in failed)))
+        return written
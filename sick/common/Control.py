@@ -22,10 +22,12 @@ import logging
 import socket
 import struct
 import hashlib
+import threading
 import time
 
 from common.Protocol.ColaB import ColaB
 from common.Protocol.Cola2 import Cola2
+from common.Transport import TransportProfile
 
 logger = logging.getLogger(__name__)
 
@@ -104,6 +106,171 @@ class SrtLogin(object):
         return False
 
 
+class VariableCache(object):
+    """
+    Read-through cache for device variables (and side-effect free getter methods).
+
+    Only names with an entry in `ttl` are cached; the value is the time to live in
+    seconds, None keeps the value until it is invalidated. Control invalidates a
+    variable when it is written and the whole cache when a method with possible side
+    effects is invoked.
+    """
+
+    DEFAULT_TTL = {
+        b'DeviceIdent': None,
+        b'framePeriodUs': 60.0,
+        b'integrationTimeUs': 1.0,  # may be changed by the device itself (auto exposure)
+        b'integrationTimeUsColor': 1.0,
+        b'acquisitionMode': 60.0,
+        b'frontendMode': 60.0,
+        b'enDepthAPI': 60.0,
+        b'enPolarAPI': 60.0,
+        b'enHeightAPI': 60.0,
+        b'enPolar': 60.0,
+        b'enCart': 60.0,
+        b'BlobTransportProtocolAPI': 60.0,
+        b'BlobTcpPortAPI': 60.0,
+        b'BlobUdpReceiverPortAPI': 60.0,
+        b'BlobUdpReceiverIPAPI': 60.0,
+        b'BlobUdpControlPortAPI': 60.0,
+        b'BlobUdpMaxPacketSizeAPI': 60.0,
+        b'BlobUdpIdleTimeBetweenPacketsAPI': 60.0,
+        b'GetAccessMode': 5.0,
+    }
+
+    # methods that do not change any cached value
+    KEEP_ON_INVOKE = frozenset([b'PLAYNEXT', b'PLAYSTART', b'PLAYSTOP', b'GetBlobClientConfig',
+                                b'GetChallenge', b'GetAccessMode'])
+
+    def __init__(self, ttl=None, enabled=True):
+        self.ttl = dict(self.DEFAULT_TTL if ttl is None else ttl)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def cacheable(self, name):
+        return self.enabled and name in self.ttl
+
+    def setTtl(self, name, ttl):
+        """ Cache `name` for `ttl` seconds (None: until invalidated). """
+        self.ttl[name] = ttl
+        self.invalidate(name)
+
+    def removeTtl(self, name):
+        """ Stop caching `name`. """
+        self.ttl.pop(name, None)
+        self.invalidate(name)
+
+    def get(self, name):
+        """ Returns the cached value or None if it is missing or expired. """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[1] is not None and time.monotonic() >= entry[1]:
+                del self._entries[name]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def put(self, name, value):
+        if not self.cacheable(name):
+            return
+        ttl = self.ttl[name]
+        with self._lock:
+            self._entries[name] = (value, None if ttl is None else time.monotonic() + ttl)
+
+    def invalidate(self, name=None):
+        """ Drop one cached value, or all of them if name is None. """
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def invalidateAfterInvoke(self, name):
+        if name not in self.KEEP_ON_INVOKE:
+            self.invalidate()
+
+
+class BatchResult(object):
+    """ Response of one request in a Control.batch(), available after the batch was executed. """
+    __slots__ = ('name', 'payload', 'error', 'done')
+
+    def __init__(self, name):
+        self.name = name
+        self.payload = None
+        self.error = None
+        self.done = False
+
+    def result(self):
+        """ Returns the response payload or raises the error of this request. """
+        if not self.done:
+            raise RuntimeError("batch containing {!r} was not executed yet".format(self.name))
+        if self.error is not None:
+            raise self.error
+        return self.payload
+
+
+class Batch(object):
+    """
+    Collects variable reads/writes and method calls and sends them in one go.
+
+    With CoLa2 the requests are pipelined: up to `window` requests are in flight and
+    responses are matched by request id, so the whole batch costs roughly one round trip
+    instead of one per request. With CoLa B they are sent one after the other.
+
+    Example:
+        with control.batch() as batch:
+            period = batch.read(b'framePeriodUs')
+            batch.write(b'enDepthAPI', struct.pack('B', 1))
+        framePeriodUs, = struct.unpack('>I', period.result())
+    """
+
+    def __init__(self, control, window=16):
+        self.control = control
+        self.window = window
+        self.requests = []
+
+    def _add(self, cmd, name, payload):
+        if not isinstance(name, bytes) or not isinstance(payload, bytes):
+            raise RuntimeError("invalid protocol string (not a bytes object)")
+        result = BatchResult(name)
+        self.requests.append((cmd, name, payload, result))
+        return result
+
+    def read(self, name):
+        """ Queue a variable read, the result payload is the variable data. """
+        return self._add(b'R', name, b'')
+
+    def write(self, name, data=b''):
+        """ Queue a variable write. """
+        return self._add(b'W', name, data)
+
+    def invoke(self, name, data=b''):
+        """ Queue a method invocation, the result payload is the method return value. """
+        return self._add(b'M', name, data)
+
+    def execute(self):
+        """ Send all queued requests and fill in their results.
+        Returns the list of BatchResult objects in the order they were queued. """
+        requests, self.requests = self.requests, []
+        if requests:
+            self.control.executeBatch(requests, self.window)
+        return [r[3] for r in requests]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+        return False
+
+
 class Control:
     """ all methods that use the control channel (sopas) """
 
@@ -125,9 +292,14 @@ class Control:
     SULVERSION_1 = 1
     SULVERSION_2 = 2
 
-    def __init__(self, ipAddress, protocol, control_port=None, timeout=5, sulVersion = SULVERSION_UNKNOWN):
+    def __init__(self, ipAddress, protocol, control_port=None, timeout=5, sulVersion = SULVERSION_UNKNOWN, profile=None,
+                 sessionTimeout=None):
+        """ profile(TransportProfile): socket options for the control channel,
+            default is a plain socket with the given timeout.
+            sessionTimeout(int): CoLa2 session timeout in seconds (1..255), default 30 s. """
         self.ipAddress = ipAddress
         self.timeout = timeout
+        self.profile = profile if profile is not None else TransportProfile(timeout=timeout)
         self.sessionId = -1
         self.reqId = 0
         self.control_port = control_port
@@ -142,6 +314,18 @@ class Control:
         else:
             raise Exception("invalid argument: supported protocols ColaB, Cola2")
 
+        if sessionTimeout is not None:
+            if not 1 <= int(sessionTimeout) <= 255:
+                raise ValueError("CoLa2 session timeout must be within 1..255 seconds")
+            self.protocol.sessionTimeoutSeconds = int(sessionTimeout)
+
+        # serializes all request/response exchanges, the socket is shared with the keep-alive thread
+        self.lock = threading.RLock()
+        self.keepAlives = 0
+        self.cache = VariableCache()
+        self._keepAliveThread = None
+        self._keepAliveStop = threading.Event()
+
         if(control_port != None):
             self.control_port = control_port
         else:
@@ -153,7 +337,7 @@ class Control:
         """ establish the control channel to the device """
         logger.info("Connecting to device...")
         self.sock_sopas = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock_sopas.settimeout(self.timeout)
+        self.profile.apply(self.sock_sopas)
 
         try:
             self.sock_sopas.connect((self.ipAddress, self.control_port))
@@ -165,6 +349,7 @@ class Control:
 
     def close(self):
         """ close device control channel """
+        self.stopKeepAlive()
         if self.sock_sopas is not None:
             logging.info("Closing device connection...")
             self.sock_sopas.close()
@@ -242,8 +427,14 @@ class Control:
 
         payload = name + b' ' + payload
 
-        recvCmd, recvMode, payload = self.protocol.send(self.sock_sopas, cmd, b'N', payload)
+        with self.lock:
+            self.profile.rearm(self.sock_sopas)
+            recvCmd, recvMode, payload = self.protocol.send(self.sock_sopas, cmd, b'N', payload)
+
+        return self.checkResponse(cmd, name, recvCmd, recvMode, payload)
 
+    def checkResponse(self, cmd, name, recvCmd, recvMode, payload):
+        """ Validates a response to the command `cmd` on `name` and returns its payload. """
         # expected response command code
         if cmd == b'M':
             # synchronous methods returns AN on success
@@ -280,7 +471,7 @@ class Control:
             recvName = payload[:nameEndIdx]
             payload = payload[nameEndIdx + 1:]
         else:
-            recvName = payload.tobytes()
+            recvName = bytes(payload)
             payload = bytes()
 
         if recvName != name:
@@ -288,21 +479,107 @@ class Control:
 
         return payload
 
+    @property
+    def sessionRecreations(self):
+        """ Number of CoLa2 sessions opened after the first one (0 for CoLa B). """
+        return max(0, getattr(self.protocol, 'sessionsCreated', 0) - 1)
+
+    def startKeepAlive(self, margin=0.5, variable=b'DeviceIdent'):
+        """ Keep the CoLa2 session alive while the control channel is idle.
+
+        A background thread reads `variable` whenever the session would otherwise
+        expire within `margin` * session timeout, so the next real command does not
+        pay for a new session handshake. Does nothing for CoLa B (no sessions).
+        """
+        if not hasattr(self.protocol, 'sessionExpiresIn') or self._keepAliveThread is not None:
+            return
+        self._keepAliveStop.clear()
+        self._keepAliveThread = threading.Thread(target=self._keepAliveLoop, args=(margin, variable),
+                                                 name='cola2-keepalive', daemon=True)
+        self._keepAliveThread.start()
+
+    def stopKeepAlive(self):
+        """ Stop the keep-alive thread started by startKeepAlive(). """
+        if self._keepAliveThread is None:
+            return
+        self._keepAliveStop.set()
+        if self._keepAliveThread is not threading.current_thread():
+            self._keepAliveThread.join(self.timeout or None)
+        self._keepAliveThread = None
+
+    def _keepAliveLoop(self, margin, variable):
+        while True:
+            threshold = self.protocol.sessionTimeoutSeconds * margin
+            remaining = self.protocol.sessionExpiresIn()
+            # no session yet: the first command creates it, nothing to keep alive
+            wait = remaining - threshold if remaining > 0 else threshold
+            if self._keepAliveStop.wait(max(0.1, wait)):
+                return
+            # an expired session is re-created here as well, not by the next real command
+            if self.protocol.sessionId == -1 or self.protocol.sessionExpiresIn() > threshold:
+                continue
+            try:
+                self.readVariable(variable, useCache=False)
+                self.keepAlives += 1
+            except Exception as e:
+                logger.warning("CoLa2 keep-alive failed: %s", e)
+
+    def batch(self, window=16):
+        """ Returns a Batch to read/write many variables with as few round trips as possible. """
+        return Batch(self, window)
+
+    def executeBatch(self, requests, window=16):
+        """ Sends the (cmd, name, payload, BatchResult) requests of a Batch and fills in the results. """
+        messages = [(cmd, b'N', name + b' ' + payload) for cmd, name, payload, _ in requests]
+        with self.lock:
+            self.profile.rearm(self.sock_sopas)
+            if hasattr(self.protocol, 'sendBatch'):
+                responses = self.protocol.sendBatch(self.sock_sopas, messages, window)
+            else:
+                responses = [self.protocol.send(self.sock_sopas, *message) for message in messages]
+            # cache updates stay under the lock, see readVariable
+            for (cmd, name, data, result), (recvCmd, recvMode, payload) in zip(requests, responses):
+                try:
+                    result.payload = self.checkResponse(cmd, name, recvCmd, recvMode, payload)
+                except Exception as e:
+                    result.error = e
+                result.done = True
+                if cmd == b'W':
+                    self.cache.invalidate(name)
+                elif cmd == b'M':
+                    self.cache.invalidateAfterInvoke(name)
+                elif result.error is None:
+                    self.cache.put(name, result.payload)
+
     def reboot(self):
         """ reboot device """
         logger.info("Rebooting device...")
         self.sendCommand(b'M', b'mSCreboot')
         logger.info("done.")
 
-    def readVariable(self, name):
-        """ returns data from a variable """
+    def readVariable(self, name, useCache=True):
+        """ returns data from a variable, cached variables are served from the cache """
         if (not isinstance(name, bytes)):
             raise RuntimeError("invalid protocol string (!bytes)")
-        return self.sendCommand(b'R', name)
+        cacheable = useCache and self.cache.cacheable(name)
+        if cacheable:
+            value = self.cache.get(name)
+            if value is not None:
+                return value
+        # read and put under the channel lock, so a write of the same variable from another
+        # thread cannot invalidate the entry in between and have the old value cached again
+        with self.lock:
+            value = self.sendCommand(b'R', name)
+            if cacheable:
+                self.cache.put(name, value)
+        return value
 
     def writeVariable(self, name, data=None):
         """ write data to a variable """
-        self.sendCommand(b'W', name, data)
+        try:
+            self.sendCommand(b'W', name, data)
+        finally:
+            self.cache.invalidate(name)
 
     def invokeMethod(self, name, data=b''):
         """ Invoke method. """
@@ -311,11 +588,42 @@ class Control:
         if (not isinstance(data, bytes)):
             raise RuntimeError("invalid protocol string (!bytes)")
 
+        # getter methods without arguments (e.g. GetAccessMode) may be cached like variables
+        cacheable = not data and self.cache.cacheable(name)
+        if cacheable:
+            rx = self.cache.get(name)
+            if rx is not None:
+                return rx
+
         logger.info("Invoking %s method..." % name)
-        rx = self.sendCommand(b'M', name, data)
+        with self.lock:
+            try:
+                rx = self.sendCommand(b'M', name, data)
+            finally:
+                self.cache.invalidateAfterInvoke(name)
+            if cacheable:
+                self.cache.put(name, rx)
         logger.info("... done.")
         return rx
 
+    def snapshotConfig(self, names=None, window=16):
+        """ Read the device configuration in one batched request and refresh the cache.
+
+        names: variables to read, default are all cached variables
+        returns: dict {name: raw value}; variables the device does not know are left out
+        """
+        if names is None:
+            names = [name for name in self.cache.ttl if not name.startswith(b'Get')]
+        with self.batch(window) as batch:
+            results = [batch.read(name) for name in names]
+        snapshot = {}
+        for result in results:
+            if result.error is None:
+                snapshot[result.name] = result.payload
+            else:
+                logger.debug("snapshot: %s not readable: %s", result.name, result.error)
+        return snapshot
+
     def initStream(self):
         """ Tells the device that there is a streaming channel by invoking a
         method named GetBlobClientConfig.
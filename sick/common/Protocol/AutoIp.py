@@ -17,7 +17,6 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 
 import logging
 import platform
-import psutil
 import random
 import socket
 import struct
@@ -48,6 +47,7 @@ class AutoIp:
         self.serverIp = serverIp
         self.serverNetMask = serverNetMask
         if platform.system() == 'Linux':
+            import psutil  # only needed to map the server IP to its interface
             addrs = psutil.net_if_addrs()
             for a in addrs:
                 for c in addrs[a]:
@@ -64,6 +64,8 @@ class AutoIp:
         # Set a timeout so the socket does not block
         # indefinitely when trying to receive data.
         sock.settimeout(self.TIMEOUT)
+        # several scans (one per interface) may bind the AutoIp port at the same time
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         if platform.system() == 'Linux':
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, self.serverDevice.encode('utf8'))
             sock.bind(('', self.AUTOIP_PORT)) # bind on all IPs (interfaces) since linux ip stack does not forwar broadcast traffic to specific IP
@@ -252,7 +254,7 @@ class AutoIp:
                 mostInnerArrayLen, = struct.unpack('>H', rpl[offset:offset + 2])
                 offset += 2
                 logger.debug("  key: {}, mostInnerArrayLen: {}".format(key, mostInnerArrayLen))
-                if key == "DPNo":  # PortNumber [UInt]
+                if key == b"DPNo":  # PortNumber [UInt]
                     p, = struct.unpack('>H', rpl[offset:offset + 2])
                     offset += 2
                     logger.debug("  DPNo: {}".format(p))
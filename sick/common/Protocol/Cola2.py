@@ -15,10 +15,14 @@ CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTH
 FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+import logging
 import struct
 import time
 
 from common.Protocol.ColaBase import ColaBase
+from common.Trace import WireTrace
+
+logger = logging.getLogger(__name__)
 
 
 class Cola2(ColaBase):
@@ -32,6 +36,8 @@ class Cola2(ColaBase):
         self.requestId = 0xFFFF
         self.sessionTimeoutSeconds = 30
         self.lastSendTime = 0
+        # number of sessions opened, every session after the first one is a re-creation
+        self.sessionsCreated = 0
 
     @staticmethod
     def generatePayload(sessionId, requestId, cmd, mode, payload):
@@ -43,21 +49,30 @@ class Cola2(ColaBase):
             raise RuntimeError("invalid protocol string (not a bytes object)")
         return Cola2.HEADER.pack(sessionId, requestId, cmd, mode) + payload
 
+    @staticmethod
+    def parsePacket(packet):
+        """Splits a received Cola 2 packet into its header fields and the payload
+        packet may be a memoryview into the receive buffer, only the payload is copied
+        :rtype tuple, format: sessionId, requestId, cmd, mode, payload """
+        # skip HubCtrl und NoC
+        recvSessionId, recvReqId, cmd, mode = Cola2.HEADER.unpack_from(packet, 2)
+        return recvSessionId, recvReqId, cmd, mode, bytes(packet[2 + Cola2.HEADER.size:])
+
+    def checkSession(self, recvSessionId):
+        if (self.sessionId == 0):
+            self.sessionId = recvSessionId
+        elif recvSessionId != self.sessionId:
+            raise RuntimeError("unexpected response; session ids {} expected, but got {}".format(recvSessionId, self.sessionId))
+
     def extractData(self, packet):
         """Extracts data from a received Cola 2 packet
         :param packet
         :param reqId
         :rtype tuple, format: sessionId, cmd, mode, payload """
-        # skip HubCtrl und NoC
-        payload = packet[2:]
-        recvSessionId, recvReqId, cmd, mode = Cola2.HEADER.unpack_from(payload)
-        payload = payload[Cola2.HEADER.size:]
+        recvSessionId, recvReqId, cmd, mode, payload = self.parsePacket(packet)
         if recvReqId != self.requestId:
             raise RuntimeError("unexpected response; request ids {} expected, but got {}".format(recvReqId, self.requestId))
-        if (self.sessionId == 0):
-            self.sessionId = recvSessionId
-        elif recvSessionId != self.sessionId:
-            raise RuntimeError("unexpected response; session ids {} expected, but got {}".format(recvSessionId, self.sessionId))
+        self.checkSession(recvSessionId)
 
         return cmd, mode, payload
 
@@ -88,26 +103,123 @@ class Cola2(ColaBase):
             raise RuntimeError("failed to create session, invalid command {!r} and mode {!r}".format(cmd, mode))
         if self.sessionId == 0:
             raise RuntimeError("failed to create session, sessionId was 0")
+        self.sessionsCreated += 1
+        logger.debug("CoLa2 session %d created (timeout %d s)", self.sessionId, self.sessionTimeoutSeconds)
 
-    # old name: sendCoLa2
-    def send(self, sopas_socket, cmd, mode, payload):
-        """
-        Sends data and automatically creates new CoLa2 session if the previous one timed out.
-        """
+    def sessionExpiresIn(self):
+        """ Seconds until the current session times out, 0 if there is no valid session. """
+        if self.sessionId == -1:
+            return 0
+        return max(0.0, self.lastSendTime + self.sessionTimeoutSeconds - time.time())
+
+    def ensureSession(self, sopas_socket):
+        """ Creates a new CoLa2 session if there is none or the previous one timed out. """
         if(self.sessionId == -1 or time.time() - self.lastSendTime >= self.sessionTimeoutSeconds):
             self.lastSendTime = time.time()
             self.getSession(sopas_socket)
         self.lastSendTime = time.time()
 
+    def nextRequestId(self):
         # fix: avoid type convertion from UINT16 to UINT32, Header requires only 16bit!
         if self.requestId == 0xFFFF:
             self.requestId = 0
         else:
             self.requestId += 1
+        return self.requestId
+
+    # old name: sendCoLa2
+    def send(self, sopas_socket, cmd, mode, payload):
+        """
+        Sends data and automatically creates new CoLa2 session if the previous one timed out.
+        """
+        self.ensureSession(sopas_socket)
+        self.nextRequestId()
 
         msg = self.generatePayload(self.sessionId, self.requestId, cmd, mode, payload)
         msg = self.encodeFraming(msg)
 
-        request_data = self.sendToDevice(sopas_socket, msg, extra_bytes=0)
+        with self.sendToDevice(sopas_socket, msg, extra_bytes=0, asView=True) as request_data:
+            return self.extractData(request_data)
+
+    def sendBatch(self, sopas_socket, requests, window=16, drainTimeout=2.0):
+        """
+        Sends several requests without waiting for the individual responses.
+
+        Up to `window` requests are in flight at the same time, responses are matched
+        to their requests by the CoLa2 request id, so the device may answer in any order.
+
+        If anything fails while requests are in flight, their responses are read and
+        dropped for up to `drainTimeout` seconds so the next request is not answered
+        by a stale response. If that does not succeed the socket is closed, the next
+        command fails and the caller has to reconnect.
+
+        requests: sequence of (cmd, mode, payload) tuples
+        returns: list of (cmd, mode, payload) responses in the order of the requests
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.ensureSession(sopas_socket)
+
+        results = [None] * len(requests)
+        pending = {}
+        nextIndex = 0
+        try:
+            while nextIndex < len(requests) or pending:
+                messages = []
+                while nextIndex < len(requests) and len(pending) < window:
+                    cmd, mode, payload = requests[nextIndex]
+                    reqId = self.nextRequestId()
+                    messages.append(self.encodeFraming(self.generatePayload(self.sessionId, reqId, cmd, mode, payload)))
+                    pending[reqId] = nextIndex
+                    nextIndex += 1
+                if messages:
+                    message = b''.join(messages)
+                    logger.debug("Sending %d pipelined requests (%d bytes)", len(messages), len(message))
+                    if WireTrace.enabled:
+                        for m in messages:
+                            WireTrace.telegram('tx', m)
+                    sopas_socket.sendall(message)
+
+                with self.recvResponseView(sopas_socket, 0) as packet:
+                    recvSessionId, recvReqId, cmd, mode, payload = self.parsePacket(packet)
+                # the response has been read even if it turns out to be invalid
+                index = pending.pop(recvReqId, None)
+                self.checkSession(recvSessionId)
+                if index is None:
+                    raise RuntimeError("unexpected response; request id {} is not pending".format(recvReqId))
+                results[index] = (cmd, mode, payload)
+        except Exception:
+            if pending:
+                self.drainPending(sopas_socket, pending, drainTimeout)
+            raise
 
-        return self.extractData(request_data)
+        self.lastSendTime = time.time()
+        return results
+
+    def drainPending(self, sopas_socket, pending, timeout):
+        """ Reads and drops the responses of the pending request ids after a failed batch.
+
+        If not all of them arrive within `timeout` seconds the channel cannot be
+        resynchronized: the socket is closed and the session dropped.
+        """
+        deadline = time.monotonic() + timeout
+        previousTimeout = sopas_socket.gettimeout()
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                sopas_socket.settimeout(remaining)
+                with self.recvResponseView(sopas_socket, 0) as packet:
+                    recvReqId = Cola2.HEADER.unpack_from(packet, 2)[1]
+                pending.pop(recvReqId, None)
+        except Exception as e:
+            logger.debug("draining %d pending responses failed: %s", len(pending), e)
+        finally:
+            if pending:
+                logger.warning("%d pipelined responses still outstanding, closing the control socket", len(pending))
+                self.sessionId = -1
+                self._frameReader = None
+                sopas_socket.close()
+            else:
+                sopas_socket.settimeout(previousTimeout)
@@ -38,19 +38,21 @@ class ColaB(ColaBase):
 
     def extractData(self, packet):
         """Extracts data from a received Cola B packet
+        packet may be a memoryview into the receive buffer, only the payload is copied
         :param packet
         :rtype tuple"""
-        packetChecksum = bytes([packet[-1]])
+        packetChecksum = packet[-1]
         packet = packet[:-1]  # one byte for checksum, see cola spec
-        checksum = ColaBase.generateChecksum(packet)
+        checksum = 0
+        for x in packet:
+            checksum ^= x
         if checksum != packetChecksum:
             raise RuntimeError(
                 "Wrong telegram checksum. Expected: 0x{:02X}, received: 0x{:02X}".format(checksum, packetChecksum))
         startS, cmd, mode = ColaB.HEADER.unpack_from(packet)
-        packet = packet[ColaB.HEADER.size:]
         if startS != b's':
             raise RuntimeError("malformed response packet, preceeding 's' missing, got {!r} instead".format(startS))
-        return cmd, mode, packet
+        return cmd, mode, bytes(packet[ColaB.HEADER.size:])
 
     def generateChecksum(self, bStr):
         super().generateChecksum(bStr)
@@ -60,5 +62,5 @@ class ColaB(ColaBase):
         msg = self.generatePayload(cmd, mode, payload)
         msg = self.encodeFraming(msg)
         # add one byte for checksum, see cola spec
-        payload = self.sendToDevice(sopas_socket, msg, extra_bytes=1)
-        return self.extractData(payload)
\ No newline at end of file
+        with self.sendToDevice(sopas_socket, msg, extra_bytes=1, asView=True) as payload:
+            return self.extractData(payload)
\ No newline at end of file
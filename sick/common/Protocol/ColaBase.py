@@ -20,6 +20,9 @@ import logging
 from abc import abstractmethod, ABC
 
 from common.Protocol.ColaErrors import ColaErrors
+from common.Protocol.FrameReader import FrameReader
+from common import Trace
+from common.Trace import HexDump, WireTrace
 
 logger = logging.getLogger(__name__)
 
@@ -43,40 +46,34 @@ class ColaBase(ABC):
     def extractData(self, *data):
         raise NotImplementedError("Method must be implemented in the subclasses!")
 
-    @staticmethod
-    def recvResponse(sopas_socket, extra_bytes):
-        header = sopas_socket.recv(8)  # minimum header
-
-        if ColaBase.START_STX != header[:4]:
-            raise RuntimeError("Could not find start of framing")
-
-        payloadLength, = struct.unpack_from('>I', header, 4)
-        payloadLength += extra_bytes
+    def frameReader(self, sopas_socket):
+        """ Returns the buffered frame reader of this protocol instance for the given socket.
+        A new reader is created when the socket changes (e.g. after a reconnect). """
+        reader = getattr(self, '_frameReader', None)
+        if reader is None or reader.sock is not sopas_socket:
+            reader = FrameReader(sopas_socket)
+            self._frameReader = reader
+        return reader
+
+    def recvResponseView(self, sopas_socket, extra_bytes):
+        """ Receives the next response and returns its payload as a memoryview into the
+        receive buffer, without copying it. The view is only valid until the next read on
+        this socket; callers copy the part they keep and release it (with view: ...). """
+        header, view = self.frameReader(sopas_socket).readFrameView(extra_bytes)
 
         if logger.isEnabledFor(logging.DEBUG):
-            logger.debug("received header (8 bytes): %s" % ColaBase.to_hex(header))
-            logger.debug("length of %i bytes expected" % payloadLength)
-
-        toread = payloadLength
-        data = bytearray(toread)
-        view = memoryview(data)
-
-        while toread:
-            nBytes = sopas_socket.recv_into(view, toread)
-            if nBytes == 0:
-                # premature end of connection
-                raise RuntimeError(
-                    "received {} but requested {} bytes".format(len(data) - len(view), payloadLength))
-            view = view[nBytes:]
-            toread -= nBytes
+            logger.debug("received header (8 bytes): %s", HexDump(header))
+            logger.debug("received %i bytes payload", len(view))
+            logger.debug("payload is: %s", HexDump(bytes(view)))
+        if WireTrace.enabled:
+            WireTrace.telegram('rx', header + view)
 
-        payload = bytes(data)
+        return view
 
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug("received %i bytes payload" % len(payload))
-            logger.debug("payload is: %s" % ColaBase.to_hex(payload))
-
-        return payload
+    def recvResponse(self, sopas_socket, extra_bytes):
+        """ Receives the next response and returns a copy of its payload. """
+        with self.recvResponseView(sopas_socket, extra_bytes) as view:
+            return bytes(view)
 
     # old name: chksum_cola
     @staticmethod
@@ -96,33 +93,20 @@ class ColaBase(ABC):
     @staticmethod
     def to_hex(bStr):
         """ just to produce a readable output of the device responses """
-        if not isinstance(bStr, bytes):
-            raise RuntimeError("invalid protocol string (not a bytes object)")
-        fStr = '==> hexDump\n'
-        cnt = 0
-        for b in bytearray(bStr):
-            if cnt == 0:
-                fStr += '    '
-            cnt += 1
-            fStr += '{:02X} '.format(b)
-            if cnt % 4 == 0:
-                fStr += ' '
-            if cnt % 16 == 0:
-                fStr += '\n'
-                cnt = 0
-        if cnt != 0:
-            fStr += '\n'
-        fStr += 'hexDump <=='
-        return fStr
+        return Trace.to_hex(bStr)
 
-    @staticmethod
-    def sendToDevice(sopas_socket, message, extra_bytes):
-        """ Sends a given message to the device and return the response """
+    def sendToDevice(self, sopas_socket, message, extra_bytes, asView=False):
+        """ Sends a given message to the device and return the response.
+        With asView the response is returned as a memoryview, see recvResponseView. """
         if not isinstance(message, bytes):
             raise RuntimeError("Invalid protocol string! String was {} and not bytes.".format(type(message)))
-        logger.debug("Sending %d bytes to device: %s" % (len(message), ColaBase.to_hex(message)))
+        logger.debug("Sending %d bytes to device: %s", len(message), HexDump(message))
+        if WireTrace.enabled:
+            WireTrace.telegram('tx', message)
         sopas_socket.send(message)
-        return ColaBase.recvResponse(sopas_socket, extra_bytes)
+        if asView:
+            return self.recvResponseView(sopas_socket, extra_bytes)
+        return self.recvResponse(sopas_socket, extra_bytes)
 
     def check_response_payload(self, name, cmd, recvCmd, recvMode, payload):
         # expected response command code
@@ -161,7 +145,7 @@ class ColaBase(ABC):
             recvName = payload[:nameEndIdx]
             payload = payload[nameEndIdx + 1:]
         else:
-            recvName = payload.tobytes()
+            recvName = bytes(payload)
             payload = bytes()
 
         if recvName != name:
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Device discovery with a cache of known devices.
+
+Discovery runs an AutoIp scan on every IPv4 interface of the host at the same
+time (each scan has to wait for the AutoIp reply window, so scanning the
+interfaces one after the other takes that window once per interface). CoLa 1
+(XML) and CoLa 2 (binary) replies are decoded by AutoIp.
+
+Found devices are kept in a DeviceCache together with the time they were last
+seen. A device counts as known until its entry expires; a successful connect
+refreshes the entry, a failed one removes it. With a cache file the entries
+survive a restart, so a known device can be connected to right away without
+probing or scanning first.
+
+A cache that is saved to a file should use Discovery.RESTART_TTL: with the
+default ttl every entry has expired when the application is restarted a few
+minutes later. A long ttl is safe because a failed connect removes the entry.
+
+Example:
+    discovery = Discovery(ttl=Discovery.RESTART_TTL, cachePath='devices.json')
+    discovery.start(interval=60)          # optional periodic refresh
+    device = discovery.lookup('192.168.10.5')
+    if device is None:
+        discovery.scan()
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common.Protocol.AutoIp import AutoIp
+
+logger = logging.getLogger(__name__)
+
+# CoLa version reported by AutoIp -> protocol name and default control port
+COLA_PROTOCOLS = {
+    '1': ('ColaB', 2112),
+    '2': ('Cola2', 2122),
+}
+
+
+class DiscoveredDevice(object):
+    """ A device found by an AutoIp scan or by a successful connect. """
+
+    def __init__(self, macAddr, ipAddress, protocol, port, deviceType=None, interface=None, lastSeen=None):
+        """
+        macAddr(str): MAC address (aa:bb:cc:dd:ee:ff), None if the device was only connected to
+        ipAddress(str): IPv4 address of the device
+        protocol(str): 'ColaB' or 'Cola2'
+        port(int): control port
+        deviceType(str): device type reported in the scan reply
+        interface(str): host interface the device was found on
+        lastSeen(float): wall clock time (time.time()) of the last scan reply or connect
+        """
+        self.macAddr = macAddr
+        self.ipAddress = ipAddress
+        self.protocol = protocol
+        self.port = port
+        self.deviceType = deviceType
+        self.interface = interface
+        self.lastSeen = time.time() if lastSeen is None else lastSeen
+
+    @classmethod
+    def fromAutoIp(cls, autoIpDevice, interface=None):
+        items = autoIpDevice.items
+        colaVersion = str(items.get('COLA_VER', ('2',))[0])
+        protocol, defaultPort = COLA_PROTOCOLS.get(colaVersion, COLA_PROTOCOLS['2'])
+        port = items.get('HostPortNo', (defaultPort,))[0]
+        return cls(autoIpDevice.macAddr, items['IPAddress'][0], protocol, int(port),
+                   deviceType=items.get('DeviceType', (None,))[0], interface=interface)
+
+    def toDict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def fromDict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        return "DiscoveredDevice({} {} {}:{} {})".format(self.deviceType, self.macAddr, self.ipAddress,
+                                                         self.port, self.protocol)
+
+
+class DeviceCache(object):
+    """ Known devices by IP address, entries expire `ttl` seconds after they were last seen. """
+
+    def __init__(self, ttl=300.0, path=None):
+        """
+        ttl(float): seconds a device stays known without being seen again, None never expires
+        path(str): JSON file the cache is loaded from and saved to, None keeps it in memory only
+        """
+        self.ttl = ttl
+        self.path = path
+        self._devices = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def _expired(self, device, now):
+        return self.ttl is not None and now - device.lastSeen > self.ttl
+
+    def get(self, ipAddress):
+        """ Returns the known device with this IP address, or None if unknown or expired. """
+        with self._lock:
+            device = self._devices.get(ipAddress)
+            if device is not None and self._expired(device, time.time()):
+                del self._devices[ipAddress]
+                device = None
+            return device
+
+    def put(self, device):
+        with self._lock:
+            # a device that changed its IP address must not stay known under the old one
+            if device.macAddr is not None:
+                for ip, other in list(self._devices.items()):
+                    if other.macAddr == device.macAddr and ip != device.ipAddress:
+                        del self._devices[ip]
+            self._devices[device.ipAddress] = device
+        self.save()
+
+    def remove(self, ipAddress):
+        with self._lock:
+            removed = self._devices.pop(ipAddress, None)
+        if removed is not None:
+            self.save()
+
+    def devices(self):
+        """ All devices that did not expire yet. """
+        now = time.time()
+        with self._lock:
+            return [d for d in self._devices.values() if not self._expired(d, now)]
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+            devices = [DiscoveredDevice.fromDict(entry) for entry in entries]
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("could not load device cache %s: %s", self.path, e)
+            return
+        with self._lock:
+            self._devices = {d.ipAddress: d for d in devices}
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            entries = [d.toDict() for d in self._devices.values()]
+        try:
+            tmpPath = self.path + '.tmp'
+            with open(tmpPath, 'w') as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmpPath, self.path)
+        except OSError as e:
+            logger.warning("could not save device cache %s: %s", self.path, e)
+
+
+def listInterfaces():
+    """ IPv4 interfaces of the host except loopback.
+
+    returns: list of (interface name, IP address, netmask)
+    """
+    try:
+        import psutil  # only needed to enumerate the interfaces
+    except ImportError:
+        # without psutil only the address of the default interface is known
+        ipAddress = socket.gethostbyname(socket.gethostname())
+        if ipAddress.startswith('127.'):
+            return []
+        return [(None, ipAddress, '255.255.255.0')]
+    interfaces = []
+    for name, addrs in psutil.net_if_addrs().items():
+        for addr in addrs:
+            if addr.family == socket.AF_INET and not addr.address.startswith('127.'):
+                interfaces.append((name, addr.address, addr.netmask or '255.255.255.0'))
+    return interfaces
+
+
+class Discovery(object):
+    """ Concurrent AutoIp scans on all interfaces feeding a DeviceCache. """
+
+    # ttl for caches persisted across restarts (one week)
+    RESTART_TTL = 7 * 24 * 3600.0
+
+    def __init__(self, interfaces=None, ttl=300.0, cachePath=None):
+        """
+        interfaces(list): (name, IP address, netmask) tuples to scan, default all interfaces
+        ttl(float): seconds a device stays known, see DeviceCache
+        cachePath(str): file to persist the known devices in
+        """
+        self.interfaces = interfaces
+        self.cache = DeviceCache(ttl, cachePath)
+        self.scans = 0
+        self._thread = None
+        self._stopEvent = threading.Event()
+
+    def _scanInterface(self, interface):
+        name, ipAddress, netmask = interface
+        try:
+            found = AutoIp(ipAddress, netmask).scan() or []
+        except Exception as e:
+            logger.debug("AutoIp scan on %s (%s) failed: %s", name, ipAddress, e)
+            return []
+        devices = []
+        for autoIpDevice in found:
+            try:
+                devices.append(DiscoveredDevice.fromAutoIp(autoIpDevice, name))
+            except (KeyError, ValueError) as e:
+                logger.debug("incomplete AutoIp reply from %s: %s", autoIpDevice.macAddr, e)
+        return devices
+
+    def scan(self):
+        """ Scan all interfaces at the same time and update the cache.
+
+        returns: list of the devices found by this scan
+        """
+        interfaces = self.interfaces if self.interfaces is not None else listInterfaces()
+        if not interfaces:
+            return []
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(interfaces), thread_name_prefix='autoip') as pool:
+            results = list(pool.map(self._scanInterface, interfaces))
+        devices = [device for found in results for device in found]
+        for device in devices:
+            self.cache.put(device)
+        self.scans += 1
+        logger.info("AutoIp scan on %d interfaces found %d devices in %.2f s",
+                    len(interfaces), len(devices), time.monotonic() - start)
+        return devices
+
+    def lookup(self, ipAddress):
+        """ Returns the known device with this IP address without any network access, or None. """
+        return self.cache.get(ipAddress)
+
+    def confirm(self, ipAddress, protocol, port):
+        """ Record a successful connect, the device stays known for another ttl. """
+        device = self.cache.get(ipAddress)
+        if device is None:
+            device = DiscoveredDevice(None, ipAddress, protocol, port)
+        else:
+            device.protocol, device.port, device.lastSeen = protocol, port, time.time()
+        self.cache.put(device)
+
+    def forget(self, ipAddress):
+        """ Record a failed connect, the next connect probes the device again. """
+        self.cache.remove(ipAddress)
+
+    def start(self, interval=60.0):
+        """ Scan now and then every `interval` seconds in a background thread. """
+        if self._thread is not None:
+            return
+        self._stopEvent.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name='discovery', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopEvent.set()
+        self._thread.join(5.0)
+        self._thread = None
+
+    def _run(self, interval):
+        while True:
+            try:
+                self.scan()
+            except Exception as e:
+                logger.warning("device discovery failed: %s", e)
+            if self._stopEvent.wait(interval):
+                return
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Buffered reader for CoLa framed telegrams (CoLa B and CoLa 2).
+
+Both protocols frame a telegram as
+
+    STX (02 02 02 02) | length (uint32, big endian) | payload | [checksum]
+
+FrameReader receives into one reusable buffer, so short reads (a header split
+over several TCP segments) are simply completed by the next recv. Bytes before
+an STX marker are skipped, and a length above maxLength is taken as a false
+STX match and also skipped, so the reader resynchronizes on the next marker
+instead of failing the whole connection.
+"""
+
+import logging
+import struct
+
+logger = logging.getLogger(__name__)
+
+STX = b'\x02\x02\x02\x02'
+HEADER_SIZE = 8
+_LENGTH = struct.Struct('>I')
+
+# largest telegram accepted: file transfers use 16 kB chunks, device XML descriptions are bigger
+DEFAULT_MAX_LENGTH = 16 * 1024 * 1024
+
+
+class FrameReader(object):
+    """ Reads CoLa frames from a socket through a reusable receive buffer. """
+
+    def __init__(self, sock, maxLength=DEFAULT_MAX_LENGTH, bufferSize=64 * 1024):
+        """
+        sock: connected socket (anything with recv_into)
+        maxLength(int): largest payload length accepted, larger lengths trigger a resync
+        bufferSize(int): initial buffer size, the buffer grows for larger frames
+        """
+        self.sock = sock
+        self.maxLength = maxLength
+        self._buffer = bytearray(bufferSize)
+        self._start = 0
+        self._end = 0
+        # number of bytes skipped while searching for STX, and of rejected lengths
+        self.skippedBytes = 0
+        self.rejectedLengths = 0
+
+    @property
+    def buffered(self):
+        """ Number of received bytes not consumed yet. """
+        return self._end - self._start
+
+    def reset(self):
+        """ Drop all buffered bytes (e.g. after reconnecting the socket). """
+        self._start = self._end = 0
+
+    def _fill(self, needed):
+        """ Receive until at least `needed` bytes are buffered. """
+        while self._end - self._start < needed:
+            if len(self._buffer) - self._start < needed:
+                # move the pending bytes to the front and grow if the frame does not fit
+                pending = self._end - self._start
+                if len(self._buffer) < needed:
+                    newBuffer = bytearray(max(needed, 2 * len(self._buffer)))
+                    newBuffer[:pending] = self._buffer[self._start:self._end]
+                    self._buffer = newBuffer
+                else:
+                    self._buffer[:pending] = self._buffer[self._start:self._end]
+                self._start, self._end = 0, pending
+            nBytes = self.sock.recv_into(memoryview(self._buffer)[self._end:])
+            if nBytes == 0:
+                raise ConnectionError("connection closed by device, {} of {} bytes received"
+                                   .format(self._end - self._start, needed))
+            self._end += nBytes
+
+    def _skip(self, nBytes):
+        self._start += nBytes
+        self.skippedBytes += nBytes
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def _sync(self):
+        """ Make sure the buffer starts with a plausible frame header. """
+        while True:
+            self._fill(HEADER_SIZE)
+            buf = self._buffer
+            start = self._start
+            if buf[start:start + 4] != STX:
+                pos = buf.find(STX, start, self._end)
+                if pos < 0:
+                    # keep up to 3 trailing bytes, they may be the beginning of a split STX
+                    skip = max(1, self._end - start - (len(STX) - 1))
+                else:
+                    skip = pos - start
+                logger.warning("CoLa framing: skipping %d bytes before start of frame", skip)
+                self._skip(skip)
+                continue
+            length, = _LENGTH.unpack_from(buf, start + 4)
+            if length > self.maxLength:
+                self.rejectedLengths += 1
+                logger.warning("CoLa framing: length %d exceeds %d, resynchronizing", length, self.maxLength)
+                self._skip(1)
+                continue
+            return length
+
+    def readFrameView(self, extra_bytes=0):
+        """ Read the next frame and return its payload (+ extra_bytes) as a memoryview
+        into the receive buffer. The view is only valid until the next read.
+
+        returns: (header, payload view)
+        """
+        length = self._sync() + extra_bytes
+        self._fill(HEADER_SIZE + length)
+        start = self._start
+        header = bytes(self._buffer[start:start + HEADER_SIZE])
+        view = memoryview(self._buffer)[start + HEADER_SIZE:start + HEADER_SIZE + length]
+        self._start += HEADER_SIZE + length
+        if self._start == self._end:
+            self._start = self._end = 0
+        return header, view
+
+    def readFrame(self, extra_bytes=0):
+        """ Read the next frame, returns (header, payload bytes). """
+        header, view = self.readFrameView(extra_bytes)
+        with view:
+            return header, bytes(view)
@@ -19,41 +19,33 @@ import logging
 import select
 import socket
 import struct
-import sys
 import time
 
+from common import Trace
+from common.Trace import HexDump, WireTrace
+from common.Transport import TransportProfile, recv_timestamped
+
 logger = logging.getLogger(__name__)
 
 
 def to_hex(bStr):
     """ just to produce a readable output of the device responses """
-    if not isinstance(bStr, bytes):
-        raise RuntimeError("invalid protocol string (not a bytes object)")
-    fStr = '==> hexDump\n'
-    cnt = 0
-    for b in bytearray(bStr):
-        if cnt == 0:
-            fStr += '    '
-        cnt += 1
-        fStr += '{:02X} '.format(b)
-        if cnt % 4 == 0:
-            fStr += ' '
-        if cnt % 16 == 0:
-            fStr += '\n'
-            cnt = 0
-    if cnt != 0:
-        fStr += '\n'
-    fStr += 'hexDump <=='
-    return fStr
+    return Trace.to_hex(bStr)
 
 
 class Streaming:
 
     """ All methods that use the streaming channel. """
-    def __init__(self, ipAddress='192.168.1.10', tcpPort=2114):
+    def __init__(self, ipAddress='192.168.1.10', tcpPort=2114, profile=None):
+        """ profile(TransportProfile): socket options for the channel,
+            default is a plain socket with a 5 s timeout. """
         self.ipAddress = ipAddress
         self.tcpPort = tcpPort
+        self.profile = profile if profile is not None else TransportProfile()
+        self.kernel_timestamps = False
         self.sock_stream = None
+        self.frame_kernel_time_s = None
+        self.frame_header_time_s = None
 
     def _read(self, nBytes):
         """ Read exactly nBytes from the streaming socket and return the number of bytes read.
@@ -73,20 +65,42 @@ class Streaming:
             lenBuffer += lenReceived
         return buffer
 
+    def _read_timestamped(self, nBytes):
+        """ Like _read(), but uses recvmsg() and also returns the kernel receive
+            time of the first chunk (None if the kernel did not deliver one).
+        """
+        buffer = bytes()
+        recvTime = None
+        while len(buffer) < nBytes:
+            data, stamp = recv_timestamped(self.sock_stream, nBytes - len(buffer))
+            if not data:
+                break
+            if recvTime is None:
+                recvTime = stamp
+            buffer += data
+        return buffer, recvTime
+
     ''' Opens the streaming channel. '''
 
     def openStream(self):
         logger.info("Opening streaming socket..."),
         self.sock_stream = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock_stream.settimeout(5)
+        self.kernel_timestamps = self.profile.apply(self.sock_stream)
         try:
             self.sock_stream.connect((self.ipAddress, self.tcpPort))
         except socket.error as err:
-            print("Error on connecting to %s:%d: %s" % (self.ipAddress, self.tcpPort, err))
             logger.error("Error on connecting to %s:%d: %s" % (self.ipAddress, self.tcpPort, err))
-            sys.exit(2)
+            self.sock_stream.close()
+            self.sock_stream = None
+            raise ConnectionError("Error on connecting to %s:%d: %s" % (self.ipAddress, self.tcpPort, err)) from err
         logger.info("...done.")
 
+    def setTimeout(self, timeout):
+        """ Set the receive timeout (seconds) of the open streaming socket.
+            getFrame() raises socket.timeout if no frame header arrives within this time. """
+        if self.sock_stream is not None:
+            self.sock_stream.settimeout(timeout)
+
     def closeStream(self):
         """ Closes the streaming channel. """
         if self.sock_stream is not None:
@@ -98,7 +112,7 @@ class Streaming:
         """ Sending a blob request. """
         MSG_BLREQ_TX = b'BlbReq'
 
-        logger.debug("Sending BlbReq: %s" % (to_hex(MSG_BLREQ_TX)))
+        logger.debug("Sending BlbReq: %s", HexDump(MSG_BLREQ_TX))
         self.sock_stream.send(MSG_BLREQ_TX)
 
     def fileno(self):
@@ -133,12 +147,16 @@ class Streaming:
         logger.debug('Reading image from stream...')
         self.frame = None  # reset old frame
         self.frame_acq_time_s = None
+        self.frame_kernel_time_s = None
 
         keepRunning = True
 
         BLOB_HEAD_LEN = 11
         try:
-            header = self._read(BLOB_HEAD_LEN)  # read exactly the header length!
+            if self.kernel_timestamps:
+                header, self.frame_kernel_time_s = self._read_timestamped(BLOB_HEAD_LEN)
+            else:
+                header = self._read(BLOB_HEAD_LEN)  # read exactly the header length!
             receiveLenth = len(header)
             if receiveLenth < BLOB_HEAD_LEN:
                 raise socket.error(
@@ -152,9 +170,11 @@ class Streaming:
                 return
             raise socket.timeout("BLOB header received a timeout")
 
-        self.frame_acq_time_s = time.time()
+        self.frame_header_time_s = time.time()
+        # the kernel receive time does not include the wake-up / scheduling delay of this thread
+        self.frame_acq_time_s = self.frame_kernel_time_s or self.frame_header_time_s
 
-        logger.debug("len(header) = %d dump: %s" % (len(header), to_hex(header)))
+        logger.debug("len(header) = %d dump: %s", len(header), HexDump(header))
         assert len(header) == BLOB_HEAD_LEN, "Uh, not enough bytes for BLOB_HEAD_LEN, only %s" % (len(header))
 
         # check if the header content is as expected
@@ -176,8 +196,8 @@ class Streaming:
         # -3 for protocolVersion and packetType already received
         # +1 for checksum
         toread = pkgLength - 3 + 1
-        logger.debug("pkgLength: %d" % (pkgLength))
-        logger.debug("toread: %d" % (toread))
+        logger.debug("pkgLength: %d", pkgLength)
+        logger.debug("toread: %d", toread)
 
         data = bytearray(len(header) + toread)
         view = memoryview(data)
@@ -194,7 +214,9 @@ class Streaming:
         self.frame = data
 
         frame_acq_stop = time.time()
-        self.frame_revc_time_s = (frame_acq_stop - self.frame_acq_time_s)
-        logger.debug("Receiving took %0.1f ms" % ((self.frame_revc_time_s) * 1000))
+        self.frame_revc_time_s = (frame_acq_stop - self.frame_header_time_s)
+        logger.debug("Receiving took %0.1f ms", self.frame_revc_time_s * 1000)
+        if WireTrace.enabled:
+            WireTrace.frame(header, pkgLength, self.frame_revc_time_s)
         # full frame should be received now
         logger.debug("...done.")
\ No newline at end of file
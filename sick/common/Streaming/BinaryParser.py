@@ -34,7 +34,10 @@ class BinaryParser:
                     numBytesDistance,
                     numBytesIntensity,
                     numBytesPerIntensityValue,
-                    numBytesConfidence):
+                    numBytesConfidence,
+                    channels=None):
+        """ channels: optional collection of the maps to unpack ('distance', 'intensity',
+        'confidence'); maps not listed are skipped and returned as empty tuples. """
         position = 0
         # the binary part starts with entries for length, a timestamp
         # and a version identifier
@@ -69,29 +72,35 @@ class BinaryParser:
         position += dataBlockSize
         distance = dataBinary[0:numBytesDistance]  # only the distance data (as string)
 
-        logging.debug("Reading distance...")
-        distanceData = struct.unpack('<%uH' % (len(distance) / 2), distance)
-        logging.debug("...done.")
+        distanceData = ()
+        if channels is None or 'distance' in channels:
+            logging.debug("Reading distance...")
+            distanceData = struct.unpack('<%uH' % (len(distance) / 2), distance)
+            logging.debug("...done.")
 
         # extract the intensity data (same procedure as distance)
-        logging.debug("Reading intensity...")
         off = numBytesDistance
-        intensity = dataBinary[off:numBytesIntensity + off]
-        if numBytesPerIntensityValue == 2:
-            intensityData = struct.unpack('<%uH' % (len(intensity) / 2), intensity)
-        elif numBytesPerIntensityValue == 4:
-            intensityData = struct.unpack('<%uL' % (len(intensity) / 4), intensity)
-        else:
-            # legacy mode, also used for RGBA -> byte-wise
-            intensityData = struct.unpack('<%uB' % len(intensity), intensity)
-        logging.debug("...done.")
+        intensityData = ()
+        if channels is None or 'intensity' in channels:
+            logging.debug("Reading intensity...")
+            intensity = dataBinary[off:numBytesIntensity + off]
+            if numBytesPerIntensityValue == 2:
+                intensityData = struct.unpack('<%uH' % (len(intensity) / 2), intensity)
+            elif numBytesPerIntensityValue == 4:
+                intensityData = struct.unpack('<%uL' % (len(intensity) / 4), intensity)
+            else:
+                # legacy mode, also used for RGBA -> byte-wise
+                intensityData = struct.unpack('<%uB' % len(intensity), intensity)
+            logging.debug("...done.")
 
         # extract the confidence data (same procedure as distance)
-        logging.debug("Reading confidence...")
         off += numBytesIntensity
-        confidence = dataBinary[off:numBytesConfidence + off]
-        confidenceData = struct.unpack('<%uH' % (len(confidence) / 2), confidence)
-        logging.debug("...done.")
+        confidenceData = ()
+        if channels is None or 'confidence' in channels:
+            logging.debug("Reading confidence...")
+            confidence = dataBinary[off:numBytesConfidence + off]
+            confidenceData = struct.unpack('<%uH' % (len(confidence) / 2), confidence)
+            logging.debug("...done.")
 
         # checking if all data is read
         if (position + 4 == lengthAtStart):
@@ -117,30 +126,30 @@ class BinaryParser:
             return
         (lengthAtStart, timeStamp, deviceID, scanCounter, syscountScan, scanFrequency, measFrequency, angleFirstScanPoint, angularResolution, scale,
          offset) = struct.unpack('<IQHIIffffff', binarySegment[position:position + infoBlockSize])
-        logging.debug("Length = %i" % lengthAtStart)
+        logging.debug("Length = %i", lengthAtStart)
         position += infoBlockSize
 
         self.logTimeStamp(timeStamp)
-        logging.debug("DeviceID = %i" % deviceID)
-        logging.debug("ScanCounter = %i" % scanCounter)
-        logging.debug("SyscountScan = %i" % syscountScan)
-        logging.debug("ScanFrequency = %i" % scanFrequency)
-        logging.debug("MeasFrequency = %i" % measFrequency)
-        logging.debug("AngleFirstScanPoint = %i" % angleFirstScanPoint)
-        logging.debug("AngularResolution = %i" % angularResolution)
-        logging.debug("Scale = %i" % scale)
-        logging.debug("Offset = %i" % offset)
-
-        logging.debug("Reading position is now: %i" % position)
+        logging.debug("DeviceID = %i", deviceID)
+        logging.debug("ScanCounter = %i", scanCounter)
+        logging.debug("SyscountScan = %i", syscountScan)
+        logging.debug("ScanFrequency = %i", scanFrequency)
+        logging.debug("MeasFrequency = %i", measFrequency)
+        logging.debug("AngleFirstScanPoint = %i", angleFirstScanPoint)
+        logging.debug("AngularResolution = %i", angularResolution)
+        logging.debug("Scale = %i", scale)
+        logging.debug("Offset = %i", offset)
+
+        logging.debug("Reading position is now: %i", position)
         # distanceDataSize = int(singleValueSize * numPolarValues)
         endPosition = position + numPolarValues * struct.calcsize('<f')
         if len(binarySegment) < endPosition:
             logging.warning("Found inconsistency in binary polar data.")
             return
         distanceData = struct.unpack('<%uf' % numPolarValues, binarySegment[position:endPosition])
-        logging.debug("Distance data = %s" % str(distanceData))
+        logging.debug("Distance data = %s", distanceData)
         position = endPosition
-        logging.debug("Reading position is now: %i" % position)
+        logging.debug("Reading position is now: %i", position)
 
         confidenceBlockSize = struct.calcsize('<ffff')
         endPosition = position + confidenceBlockSize
@@ -148,24 +157,24 @@ class BinaryParser:
             logging.warning("Found inconsistency in binary polar data.")
             return
         (rssi_startAngle, rssi_angularResolution, rssi_scale, rssi_offset) = struct.unpack('<ffff', binarySegment[position:endPosition])
-        logging.debug("RSSI AngleFirstScanPoint = %i" % rssi_startAngle)
-        logging.debug("RSSI AngularResolution = %i" % rssi_angularResolution)
-        logging.debug("RSSI Scale = %i" % rssi_scale)
-        logging.debug("RSSI Offset = %i" % rssi_offset)
+        logging.debug("RSSI AngleFirstScanPoint = %i", rssi_startAngle)
+        logging.debug("RSSI AngularResolution = %i", rssi_angularResolution)
+        logging.debug("RSSI Scale = %i", rssi_scale)
+        logging.debug("RSSI Offset = %i", rssi_offset)
 
         position = endPosition
-        logging.debug("Reading position is now: %i" % position)
+        logging.debug("Reading position is now: %i", position)
 
         endPosition = position + numPolarValues * struct.calcsize('<f')
         if len(binarySegment) < endPosition:
             logging.warning("Found inconsistency in binary polar data.")
             return
         confidenceData = struct.unpack('<%uf' % numPolarValues, binarySegment[position:endPosition])
-        logging.debug("Confidence data = %s" % str(confidenceData))
+        logging.debug("Confidence data = %s", confidenceData)
         # convert into percent if needed
         # confidence = tuple((val / MAX_CONFIDENCE) * 100.0 for val in confidenceData)
         position = endPosition
-        logging.debug("Reading position is now: %i" % position)
+        logging.debug("Reading position is now: %i", position)
 
         # checking if all data is read
         if (position + 8 == lengthAtStart):
@@ -195,13 +204,13 @@ class BinaryParser:
             logging.warning("Found inconsistency in binary polar data.")
             return
         (lengthAtStart, timeStamp, version, numPoints) = struct.unpack('<IQHI', binarySegment[position:position + infoBlockSize])
-        logging.debug("Length = %i" % lengthAtStart)
+        logging.debug("Length = %i", lengthAtStart)
         position += infoBlockSize
 
         self.logTimeStamp(timeStamp)
-        logging.debug("Version = %i" % version)
+        logging.debug("Version = %i", version)
 
-        logging.debug("Reading position is now: %i" % position)
+        logging.debug("Reading position is now: %i", position)
 
         endPosition = position + numPoints * struct.calcsize('<ffff') # 4 float32 values per point
         if len(binarySegment) < endPosition:
@@ -215,8 +224,8 @@ class BinaryParser:
         confidence = tuple((val / MAX_CONFIDENCE) * 100.0 for val in rssi)
 
         position = endPosition
-        logging.debug("Reading position is now: %i" % position)
-        logging.debug("Point cloud data = %s" % str(pointCloudData))
+        logging.debug("Reading position is now: %i", position)
+        logging.debug("Point cloud data = %s", pointCloudData)
 
         # checking if all data is read
         check = struct.calcsize('<II')
@@ -235,6 +244,9 @@ class BinaryParser:
     # ===============================================================================
 
     def logTimeStamp(self, timeStamp):
+        # decoding the bitfield is only needed for the debug output
+        if not logging.root.isEnabledFor(logging.DEBUG):
+            return
         # 0x03 D9 08 40 02 C7 B0 00
         # 0000 0011 1101 1001 0000 1000 0100 0000 0000 0010 1100 0111 1011 0000 0000 0000
         # .... .YYY YYYY YYYY YMMM MDDD DDTT TTTT TTTT THHH HHMM MMMM SSSS SSmm mmmm mmmm
@@ -256,4 +268,5 @@ class BinaryParser:
         Minute = (timeStamp & MinuteMask) >> 16
         Seconds = (timeStamp & SecondsMask) >> 10
         Milliseconds = timeStamp & MillisecondsMask
-        logging.debug("Data Timestamp [YYYY-MM-DD HH:MM:SS.mm] = %04u-%02u-%02u %02u:%02u:%02u.%03u" % (Year, Month, Day, Hour, Minute, Seconds, Milliseconds))
+        logging.debug("Data Timestamp [YYYY-MM-DD HH:MM:SS.mm] = %04u-%02u-%02u %02u:%02u:%02u.%03u",
+                      Year, Month, Day, Hour, Minute, Seconds, Milliseconds)
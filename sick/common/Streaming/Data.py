@@ -38,7 +38,7 @@ class Data:
 
         self.parsing_time_s = 0
 
-    def read(self, dataBuffer, convertToMM = True):
+    def read(self, dataBuffer, convertToMM = True, channels = None):
         """
         Extracts necessary data segments and triggers parsing of segments. 
         
@@ -48,6 +48,8 @@ class Data:
                        - Tenth millimeters for Visionary S
                        - Quarter millimeters for Visionary T Mini
                        - Millimeters for Visionary T
+        channels:    Optional collection of the depth map channels to decode ('distance', 'intensity', 'confidence').
+                     Channels not listed are skipped and left empty. None decodes all channels.
         """
 
         parsing_start_time_s = time.time()
@@ -170,10 +172,11 @@ class Data:
                                        numBytesDistance,
                                        numBytesIntensity,
                                        myXMLParser.numBytesPerIntensityValue,
-                                       numBytesConfidence)
+                                       numBytesConfidence,
+                                       channels)
             logging.debug("...done.")
 
-            if convertToMM:
+            if convertToMM and myBinaryParser.depthmap.distance:
                 myBinaryParser.depthmap.distance = convertDistanceToMM(myBinaryParser.depthmap.distance, myXMLParser)
             self.depthmap = myBinaryParser.depthmap
 
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Device timestamp decoding and device-to-host clock synchronization.
+
+The BLOB binary segment carries a packed 64 bit device timestamp:
+
+    .....YYYYYYYYYYYYMMMMDDDDDTTTTTTTTTTTHHHHHMMMMMMSSSSSSmmmmmmmmmm
+    5 unused - 12 Year - 4 Month - 5 Day - 11 Timezone - 5 Hour - 6 Minute - 6 Seconds - 10 Milliseconds
+
+decode_timestamp_us() turns one such value into epoch microseconds,
+decode_timestamps_us() does the same for a whole array at once (e.g. all
+frames of a recording). The timezone field is ignored, the device clock is
+taken as UTC.
+
+ClockSync pairs device timestamps with host receive times and estimates the
+offset and drift between both clocks, so every frame can be given a capture
+time on the host clock.
+"""
+
+from collections import deque
+
+_MS_PER_DAY = 86400000
+
+
+def _days_from_civil(year, month, day):
+    """ Days since 1970-01-01 for a proleptic Gregorian date.
+    Only uses integer arithmetic, so it works for Python ints and numpy arrays alike. """
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    mp = (month + 9) % 12
+    doy = (153 * mp + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _decode(timeStamp):
+    """ bitfield -> epoch milliseconds, for ints or int64 numpy arrays """
+    year = (timeStamp >> 47) & 0xFFF
+    month = (timeStamp >> 43) & 0xF
+    day = (timeStamp >> 38) & 0x1F
+    hour = (timeStamp >> 22) & 0x1F
+    minute = (timeStamp >> 16) & 0x3F
+    seconds = (timeStamp >> 10) & 0x3F
+    milliseconds = timeStamp & 0x3FF
+    days = _days_from_civil(year, month, day)
+    ms = days * _MS_PER_DAY + ((hour * 60 + minute) * 60 + seconds) * 1000 + milliseconds
+    return month, ms
+
+
+def decode_timestamp_us(timeStamp):
+    """ Decode one packed device timestamp into epoch microseconds.
+    Returns 0 for an empty/invalid timestamp (month field is 0). """
+    month, ms = _decode(int(timeStamp))
+    if month == 0:
+        return 0
+    return ms * 1000
+
+
+def decode_timestamps_us(timeStamps):
+    """ Vectorized decode of many packed device timestamps into epoch microseconds.
+    Returns an int64 numpy array, invalid entries are 0. """
+    import numpy as np
+    values = np.asarray(timeStamps, dtype=np.uint64).astype(np.int64)
+    month, ms = _decode(values)
+    return np.where(month == 0, 0, ms * 1000)
+
+
+class ClockSync:
+    """ Online estimator for the offset and drift between the device clock and the host clock.
+
+    Every sample pairs a device timestamp (capture time on the device clock) with the
+    host time the frame arrived at. host - device = offset + transport delay, and the
+    transport delay is always positive, so the estimator fits a line through the lower
+    envelope of (device time, host - device): the window is split into segments, the
+    minimum of each segment is taken and a least squares line is fitted through these
+    minima. Its slope is the drift, its value the offset.
+
+    The estimated capture time therefore contains the smallest transport delay seen in
+    the window; pass min_delay_s if that delay is known (e.g. from a PTP measurement).
+    """
+
+    def __init__(self, window=512, segments=8, reset_threshold_s=1.0, min_delay_s=0.0):
+        """
+        window(int): number of samples kept for the estimate
+        segments(int): number of segments for the lower envelope
+        reset_threshold_s(float): a sample further than this from the estimate
+                                  (device clock set, reboot) restarts the estimator
+        min_delay_s(float): known minimum transport delay, subtracted from capture times
+        """
+        self.window = window
+        self.segments = segments
+        self.reset_threshold_s = reset_threshold_s
+        self.min_delay_s = min_delay_s
+        self._samples = deque(maxlen=window)
+        self._ref_device_s = None
+        self.offset_s = None
+        self.drift = 0.0
+        self.resets = 0
+        self._since_fit = 0
+
+    @property
+    def synchronized(self):
+        return self.offset_s is not None
+
+    def reset(self):
+        self._samples.clear()
+        self._ref_device_s = None
+        self.offset_s = None
+        self.drift = 0.0
+        self._since_fit = 0
+
+    def update(self, device_us, host_time_s):
+        """ Add one (device timestamp, host receive time) pair.
+
+        device_us(int): device timestamp in epoch microseconds (DepthMap.timestamp_us)
+        host_time_s(float): host receive time in seconds (e.g. Streaming.frame_acq_time_s)
+        returns: the transport delay of this frame in seconds, or None before the first fit
+        """
+        if not device_us or host_time_s is None:
+            return None
+        device_s = device_us / 1e6
+        diff = host_time_s - device_s
+
+        if self.offset_s is not None:
+            delay = diff - self._offset_at(device_s)
+            if abs(delay) > self.reset_threshold_s:
+                self.resets += 1
+                self.reset()
+
+        if self._ref_device_s is None:
+            self._ref_device_s = device_s
+        self._samples.append((device_s - self._ref_device_s, diff))
+        self._since_fit += 1
+        # refit often while warming up, then every few frames
+        if self.offset_s is None or self._since_fit >= max(1, len(self._samples) // 16):
+            self._fit()
+        return diff - self._offset_at(device_s)
+
+    def _fit(self):
+        self._since_fit = 0
+        samples = list(self._samples)
+        n = len(samples)
+        segments = min(self.segments, n)
+        size = n // segments
+        points = []
+        for i in range(segments):
+            chunk = samples[i * size:(i + 1) * size] if i < segments - 1 else samples[i * size:]
+            points.append(min(chunk, key=lambda s: s[1]))
+        if len(points) < 2:
+            self.offset_s = points[0][1]
+            self.drift = 0.0
+            return
+        mean_x = sum(p[0] for p in points) / len(points)
+        mean_y = sum(p[1] for p in points) / len(points)
+        sxx = sum((p[0] - mean_x) ** 2 for p in points)
+        if sxx <= 0:
+            self.offset_s = min(p[1] for p in points)
+            self.drift = 0.0
+            return
+        self.drift = sum((p[0] - mean_x) * (p[1] - mean_y) for p in points) / sxx
+        # shift the line down so that it stays below every envelope point
+        intercept = mean_y - self.drift * mean_x
+        intercept += min(p[1] - (intercept + self.drift * p[0]) for p in points)
+        self.offset_s = intercept
+
+    def _offset_at(self, device_s):
+        return self.offset_s + self.drift * (device_s - self._ref_device_s)
+
+    def device_to_host(self, device_us):
+        """ Map a device timestamp (epoch us) to the host clock (seconds).
+        Returns None while not synchronized. """
+        if self.offset_s is None or not device_us:
+            return None
+        device_s = device_us / 1e6
+        return device_s + self._offset_at(device_s) - self.min_delay_s
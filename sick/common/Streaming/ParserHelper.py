@@ -15,6 +15,9 @@ CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTH
 FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+from common.Streaming.DeviceTime import decode_timestamp_us
+
+
 class DepthMap:
     """ This class contains the depth map data """
 
@@ -26,6 +29,8 @@ class DepthMap:
         self.dataQuality = dataQuality
         self.deviceStatus = deviceStatus
         self.timestamp = timestamp
+        # device capture time in epoch microseconds (0 if the device sent no valid timestamp)
+        self.timestamp_us = decode_timestamp_us(timestamp)
 
 
 class Polar2DData:
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Stream health monitoring for BLOB frames.
+
+StreamHealth follows the frame number, checksum result and the data quality /
+device status bytes of the format v2 header of every decoded frame. It counts
+lost frames (gaps in the frame number), duplicates, restarts of the frame
+counter and corrupted frames, both in total and over a rolling window of the
+last frames.
+
+An optional QualityGate decides per frame whether it may be used; rejected
+frames are counted and should be dropped by the caller before they reach any
+further processing.
+"""
+
+import threading
+from collections import deque
+
+# frame numbers are 32 bit unsigned and wrap around
+_FRAME_NUMBER_MASK = 0xFFFFFFFF
+
+REASON_CORRUPTED = 'corrupted'
+REASON_DUPLICATE = 'duplicate'
+REASON_QUALITY = 'quality'
+REASON_STATUS = 'status'
+
+
+class QualityGate:
+    """ Per frame acceptance rules. A frame is rejected if any enabled rule fails. """
+
+    def __init__(self, reject_corrupted=True, reject_duplicates=True, min_quality=None, allowed_status=None):
+        """
+        reject_corrupted(bool): drop frames with a wrong checksum
+        reject_duplicates(bool): drop frames whose frame number was already seen
+        min_quality(int): drop frames with a data quality byte below this value
+        allowed_status(iterable): device status values that are accepted, None accepts all
+        """
+        self.reject_corrupted = reject_corrupted
+        self.reject_duplicates = reject_duplicates
+        self.min_quality = min_quality
+        self.allowed_status = frozenset(allowed_status) if allowed_status is not None else None
+
+    def check(self, corrupted, duplicate, quality, status):
+        """ Returns the reject reason or None if the frame is accepted. """
+        if self.reject_corrupted and corrupted:
+            return REASON_CORRUPTED
+        if self.reject_duplicates and duplicate:
+            return REASON_DUPLICATE
+        if self.min_quality is not None and quality < self.min_quality:
+            return REASON_QUALITY
+        if self.allowed_status is not None and status not in self.allowed_status:
+            return REASON_STATUS
+        return None
+
+
+class StreamHealth:
+    """ Tracks frame number gaps, duplicates, checksum failures and device flags. """
+
+    def __init__(self, window=300, max_gap=1000, gate=None):
+        """
+        window(int): number of received frames the rolling counters cover
+        max_gap(int): a forward jump larger than this (or any backward jump) is taken
+                      as a restart of the device frame counter, not as lost frames
+        gate(QualityGate): optional quality gate, None accepts every frame
+        """
+        self.max_gap = max_gap
+        self.gate = gate
+        self._lock = threading.Lock()
+        # per received frame: (lost before it, duplicate, corrupted, rejected)
+        self._window = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._window.clear()
+            self.last_frame_number = None
+            self.received = 0
+            self.lost = 0
+            self.gaps = 0
+            self.duplicates = 0
+            self.restarts = 0
+            self.corrupted = 0
+            self.rejected = 0
+            self.rejected_by_reason = {}
+            self.last_quality = None
+            self.last_status = None
+
+    def update(self, frameNumber, corrupted=False, quality=0, status=0):
+        """ Account one decoded frame.
+
+        frameNumber(int): DepthMap.frameNumber, -1 for old formats without frame numbers
+        corrupted(bool): Data.corrupted
+        quality(int): DepthMap.dataQuality
+        status(int): DepthMap.deviceStatus
+        returns: the reject reason of the quality gate, or None if the frame is accepted
+        """
+        with self._lock:
+            self.received += 1
+            self.last_quality = quality
+            self.last_status = status
+            lost = 0
+            duplicate = False
+            if frameNumber is not None and frameNumber >= 0:
+                if self.last_frame_number is not None:
+                    step = (frameNumber - self.last_frame_number) & _FRAME_NUMBER_MASK
+                    if step == 0:
+                        duplicate = True
+                        self.duplicates += 1
+                    elif step <= self.max_gap:
+                        lost = step - 1
+                        if lost:
+                            self.gaps += 1
+                            self.lost += lost
+                    else:
+                        self.restarts += 1
+                if not duplicate:
+                    self.last_frame_number = frameNumber
+            if corrupted:
+                self.corrupted += 1
+
+            reason = self.gate.check(corrupted, duplicate, quality, status) if self.gate is not None else None
+            if reason is not None:
+                self.rejected += 1
+                self.rejected_by_reason[reason] = self.rejected_by_reason.get(reason, 0) + 1
+            self._window.append((lost, duplicate, bool(corrupted), reason is not None))
+            return reason
+
+    def rolling(self):
+        """ Counters over the last `window` received frames.
+
+        returns: dict with received, lost, duplicates, corrupted, rejected and
+                 loss_rate (lost / (received + lost))
+        """
+        with self._lock:
+            window = list(self._window)
+        received = len(window)
+        lost = sum(w[0] for w in window)
+        expected = received + lost
+        return {
+            'received': received,
+            'lost': lost,
+            'duplicates': sum(1 for w in window if w[1]),
+            'corrupted': sum(1 for w in window if w[2]),
+            'rejected': sum(1 for w in window if w[3]),
+            'loss_rate': lost / expected if expected else 0.0,
+        }
+
+    def snapshot(self):
+        """ Total counters since the last reset(). """
+        with self._lock:
+            return {
+                'received': self.received,
+                'lost': self.lost,
+                'gaps': self.gaps,
+                'duplicates': self.duplicates,
+                'restarts': self.restarts,
+                'corrupted': self.corrupted,
+                'rejected': self.rejected,
+                'rejected_by_reason': dict(self.rejected_by_reason),
+                'last_frame_number': self.last_frame_number,
+                'last_quality': self.last_quality,
+                'last_status': self.last_status,
+            }
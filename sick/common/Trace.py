@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Deferred debug formatting and the runtime-switchable wire trace.
+
+Everything in here is built so that the disabled path costs one attribute
+lookup or one isEnabledFor() call: hex dumps and other expensive strings
+are wrapped in objects that only format themselves when a log record is
+actually emitted.
+"""
+
+import logging
+import sys
+
+# logger for the per-frame / per-telegram wire trace
+wire_logger = logging.getLogger('common.wire')
+
+
+def to_hex(bStr):
+    """ just to produce a readable output of the device responses """
+    if not isinstance(bStr, (bytes, bytearray, memoryview)):
+        raise RuntimeError("invalid protocol string (not a bytes object)")
+    data = bytes(bStr)
+    parts = ['==> hexDump\n']
+    for start in range(0, len(data), 16):
+        parts.append('    ')
+        for i in range(start, min(start + 16, len(data)), 4):
+            group = data[i:i + 4]
+            # full groups of 4 bytes are followed by an extra blank
+            parts.append(group.hex(' ').upper() + ('  ' if len(group) == 4 else ' '))
+        parts.append('\n')
+    parts.append('hexDump <==')
+    return ''.join(parts)
+
+
+class HexDump(object):
+    """ Lazy hex dump: the bytes are only formatted when str() is called,
+    i.e. when a logging record that references it is emitted. """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return to_hex(self.data)
+
+
+class Lazy(object):
+    """ Defer an arbitrary formatting call: Lazy(func, *args) calls func(*args) on str(). """
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self):
+        return str(self.func(*self.args))
+
+
+class WireTrace(object):
+    """ Runtime switch for the wire trace.
+
+    Hot paths check the class attribute `enabled` before building any trace
+    record, so a disabled trace costs a single attribute lookup per frame.
+    """
+    enabled = False
+    _handler = None
+
+    @classmethod
+    def enable(cls, handler=None, level=logging.DEBUG):
+        """ Turn on the wire trace. Without a handler the trace goes to stderr
+        unless the 'common.wire' logger already has handlers attached. """
+        if handler is None and not wire_logger.handlers:
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(message)s'))
+        if handler is not None:
+            wire_logger.addHandler(handler)
+            cls._handler = handler
+        wire_logger.setLevel(level)
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls):
+        """ Turn off the wire trace and remove the handler added by enable(). """
+        cls.enabled = False
+        wire_logger.setLevel(logging.WARNING)
+        if cls._handler is not None:
+            wire_logger.removeHandler(cls._handler)
+            cls._handler = None
+
+    @staticmethod
+    def frame(header, pkgLength, recvTime_s):
+        """ Trace one received BLOB frame. """
+        wire_logger.debug("frame pkgLength=%d recv=%.2f ms header: %s",
+                          pkgLength, recvTime_s * 1000, HexDump(header))
+
+    @staticmethod
+    def telegram(direction, message):
+        """ Trace one CoLa telegram, direction is 'tx' or 'rx'. """
+        wire_logger.debug("%s %d bytes: %s", direction, len(message), HexDump(message))
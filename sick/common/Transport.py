@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Socket transport profiles for the control and streaming channels.
+
+A TransportProfile bundles the socket options applied to a channel before it
+connects: receive buffer size, Nagle / delayed ACK handling, TCP keepalive
+and kernel receive timestamps (SO_TIMESTAMPNS). Options the platform does not
+know are skipped, so the same profile can be used on Linux and Windows.
+
+recv_timestamped() reads from a socket with recvmsg() and returns the kernel
+receive timestamp of the data, which is free of the scheduling jitter a
+time.time() call after the read would include.
+"""
+
+import logging
+import socket
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Python does not export SO_TIMESTAMPNS, the value is fixed in the Linux ABI
+# (SCM_TIMESTAMPNS == SO_TIMESTAMPNS).
+if hasattr(socket, 'SO_TIMESTAMPNS'):
+    SO_TIMESTAMPNS = socket.SO_TIMESTAMPNS
+elif sys.platform.startswith('linux'):
+    SO_TIMESTAMPNS = 35
+else:
+    SO_TIMESTAMPNS = None
+
+_TIMESPEC = struct.Struct('@qq')
+_CMSG_SPACE = socket.CMSG_SPACE(_TIMESPEC.size) if hasattr(socket, 'CMSG_SPACE') else 0
+
+
+class TransportProfile:
+    """ Socket options for one channel.
+
+    Use TransportProfile.stream() / TransportProfile.control() for the tuned
+    defaults, or construct one directly. TransportProfile() without arguments
+    only sets the timeout, i.e. behaves like the plain sockets used before.
+    """
+
+    def __init__(self, timeout=5.0, rcvbuf=None, nodelay=False, quickack=False,
+                 keepalive=False, keepidle=10, keepintvl=2, keepcnt=3, kernel_timestamps=False):
+        """
+        timeout(float): socket timeout in seconds (None blocks forever)
+        rcvbuf(int): SO_RCVBUF in bytes, None keeps the system default
+        nodelay(bool): disable Nagle (TCP_NODELAY), requests leave immediately
+        quickack(bool): TCP_QUICKACK, acknowledge responses without delay;
+                        Linux clears it again after receiving, see rearm()
+        keepalive(bool): enable TCP keepalive so a dead peer is detected
+                         after keepidle + keepintvl * keepcnt seconds
+        keepidle/keepintvl/keepcnt(int): keepalive timing
+        kernel_timestamps(bool): request SO_TIMESTAMPNS receive timestamps
+        """
+        self.timeout = timeout
+        self.rcvbuf = rcvbuf
+        self.nodelay = nodelay
+        self.quickack = quickack
+        self.keepalive = keepalive
+        self.keepidle = keepidle
+        self.keepintvl = keepintvl
+        self.keepcnt = keepcnt
+        self.kernel_timestamps = kernel_timestamps
+
+    @classmethod
+    def stream(cls, rcvbuf=4 * 1024 * 1024, timeout=5.0):
+        """ Profile for the BLOB streaming channel: large receive buffer so a
+        burst of frames never stalls the device, keepalive and kernel timestamps. """
+        return cls(timeout=timeout, rcvbuf=rcvbuf, keepalive=True, kernel_timestamps=True)
+
+    @classmethod
+    def control(cls, timeout=5.0):
+        """ Profile for the CoLa control channel: small request/response
+        telegrams, so Nagle and delayed ACKs only add latency. """
+        return cls(timeout=timeout, nodelay=True, quickack=True, keepalive=True)
+
+    def __repr__(self):
+        return ("TransportProfile(timeout={}, rcvbuf={}, nodelay={}, quickack={}, keepalive={}, "
+                "kernel_timestamps={})".format(self.timeout, self.rcvbuf, self.nodelay, self.quickack,
+                                               self.keepalive, self.kernel_timestamps))
+
+    @staticmethod
+    def _setopt(sock, level, name, value):
+        """ setsockopt that skips options unknown on this platform.
+        Returns True if the option was set. """
+        if name is None:
+            return False
+        try:
+            sock.setsockopt(level, name, value)
+            return True
+        except OSError as err:
+            logger.warning("setsockopt(%s, %s, %s) failed: %s", level, name, value, err)
+            return False
+
+    def apply(self, sock):
+        """ Apply the profile to a socket. Call before connect(), the receive
+        buffer size determines the TCP window scale negotiated in the handshake.
+
+        Returns True if kernel receive timestamps are active on the socket.
+        """
+        sock.settimeout(self.timeout)
+        if self.rcvbuf:
+            self._setopt(sock, socket.SOL_SOCKET, socket.SO_RCVBUF, int(self.rcvbuf))
+            logger.debug("SO_RCVBUF requested %d, got %d", self.rcvbuf,
+                         sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF))
+        if self.nodelay:
+            self._setopt(sock, socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.quickack:
+            self._setopt(sock, socket.IPPROTO_TCP, getattr(socket, 'TCP_QUICKACK', None), 1)
+        if self.keepalive:
+            self._setopt(sock, socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            self._setopt(sock, socket.IPPROTO_TCP, getattr(socket, 'TCP_KEEPIDLE', None), int(self.keepidle))
+            self._setopt(sock, socket.IPPROTO_TCP, getattr(socket, 'TCP_KEEPINTVL', None), int(self.keepintvl))
+            self._setopt(sock, socket.IPPROTO_TCP, getattr(socket, 'TCP_KEEPCNT', None), int(self.keepcnt))
+        timestamps = False
+        if self.kernel_timestamps and hasattr(sock, 'recvmsg'):
+            timestamps = self._setopt(sock, socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+        return timestamps
+
+    def rearm(self, sock):
+        """ Re-enable TCP_QUICKACK, the kernel drops it after delayed ACK
+        processing, so it has to be set again before every request. """
+        if self.quickack and sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+            except (AttributeError, OSError):
+                pass
+
+
+def recv_timestamped(sock, nBytes):
+    """ Receive up to nBytes with recvmsg() and return (data, kernel receive time in s).
+
+    The time is None if the socket delivered no SO_TIMESTAMPNS control message.
+    For TCP the timestamp belongs to the last segment that contributed data.
+    """
+    data, ancdata, _, _ = sock.recvmsg(nBytes, _CMSG_SPACE)
+    recv_time_s = None
+    for level, kind, cdata in ancdata:
+        if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS and len(cdata) >= _TIMESPEC.size:
+            sec, nsec = _TIMESPEC.unpack_from(cdata)
+            recv_time_s = sec + nsec * 1e-9
+    return data, recv_time_s
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+@Description :   环形缓冲、批量刷新的日志显示控件
+                 日志先写入有界环形缓冲区，由定时器按固定频率批量刷新到界面，
+                 支持等级过滤和连续重复消息折叠，避免日志风暴拖慢界面线程
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import html
+import time
+from collections import deque
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QComboBox, QLabel
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QTextCursor
+
+
+# 日志等级及显示颜色，None 表示不带等级前缀的普通文本
+LEVELS = ("debug", "info", "warning", "error")
+LEVEL_COLORS = {
+    "debug": "gray",
+    "info": "blue",
+    "warning": "orange",
+    "error": "red",
+    None: "black",
+}
+
+
+class LogEntry:
+    """单条日志"""
+    __slots__ = ("timestamp", "level", "text", "repeat")
+
+    def __init__(self, level, text):
+        self.timestamp = time.time()
+        self.level = level
+        self.text = text
+        self.repeat = 0  # 被折叠的连续重复次数
+
+    def to_html(self):
+        color = LEVEL_COLORS.get(self.level, "black")
+        prefix = f"[{self.level.upper()}] " if self.level else ""
+        suffix = f" (重复 {self.repeat} 次)" if self.repeat else ""
+        return f'<span style="color:{color};">{prefix}{html.escape(self.text)}{suffix}</span>'
+
+
+class LogView(QWidget):
+    """
+    日志显示控件
+
+    Example:
+        log_view = LogView(max_lines=10000, flush_interval_ms=100)
+        log_view.add("系统启动", "info")
+        log_view.append("普通文本")  # 与 QTextEdit.append 兼容
+    """
+
+    def __init__(self, parent=None, max_lines=10000, flush_interval_ms=100, max_batch=500):
+        """
+        Args:
+            max_lines (int): 环形缓冲区及界面保留的最大行数
+            flush_interval_ms (int): 批量刷新间隔（毫秒）
+            max_batch (int): 单次刷新最多写入界面的行数，超出部分只保留最新的
+        """
+        super().__init__(parent)
+        self.max_lines = max_lines
+        self.max_batch = max_batch
+
+        # 全部日志的环形缓冲区，用于切换过滤等级后重建显示
+        self._entries = deque(maxlen=max_lines)
+        # 等待刷新到界面的日志
+        self._pending = deque(maxlen=max_batch)
+        self._min_level = 0
+        self._last_entry = None
+        # 上一条被折叠的日志已经显示过，需要在刷新时补一条重复次数提示
+        self._repeat_dirty = False
+
+        self.suppressed_count = 0   # 被折叠的重复消息总数
+        self.dropped_count = 0      # 刷新不及时被丢弃（未显示）的消息数
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(QLabel("显示等级:"))
+        self.level_combo = QComboBox()
+        self.level_combo.addItems([level.upper() for level in LEVELS])
+        self.level_combo.currentIndexChanged.connect(self.set_min_level)
+        toolbar.addWidget(self.level_combo)
+        toolbar.addStretch()
+        self.stats_label = QLabel("")
+        self.stats_label.setStyleSheet("color:#666;")
+        toolbar.addWidget(self.stats_label)
+        layout.addLayout(toolbar)
+
+        self.text_edit = QTextEdit()
+        self.text_edit.setReadOnly(True)
+        self.text_edit.document().setMaximumBlockCount(max_lines)
+        layout.addWidget(self.text_edit)
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start(flush_interval_ms)
+
+    def add(self, text, level="info"):
+        """
+        写入一条日志，只做入队，实际显示在下一次 flush 时完成
+
+        Args:
+            text (str): 日志内容
+            level (str | None): debug / info / warning / error，None 表示普通文本
+        """
+        level = level.lower() if level else None
+        last = self._last_entry
+        if last is not None and last.level == level and last.text == text:
+            last.repeat += 1
+            self.suppressed_count += 1
+            self._repeat_dirty = True
+            return
+        self._flush_repeat()
+        entry = LogEntry(level, text)
+        self._last_entry = entry
+        self._entries.append(entry)
+        if self._visible(entry):
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped_count += 1
+            self._pending.append(entry)
+
+    def append(self, text):
+        """兼容 QTextEdit.append 的写入方式"""
+        self.add(text, None)
+
+    def _flush_repeat(self):
+        """上一条日志在显示后又被重复，补一条重复次数提示"""
+        if not self._repeat_dirty:
+            return
+        self._repeat_dirty = False
+        last = self._last_entry
+        if last in self._pending or not self._visible(last):
+            return  # 尚未显示，刷新时会带上重复次数
+        note = LogEntry(last.level, last.text)
+        note.repeat = last.repeat
+        self._pending.append(note)
+
+    def _visible(self, entry):
+        level = entry.level or "info"
+        return LEVELS.index(level) >= self._min_level if level in LEVELS else True
+
+    def flush(self):
+        """把待显示的日志一次性写入界面"""
+        self._flush_repeat()
+        if not self._pending:
+            return
+        self._write(self._pending)
+        self._pending.clear()
+        self.stats_label.setText(f"已折叠重复: {self.suppressed_count}  丢弃: {self.dropped_count}")
+
+    def set_min_level(self, index):
+        """切换最低显示等级，并从环形缓冲区重建显示内容"""
+        self._min_level = index
+        self._pending.clear()
+        self._repeat_dirty = False
+        self.text_edit.clear()
+        self._write([entry for entry in self._entries if self._visible(entry)])
+
+    def _write(self, entries):
+        """在一个编辑块内写入多行，界面只重新排版一次"""
+        scrollbar = self.text_edit.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for entry in entries:
+            # 每条日志一个文本块，便于 setMaximumBlockCount 按行数裁剪
+            if not self.text_edit.document().isEmpty():
+                cursor.insertBlock()
+            cursor.insertHtml(entry.to_html())
+        cursor.endEditBlock()
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def clear(self):
+        """清空缓冲区和显示内容"""
+        self._entries.clear()
+        self._pending.clear()
+        self._last_entry = None
+        self._repeat_dirty = False
+        self.text_edit.clear()
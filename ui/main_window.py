@@ -13,15 +13,19 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QFileDialog, QTableWidget, QTableWidgetItem,
                             QHeaderView, QAbstractItemView, QDialog, QFormLayout,
                             QMessageBox, QAction)
-from PyQt5.QtCore import Qt, QSize, QObject, pyqtSignal, QThread, QTimer
+from PyQt5.QtCore import Qt, QSize, QObject, pyqtSignal, QThread, QTimer, QEvent
 from PyQt5.QtGui import QPixmap, QImage, QFont, QPalette, QColor
 from Qcommon.decorators import catch_and_log
 from SickVision.workflows.socket_thread import RobotCommandThread, RobotStatusThread
 from sick.SickSDK import QtVisionSick
+from sick import Discovery
 from epson.EpsonRobot import EpsonRobot
-from rknn.RknnYolo import RKNN_YOLO
 from Qcommon.LogManager import LogManager
 from workflows.system_loader import SystemLoader
+from workflows.camera_thread import CameraThread
+from workflows.model_swap_thread import ModelSwapThread
+from ui.log_view import LogView
+from Qcommon.metrics import MetricsRegistry
 
 # 添加机器人命令通信线程类
 
@@ -93,6 +97,43 @@ class RobotDialog(QDialog):
             'remark': self.remark_input.text()
         }
 
+class MetricsDialog(QDialog):
+    """性能统计对话框，每秒刷新一次各阶段耗时直方图"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("性能统计")
+        self.resize(720, 420)
+        self.metrics = MetricsRegistry()
+
+        layout = QVBoxLayout(self)
+        self.text = QTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Monospace"))
+        self.text.setLineWrapMode(QTextEdit.NoWrap)
+        layout.addWidget(self.text)
+
+        btn_layout = QHBoxLayout()
+        reset_btn = QPushButton("重置")
+        reset_btn.clicked.connect(self.reset_metrics)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addStretch()
+        btn_layout.addWidget(reset_btn)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        self.text.setPlainText(self.metrics.format_text())
+
+    def reset_metrics(self):
+        self.metrics.reset()
+        self.refresh()
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -135,8 +176,18 @@ class MainWindow(QMainWindow):
         self.load_camera_config()
         self.log_output.append("界面加载完成")
 
-        # 用于实时刷新相机画面的定时器
-        self.camera_timer: QTimer | None = None
+        # 后台相机采集线程
+        self.camera_thread: CameraThread | None = None
+        # 运行中切换模型的线程，以及相机线程当前使用的模型路径
+        self.model_swap_thread: ModelSwapThread | None = None
+        self.active_model_path = None
+
+        # 设备发现：后台定期扫描各网卡，缓存保存在 config/device_cache.json，
+        # 重启后已知的相机连接前不再探测
+        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.discovery = Discovery(ttl=Discovery.RESTART_TTL,
+                                   cachePath=os.path.join(root_dir, "config", "device_cache.json"))
+        self.discovery.start(interval=60.0)
 
         # 平台显示
         platform_text = platform.system().lower()
@@ -158,31 +209,28 @@ class MainWindow(QMainWindow):
         self.robot_status_threads = {}
 
     def add_log(self, text: str, level: str = "info"):
-        """根据等级向日志输出控件写入彩色文本
+        """向日志控件写入一条日志，由 LogView 批量刷新显示
         level 可选: debug / info / warning / error
         """
-        level = level.lower()
-        color_map = {
-            "debug": "gray",
-            "info": "blue",
-            "warning": "orange",
-            "error": "red",
-        }
-        color = color_map.get(level, "black")
-        self.log_output.append(f'<span style="color:{color};">[{level.upper()}] {text}</span>')
+        self.log_output.add(text, level)
 
     def on_start_clicked(self):
         cfg_cam = {"ipAddr": self.camera_ip, "port": self.camera_port }
         cfg_robots = self.get_robot_list()
         mdl_path = getattr(self, "model_path", None)
+        self.active_model_path = mdl_path
 
         self.loader_thread = QThread(self)
-        self.loader = SystemLoader(cfg_cam, cfg_robots, mdl_path)
+        # 部分就绪：相机和模型就绪即启动，机器人连上后再加入
+        self.loader = SystemLoader(cfg_cam, cfg_robots, mdl_path, partial_ready=True,
+                                   discovery=self.discovery)
         self.loader.moveToThread(self.loader_thread)
 
         self.loader.progress.connect(self.add_log)
         self.loader.finished.connect(self.on_system_ready)
+        self.loader.robot_ready.connect(self.on_robot_ready)
         self.loader.error.connect(self.handle_worker_error)
+        self.loader.all_done.connect(self.loader_thread.quit)
         self.loader_thread.started.connect(self.loader.run)
         self.loader_thread.start()
 
@@ -202,10 +250,16 @@ class MainWindow(QMainWindow):
         # 启动机器人通信线程
         self.start_robot_threads()
         
-        if hasattr(self, "loader_thread") and self.loader_thread.isRunning() and self.loader_thread != QThread.currentThread():
-            self.loader_thread.quit()
-            self.loader_thread.wait()
+        # 加载线程在所有启动任务结束后由 all_done 信号退出（部分就绪时机器人可能仍在连接）
         self.start_btn.setEnabled(True)
+
+    def on_robot_ready(self, name, robot):
+        """部分就绪后才连上的机器人加入系统"""
+        if not self.system_running:
+            robot.disconnect()
+            return
+        self.robots[name] = robot
+        self.start_robot_thread(name, robot)
         
     def start_robot_threads(self):
         """启动所有机器人的通信线程"""
@@ -214,22 +268,26 @@ class MainWindow(QMainWindow):
         
         # 为每个机器人创建并启动线程
         for name, robot in self.robots.items():
-            # 创建命令线程
-            cmd_thread = RobotCommandThread(robot, name)
-            cmd_thread.signal.connect(self.add_log)  # 连接日志信号
-            self.robot_command_threads[name] = cmd_thread
-            
-            # 创建状态线程
-            status_thread = RobotStatusThread(robot, name)
-            status_thread.signal.connect(self.add_log)  # 连接日志信号
-            status_thread.status_update.connect(self.handle_robot_status)  # 连接状态更新信号
-            self.robot_status_threads[name] = status_thread
-            
-            # 启动线程
-            cmd_thread.start()
-            status_thread.start()
-            
-            self.add_log(f"已启动机器人 {name} 的通信线程", "info")
+            self.start_robot_thread(name, robot)
+
+    def start_robot_thread(self, name, robot):
+        """为一个机器人创建并启动命令线程和状态线程"""
+        # 创建命令线程
+        cmd_thread = RobotCommandThread(robot, name)
+        cmd_thread.signal.connect(self.add_log)  # 连接日志信号
+        self.robot_command_threads[name] = cmd_thread
+        
+        # 创建状态线程
+        status_thread = RobotStatusThread(robot, name)
+        status_thread.signal.connect(self.add_log)  # 连接日志信号
+        status_thread.status_update.connect(self.handle_robot_status)  # 连接状态更新信号
+        self.robot_status_threads[name] = status_thread
+        
+        # 启动线程
+        cmd_thread.start()
+        status_thread.start()
+        
+        self.add_log(f"已启动机器人 {name} 的通信线程", "info")
     
     def stop_robot_threads(self):
         """停止所有机器人通信线程"""
@@ -296,6 +354,7 @@ class MainWindow(QMainWindow):
         self.camera_view.setAlignment(Qt.AlignCenter)
         self.camera_view.setMinimumSize(400, 300)
         self.camera_view.setStyleSheet("background-color: #2a2a2a; color: white; border-radius: 5px;")
+        self.camera_view.installEventFilter(self)
         
         # 创建图像显示窗口
         self.image_view = QLabel("图像显示")
@@ -314,10 +373,9 @@ class MainWindow(QMainWindow):
         log_group = QGroupBox("系统日志")
         log_layout = QVBoxLayout(log_group)
         
-        self.log_output = QTextEdit()
-        self.log_output.setReadOnly(True)
+        self.log_output = LogView(max_lines=10000, flush_interval_ms=100)
         self.log_output.setMinimumHeight(150)
-        self.log_output.setStyleSheet("background-color: #f5f5f5; border-radius: 5px;")
+        self.log_output.text_edit.setStyleSheet("background-color: #f5f5f5; border-radius: 5px;")
         
         log_layout.addWidget(self.log_output)
         
@@ -714,6 +772,8 @@ class MainWindow(QMainWindow):
         # 记住当前选择的模型
         current_model = self.model_combo.currentText() if self.model_combo.count() > 0 else ""
         
+        # 重新填充列表期间不触发选择变化，结束后统一更新一次（运行中不会误切换模型）
+        self.model_combo.blockSignals(True)
         self.model_combo.clear()
         
         # 获取项目根目录
@@ -740,6 +800,7 @@ class MainWindow(QMainWindow):
                 else:
                     # 默认选择第一个模型
                     self.model_combo.setCurrentIndex(0)
+                self.model_combo.blockSignals(False)
                 
                 # 确保更新模型信息
                 self.update_model_info()
@@ -751,6 +812,7 @@ class MainWindow(QMainWindow):
             self.model_combo.addItem("models目录不存在")
             self.log_output.append("models目录不存在")
             self.model_info.setText("models目录不存在")
+        self.model_combo.blockSignals(False)
     
     def browse_model(self):
         """浏览选择模型文件"""
@@ -817,6 +879,45 @@ class MainWindow(QMainWindow):
         else:
             self.model_info.setText("未选择有效模型")
             self.model_path = None
+        # 系统运行中选择了另一个模型时在后台切换，不需要停止系统
+        self.swap_model_live()
+
+    def swap_model_live(self):
+        """系统运行中切换到当前选择的模型，上一次切换结束后才开始下一次"""
+        model_path = getattr(self, "model_path", None)
+        if not getattr(self, "system_running", False) or self.camera_thread is None:
+            return
+        if model_path is None or model_path == self.active_model_path:
+            return
+        if self.model_swap_thread is not None and self.model_swap_thread.isRunning():
+            # 正在切换时的新选择在本次切换结束后处理
+            return
+        self.add_log(f"后台加载模型 {os.path.basename(model_path)}，切换期间继续使用当前模型", "info")
+        self.model_swap_thread = ModelSwapThread(self.camera_thread, model_path)
+        self.model_swap_thread.swapped.connect(self.on_model_swapped)
+        self.model_swap_thread.failed.connect(self.on_model_swap_failed)
+        self.model_swap_thread.start()
+
+    def on_model_swapped(self, model_path, detector, previous, wait_s):
+        """新模型已在相机线程中生效，归还旧模型"""
+        from rknn.ModelManager import ModelManager
+        manager = ModelManager()
+        if not self.system_running:
+            # 切换完成前系统已停止，旧模型已在停止时归还
+            manager.release(detector)
+            return
+        self.detector = detector
+        self.active_model_path = model_path
+        if previous is not None:
+            manager.release(previous)
+        self.add_log(f"模型已切换为 {os.path.basename(model_path)}，等待当前帧 {wait_s * 1000:.1f} ms", "info")
+        self.swap_model_live()
+
+    def on_model_swap_failed(self, model_path, reason):
+        self.add_log(reason, "warning")
+        # 切换失败期间又选择了其他模型时继续切换
+        if getattr(self, "model_path", None) != model_path:
+            self.swap_model_live()
 
     def setup_styles(self):
         """设置界面样式"""
@@ -883,6 +984,9 @@ class MainWindow(QMainWindow):
 
         # 系统菜单
         system_menu = menu_bar.addMenu("系统")
+        metrics_act = QAction("性能统计", self)
+        metrics_act.triggered.connect(self.show_metrics_dialog)
+        system_menu.addAction(metrics_act)
         exit_act = QAction("退出", self)
         exit_act.triggered.connect(self.close)
         system_menu.addAction(exit_act)
@@ -916,6 +1020,13 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.warning(self, "打开失败", f"无法打开目录: {str(e)}")
 
+    def show_metrics_dialog(self):
+        """显示性能统计（非模态，可边运行边查看）"""
+        if getattr(self, "metrics_dialog", None) is None:
+            self.metrics_dialog = MetricsDialog(self)
+        self.metrics_dialog.show()
+        self.metrics_dialog.raise_()
+
     def show_about_dialog(self):
         """显示版本信息"""
         about_text = "VisionSystem\n版本: 1.0.0\n开发者:曹英杰"
@@ -956,7 +1067,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "测试结果", "相机已连接,无需测试")
             self.add_log("相机已连接,无需测试", "warning")
             return
-        cam = QtVisionSick(ipAddr=ip, port=port)
+        cam = QtVisionSick(ipAddr=ip, port=port, discovery=self.discovery)
         ok = False
         try:
             ok = cam.connect(use_single_step=False)
@@ -1017,18 +1128,22 @@ class MainWindow(QMainWindow):
 
     # ------------------ 相机画面刷新 ------------------
     def start_camera_stream(self):
-        """创建并启动QTimer定时刷新相机视频流"""
+        """启动后台相机采集线程，界面只在收到新帧时贴图"""
         if self.camera is None:
             return
-        if self.camera_timer is None:
-            self.camera_timer = QTimer(self)
-            self.camera_timer.timeout.connect(self.update_camera_view)
-        if not self.camera_timer.isActive():
-            self.camera_timer.start(33)  # 约30FPS
+        if self.camera_thread is None or not self.camera_thread.isRunning():
+            # 系统运行时对画面做检测并叠加检测框
+            self.camera_thread = CameraThread(self.camera, getattr(self, "detector", None))
+            self.camera_thread.frame_ready.connect(self.update_camera_view)
+            self.camera_thread.signal.connect(self.add_log)
+            self.camera_thread.set_target_size(self.camera_view.width(), self.camera_view.height())
+            self.camera_thread.start()
 
     def stop_camera_stream(self):
-        if self.camera_timer and self.camera_timer.isActive():
-            self.camera_timer.stop()
+        if self.camera_thread is not None:
+            if self.camera_thread.isRunning():
+                self.camera_thread.stop()
+            self.camera_thread = None
 
         # 清空 QLabel 中的图像并恢复占位文字
         if hasattr(self, "camera_view") and isinstance(self.camera_view, QLabel):
@@ -1036,26 +1151,29 @@ class MainWindow(QMainWindow):
             self.camera_view.setText("相机视频流")
 
     def update_camera_view(self):
-        """抓取一帧并显示到 QLabel"""
-        if self.camera is None:
+        """取走采集线程准备好的最新一帧并显示到 QLabel"""
+        if self.camera_thread is None:
             return
-        try:
-            success, _, frame = self.camera.get_frame()
-            if not success:
-                return
-            # frame 是灰度 np.ndarray -> 转成 RGB 便于QImage显示
-            import cv2
-            rgb = cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB)
-            h, w, _ = rgb.shape
-            bytes_per_line = 3 * w
-            qimg = QImage(rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            pix = QPixmap.fromImage(qimg).scaled(self.camera_view.size(), Qt.KeepAspectRatio)
-            self.camera_view.setPixmap(pix)
-        except Exception as e:
-            self.add_log(f"更新相机画面失败: {e}", "warning")
+        image = self.camera_thread.take_latest()
+        if image is None:
+            return
+        # 图像已在采集线程中缩放到显示尺寸，这里只做一次贴图
+        self.camera_view.setPixmap(QPixmap.fromImage(image))
+
+    def eventFilter(self, obj, event):
+        """相机显示区域尺寸变化时通知采集线程重新计算缩放尺寸"""
+        if obj is getattr(self, "camera_view", None) and event.type() == QEvent.Resize:
+            if getattr(self, "camera_thread", None) is not None:
+                size = event.size()
+                self.camera_thread.set_target_size(size.width(), size.height())
+        return super().eventFilter(obj, event)
 
     # ---------- 窗口关闭事件 ----------
     def closeEvent(self, event):
+        # 等待正在进行的模型切换结束，避免线程对象在运行中被销毁
+        if self.model_swap_thread is not None:
+            self.model_swap_thread.wait()
+        self.discovery.stop()
         # 停止定时器，断开设备
         self.stop_camera_stream()
         # 停止机器人线程
@@ -1096,6 +1214,12 @@ class MainWindow(QMainWindow):
         except Exception:
             pass
 
+        # 归还模型，实例保留在模型管理器中，再次启动时直接复用
+        if getattr(self, "detector", None) is not None:
+            from rknn.ModelManager import ModelManager
+            ModelManager().release(self.detector)
+            self.detector = None
+
         self.add_log("系统已停止", "info")
 
         # 恢复按钮为启动
@@ -1115,10 +1239,17 @@ class MainWindow(QMainWindow):
         
         self.add_log("开始测试模型加载…", "info")
         try:
-            detector = RKNN_YOLO(self.model_path)
-            detector.release()
-            QMessageBox.information(self, "测试模型", "模型加载成功！")
-            self.add_log("模型加载成功", "info")
+            # 测试完归还实例，它仍保留在模型管理器中，启动系统时直接复用；
+            # 切换过的其他模型超出缓存上限后由管理器释放
+            from rknn.ModelManager import ModelManager
+            manager = ModelManager()
+            detector = manager.get(self.model_path)
+            info = manager.info(detector)
+            manager.release(detector)
+            message = (f"模型加载成功，加载 {info['load_s']:.2f} 秒，预热 {info['warmup_runs']} 次 "
+                       f"{info['warmup_s']:.2f} 秒" + ("（已缓存）" if info["hits"] else ""))
+            QMessageBox.information(self, "测试模型", message)
+            self.add_log(message, "info")
         except Exception as e:
             QMessageBox.warning(self, "测试模型", f"模型加载失败: {e}")
             self.add_log(f"模型加载失败: {e}", "error")
@@ -0,0 +1,210 @@
+"""
+@Description :   相机采集线程
+                 在后台线程中阻塞取帧并准备好显示用的 QImage，界面线程只负责贴图。
+                 灰度图直接包装为 Format_Grayscale8，检测、缩放和检测框叠加都在采集线程中完成，
+                 检测框只画在产生它的那一帧上
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import time
+import threading
+
+from PyQt5.QtCore import pyqtSignal, QThread
+from PyQt5.QtGui import QImage
+
+
+class CameraThread(QThread):
+    """
+    相机采集线程
+
+    只保留最新一帧：界面还没取走上一帧时，新帧直接覆盖旧帧，
+    frame_ready 信号最多只有一个在事件队列中排队，界面刷新速度跟不上时自动丢弃过期帧。
+
+    Example:
+        thread = CameraThread(camera, detector)
+        thread.frame_ready.connect(window.on_camera_frame)
+        thread.start()
+        ...
+        image = thread.take_latest()
+    """
+    frame_ready = pyqtSignal()   # 有新帧可取
+    signal = pyqtSignal(str, str)  # 日志信号 (文本, 等级)
+
+    def __init__(self, camera, detector=None, error_delay=1.0):
+        """
+        Args:
+            camera: QtVisionSick 实例
+            detector (RKNN_YOLO, optional): 检测模型，设置后对每一帧做检测并叠加检测框
+            error_delay (float): 取帧失败后的等待时间（秒）
+        """
+        super().__init__()
+        self.camera = camera
+        self.detector = detector
+        self.error_delay = error_delay
+        self.is_running = True
+
+        self._lock = threading.Lock()
+        self._latest = None
+        self._pending = False
+        # 界面正在使用的图像缓冲区，QImage 不拷贝数据，必须保证其生命周期
+        self._displayed_buffer = None
+
+        # 显示尺寸与缩放缓存，只在窗口尺寸或帧尺寸变化时重新计算
+        self._target_size = None
+        self._scale_key = None
+        self._scaled_size = None
+        self._scale = 1.0
+
+        self._detect_failed = False
+        # 检测期间持有，set_detector 借此保证返回后旧模型不再被使用
+        self._detector_lock = threading.Lock()
+        # 最近一帧原图，用于切换模型前的校验
+        self.last_frame = None
+
+        self.frames_acquired = 0
+        self.frames_dropped = 0
+
+    def set_target_size(self, width, height):
+        """
+        设置显示区域尺寸（界面线程在控件尺寸变化时调用）
+
+        Args:
+            width (int): 显示宽度
+            height (int): 显示高度
+        """
+        with self._lock:
+            self._target_size = (int(width), int(height)) if width > 0 and height > 0 else None
+
+    def set_detector(self, detector):
+        """
+        更换或取消（None）用于叠加显示的检测模型，从下一帧开始生效；
+        正在检测的帧处理完后才替换，返回后旧模型不会再被本线程使用
+
+        Args:
+            detector (RKNN_YOLO): 检测模型
+
+        Returns:
+            RKNN_YOLO: 被替换的旧模型
+        """
+        with self._detector_lock:
+            previous, self.detector = self.detector, detector
+        return previous
+
+    def _detect(self, frame):
+        """
+        对当前帧做检测，检测失败时只显示图像，连续失败只提示一次
+
+        Returns:
+            list: DetectBox 列表，坐标为原图坐标
+        """
+        self.last_frame = frame
+        try:
+            with self._detector_lock:
+                if self.detector is None:
+                    return []
+                detections = self.detector.detect(frame)
+        except Exception as e:
+            if not self._detect_failed:
+                self._detect_failed = True
+                self.signal.emit(f"画面检测失败: {str(e)}", "warning")
+            return []
+        self._detect_failed = False
+        return detections
+
+    def _scaled_geometry(self, width, height):
+        """按 KeepAspectRatio 计算缩放后的尺寸，结果按 (帧尺寸, 目标尺寸) 缓存"""
+        key = (width, height, self._target_size)
+        if key != self._scale_key:
+            self._scale_key = key
+            if self._target_size is None:
+                self._scale = 1.0
+                self._scaled_size = (width, height)
+            else:
+                tw, th = self._target_size
+                self._scale = min(tw / width, th / height)
+                self._scaled_size = (max(1, int(width * self._scale)), max(1, int(height * self._scale)))
+        return self._scaled_size, self._scale
+
+    def _draw_detections(self, image, detections, scale):
+        """在缩放后的灰度缓冲区上原地绘制检测框"""
+        import cv2
+        import numpy as np
+        for result in detections:
+            box = result['detect_box'] if isinstance(result, dict) and 'detect_box' in result else result
+            pts = np.array([[box.pt1x, box.pt1y], [box.pt2x, box.pt2y],
+                            [box.pt3x, box.pt3y], [box.pt4x, box.pt4y]], np.float32) * scale
+            cv2.polylines(image, [pts.astype(np.int32).reshape((-1, 1, 2))], True, 255, 2)
+
+    def prepare_image(self, frame, detections=None):
+        """
+        把相机的灰度图缩放到显示尺寸、叠加检测框并包装为 QImage（在采集线程中执行）
+
+        Args:
+            frame (np.ndarray): 8位灰度图
+            detections (list, optional): 该帧的 DetectBox 列表或含 detect_box 的跟踪结果列表，坐标为原图坐标
+
+        Returns:
+            tuple: (QImage, np.ndarray) QImage 直接引用返回的缓冲区，不做拷贝
+        """
+        import cv2
+        import numpy as np
+        h, w = frame.shape[:2]
+        with self._lock:
+            (sw, sh), scale = self._scaled_geometry(w, h)
+        if (sw, sh) != (w, h):
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+            buffer = cv2.resize(frame, (sw, sh), interpolation=interpolation)
+        else:
+            # 相机每帧都是新数组，这里不会与上一帧共享内存
+            buffer = np.ascontiguousarray(frame)
+        if detections:
+            self._draw_detections(buffer, detections, scale)
+        image = QImage(buffer.data, sw, sh, buffer.strides[0], QImage.Format_Grayscale8)
+        return image, buffer
+
+    def run(self):
+        self.signal.emit("相机采集线程已启动", "info")
+        while self.is_running:
+            try:
+                success, _, frame = self.camera.get_frame()
+                if not success or frame is None:
+                    time.sleep(0.01)
+                    continue
+                prepared = self.prepare_image(frame, self._detect(frame))
+                self.frames_acquired += 1
+                with self._lock:
+                    if self._pending:
+                        self.frames_dropped += 1
+                    self._latest = prepared
+                    notify = not self._pending
+                    self._pending = True
+                if notify:
+                    self.frame_ready.emit()
+            except Exception as e:
+                self.signal.emit(f"相机取帧失败: {str(e)}", "warning")
+                time.sleep(self.error_delay)
+        self.signal.emit("相机采集线程已停止", "info")
+
+    def take_latest(self):
+        """
+        取走最新一帧（界面线程调用）
+
+        返回的 QImage 直接引用采集线程的缓冲区，该缓冲区保留到下一次调用本方法为止，
+        调用方应在此之前完成 QPixmap.fromImage。
+
+        Returns:
+            QImage | None: 没有新帧时返回 None
+        """
+        with self._lock:
+            prepared = self._latest
+            self._latest = None
+            self._pending = False
+        if prepared is None:
+            return None
+        image, self._displayed_buffer = prepared
+        return image
+
+    def stop(self):
+        self.is_running = False
+        self.wait()  # 等待线程结束
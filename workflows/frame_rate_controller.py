@@ -0,0 +1,241 @@
+"""
+@Description :   自适应帧周期控制器
+                 根据流水线各阶段的处理能力、队列积压和丢帧情况调整相机的 framePeriodUs，
+                 让相机帧率跟随系统实际能消化的速度；带迟滞和写入限频，避免频繁改写设备参数
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import time
+import threading
+import weakref
+
+from Qcommon.LogManager import LogManager
+from Qcommon.metrics import MetricsRegistry
+
+
+class FrameRateController:
+    """
+    帧周期控制器
+
+    每个周期取采集之后各阶段最近窗口的平均耗时，最慢阶段决定流水线的处理能力，
+    目标帧率 = 处理能力 * headroom。解析/推理队列出现丢帧或积满时认为过载，
+    至少按 max_step 放慢。目标与当前帧周期相差不超过 deadband 时不调整，
+    同一方向的调整需要连续 confirm_ticks 个周期成立，两次写入之间至少间隔
+    min_write_interval_s，每次最多改变 max_step。
+
+    设置 idle_timeout_s 后，超过该时间没有检测到目标时降到最低帧率，
+    重新检测到目标后立即恢复。
+
+    Example:
+        controller = FrameRateController(pipeline, camera, min_period_us=33333, max_period_us=200000)
+        controller.start()
+        ...
+        controller.stop()
+    """
+
+    # 用于判断过载的队列（drop_oldest 策略，积压时会丢帧）
+    PRESSURE_QUEUES = ("decode", "inference")
+
+    def __init__(self, pipeline, camera, min_period_us=33333, max_period_us=200000,
+                 headroom=0.85, interval_s=1.0, deadband=0.1, confirm_ticks=3,
+                 min_write_interval_s=5.0, max_step=0.25, idle_timeout_s=None):
+        """
+        Args:
+            pipeline (VisionPipeline): 已启动的流水线
+            camera (QtVisionSick): 已连接的相机
+            min_period_us (int): 最小帧周期（最高帧率）
+            max_period_us (int): 最大帧周期（最低帧率）
+            headroom (float): 目标帧率占处理能力的比例，留出余量吸收抖动
+            interval_s (float): 控制周期（秒）
+            deadband (float): 相对变化小于该值时不调整
+            confirm_ticks (int): 同一方向连续成立多少个周期后才调整
+            min_write_interval_s (float): 两次写入设备的最小间隔（秒）
+            max_step (float): 每次调整的最大相对变化
+            idle_timeout_s (float, optional): 多久没有检测到目标视为空闲，None 表示不检测空闲
+        """
+        if min_period_us <= 0 or max_period_us < min_period_us:
+            raise ValueError("帧周期范围无效")
+        self.pipeline = pipeline
+        self.camera = camera
+        self.min_period_us = min_period_us
+        self.max_period_us = max_period_us
+        self.headroom = headroom
+        self.interval_s = interval_s
+        self.deadband = deadband
+        self.confirm_ticks = confirm_ticks
+        self.min_write_interval_s = min_write_interval_s
+        self.max_step = max_step
+        self.idle_timeout_s = idle_timeout_s
+        self.logger = LogManager().get_logger()
+        self.metrics = MetricsRegistry()
+
+        self.capacity_fps = 0.0
+        self.bottleneck = None
+        self.target_period_us = None
+        self.idle = False
+        self._pending_direction = 0
+        self._pending_count = 0
+        self._last_write = None
+        self._last_dropped = None
+        self._last_activity = time.monotonic()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        pipeline.add_listener(self._on_packet)
+        # 指标注册在全局单例上，回调只通过弱引用访问控制器，控制器和它持有的相机可以被正常回收
+        controller_ref = weakref.ref(self)
+
+        def read(getter):
+            def value():
+                controller = controller_ref()
+                return getter(controller) if controller is not None else 0
+            return value
+
+        self.metrics.gauge("camera.frame_period_us", read(lambda c: c.current_period_us()))
+        self.metrics.gauge("frame_rate.capacity_fps", read(lambda c: c.capacity_fps))
+
+    # ------------------ 状态采集 ------------------
+    def _on_packet(self, packet):
+        """流水线结果回调，记录最近一次检测到目标的时间"""
+        if packet.detections:
+            self._last_activity = time.monotonic()
+
+    def current_period_us(self):
+        return self.camera.frame_period_us or self.min_period_us
+
+    def _capacity(self):
+        """
+        Returns:
+            tuple: (最慢阶段名称, 处理能力fps)，还没有统计数据时返回 (None, 0.0)
+        """
+        bottleneck, capacity = None, 0.0
+        for stage in self.pipeline.stages:
+            if stage.in_queue is None:
+                continue  # 采集阶段的耗时主要是等待相机，不代表处理能力
+            avg_s = stage.metrics.recent_avg_s
+            if avg_s <= 0:
+                continue
+            fps = 1.0 / avg_s
+            if bottleneck is None or fps < capacity:
+                bottleneck, capacity = stage.stage_name, fps
+        return bottleneck, capacity
+
+    def _overloaded(self):
+        """自上个周期以来解析/推理队列是否丢帧或积满"""
+        queues = [self.pipeline.queues[name] for name in self.PRESSURE_QUEUES if name in self.pipeline.queues]
+        dropped = sum(q.dropped for q in queues)
+        last, self._last_dropped = self._last_dropped, dropped
+        if last is not None and dropped > last:
+            return True
+        return any(q.depth >= q.maxsize for q in queues)
+
+    # ------------------ 控制 ------------------
+    def _clamp(self, period_us):
+        return int(min(self.max_period_us, max(self.min_period_us, period_us)))
+
+    def step(self, now=None):
+        """
+        执行一次控制
+
+        Args:
+            now (float, optional): 单调时钟时间，默认 time.monotonic()
+
+        Returns:
+            int: 写入的新帧周期（微秒），本周期未调整时返回 None
+        """
+        now = time.monotonic() if now is None else now
+        current = self.current_period_us()
+        self.bottleneck, self.capacity_fps = self._capacity()
+        overloaded = self._overloaded()
+
+        was_idle = self.idle
+        self.idle = self.idle_timeout_s is not None and now - self._last_activity > self.idle_timeout_s
+        if self.idle:
+            target = self.max_period_us
+        elif self.capacity_fps > 0:
+            target = 1e6 / (self.capacity_fps * self.headroom)
+            if overloaded:
+                target = max(target, current * (1 + self.max_step))
+        else:
+            return None
+        target = self._clamp(target)
+        self.target_period_us = target
+
+        # 空闲状态切换时直接跳到目标，不经过迟滞和限频
+        if was_idle != self.idle:
+            return self._write(target, now, "空闲" if self.idle else "恢复")
+
+        change = (target - current) / current
+        if abs(change) < self.deadband:
+            self._pending_direction = 0
+            self._pending_count = 0
+            return None
+        direction = 1 if change > 0 else -1
+        if direction == self._pending_direction:
+            self._pending_count += 1
+        else:
+            self._pending_direction = direction
+            self._pending_count = 1
+        if self._pending_count < self.confirm_ticks:
+            return None
+        if self._last_write is not None and now - self._last_write < self.min_write_interval_s:
+            return None
+
+        limit = current * (1 + self.max_step) if direction > 0 else current * (1 - self.max_step)
+        new_period = self._clamp(min(target, limit) if direction > 0 else max(target, limit))
+        if new_period == current:
+            return None
+        reason = "过载" if overloaded else f"瓶颈 {self.bottleneck} {self.capacity_fps:.1f} fps"
+        return self._write(new_period, now, reason)
+
+    def _write(self, period_us, now, reason):
+        try:
+            # 设备可能限幅，记录实际生效的帧周期
+            period_us = self.camera.set_frame_period_us(period_us)
+        except Exception as e:
+            self.logger.warning(f"调整帧周期失败: {str(e)}")
+            return None
+        self._last_write = now
+        self._pending_direction = 0
+        self._pending_count = 0
+        self.metrics.counter("frame_rate.adjustments").inc()
+        self.logger.info(f"帧周期调整为 {period_us} 微秒 ({1e6 / period_us:.1f} fps)，原因: {reason}")
+        return period_us
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_s):
+            try:
+                self.step()
+            except Exception as e:
+                self.logger.warning(f"帧周期控制出错: {str(e)}")
+
+    def start(self):
+        """在后台守护线程中运行控制循环"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="frame-rate-controller", daemon=True)
+        self._thread.start()
+        self.logger.info(f"自适应帧周期已启用: {self.min_period_us}~{self.max_period_us} 微秒")
+
+    def stop(self):
+        """停止控制循环"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(2.0)
+        self._thread = None
+
+    def status(self):
+        """
+        Returns:
+            dict: period_us / target_period_us / capacity_fps / bottleneck / idle
+        """
+        return {
+            "period_us": self.current_period_us(),
+            "target_period_us": self.target_period_us,
+            "capacity_fps": self.capacity_fps,
+            "bottleneck": self.bottleneck,
+            "idle": self.idle,
+        }
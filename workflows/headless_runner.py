@@ -0,0 +1,232 @@
+"""
+@Description :   无界面生产运行器
+                 读取 config 目录下的相机与机器人配置，加载模型并以服务方式运行视觉-机器人流水线，
+                 全程不导入 Qt
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import os
+import json
+import time
+import signal
+import threading
+
+from Qcommon.LogManager import LogManager
+from Qcommon.metrics import MetricsRegistry
+from sick.SickSDK import QtVisionSick
+from sick import Discovery
+from epson.EpsonRobot import EpsonRobot
+from workflows.pipeline import VisionPipeline
+
+# 项目根目录
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 设备发现的后台扫描间隔（秒）
+DISCOVERY_INTERVAL_S = 60.0
+
+
+def load_json_config(file_name, config_dir=None):
+    """
+    读取 config 目录下的 JSON 配置文件
+
+    Args:
+        file_name (str): 配置文件名，例如 camera.json
+        config_dir (str, optional): 配置目录，默认为项目根目录下的 config
+
+    Returns:
+        dict | list: 配置内容
+    """
+    config_dir = config_dir or os.path.join(ROOT_DIR, "config")
+    with open(os.path.join(config_dir, file_name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_default_model(models_dir=None):
+    """返回 models 目录下第一个 .rknn 模型，找不到时返回 None"""
+    models_dir = models_dir or os.path.join(ROOT_DIR, "models")
+    if not os.path.isdir(models_dir):
+        return None
+    for name in sorted(os.listdir(models_dir)):
+        if name.endswith(".rknn"):
+            return os.path.join(models_dir, name)
+    return None
+
+
+class HeadlessRunner:
+    """
+    无界面运行器
+
+    Example:
+        runner = HeadlessRunner(model_path="models/test.rknn")
+        runner.run()  # 阻塞直到收到 SIGINT/SIGTERM
+    """
+
+    def __init__(self, model_path=None, config_dir=None, stats_interval=10.0,
+                 metrics_port=None, cell=None, adaptive_rate=None):
+        """
+        Args:
+            model_path (str, optional): 模型路径，默认取 models 目录中的第一个 .rknn 文件
+            config_dir (str, optional): 配置目录
+            stats_interval (float): 统计信息打印间隔（秒），小于等于0时不打印
+            metrics_port (int, optional): Prometheus 指标端口，为 None 时不启动指标服务
+            cell (str, optional): 工位名称，作为指标的 cell 标签
+            adaptive_rate (tuple, optional): (最低fps, 最高fps)，设置后启用自适应帧周期控制
+        """
+        self.model_path = model_path or find_default_model()
+        self.config_dir = config_dir
+        self.stats_interval = stats_interval
+        self.logger = LogManager().get_logger()
+
+        self.camera = None
+        self.robots = {}
+        self.detector = None
+        self.pipeline = None
+        self.metrics_port = metrics_port
+        self.cell = cell
+        self.metrics_server = None
+        self.adaptive_rate = adaptive_rate
+        self.rate_controller = None
+        self.discovery = None
+        self._stop_event = threading.Event()
+        self._reload_event = threading.Event()
+
+    def setup(self):
+        """连接相机和机器人，加载模型并创建流水线"""
+        camera_cfg = load_json_config("camera.json", self.config_dir)
+        robots_cfg = load_json_config("robots.json", self.config_dir)
+
+        self.logger.info(f"连接相机 {camera_cfg['ip']}:{camera_cfg['port']}…")
+        # 已知设备缓存在配置目录中，重启后可以跳过连接前的探测
+        config_dir = self.config_dir or os.path.join(ROOT_DIR, "config")
+        # 后台定期扫描各网卡，保持缓存中的设备信息是最新的
+        self.discovery = Discovery(ttl=Discovery.RESTART_TTL, cachePath=os.path.join(config_dir, "device_cache.json"))
+        self.discovery.start(interval=DISCOVERY_INTERVAL_S)
+        self.camera = QtVisionSick(ipAddr=camera_cfg["ip"], port=camera_cfg["port"], discovery=self.discovery)
+        self.camera.connect(use_single_step=False)
+
+        for cfg in robots_cfg:
+            robot = EpsonRobot(cfg["ip"], cfg["cmd_port"], cfg["status_port"])
+            if robot.connect():
+                self.robots[cfg["name"]] = robot
+                self.logger.info(f"机器人 {cfg['name']} 连接成功")
+            else:
+                self.logger.warning(f"机器人 {cfg['name']} 连接失败")
+
+        if not self.model_path:
+            raise RuntimeError("未找到可用的模型文件")
+        self.logger.info(f"加载模型 {self.model_path}…")
+        from rknn.ModelManager import ModelManager
+        self.detector = ModelManager().get(self.model_path, tracking=True)
+
+        self.pipeline = VisionPipeline(self.camera, self.detector, self.robots)
+
+    def request_stop(self, signum=None, frame=None):
+        """信号处理函数，请求停止运行"""
+        if signum is not None:
+            self.logger.info(f"收到信号 {signum}，准备停止")
+        self._stop_event.set()
+
+    def request_reload(self, signum=None, frame=None):
+        """信号处理函数，请求重新加载模型（模型文件被替换后发送 SIGHUP）"""
+        self._reload_event.set()
+
+    def install_signal_handlers(self):
+        """注册 SIGINT/SIGTERM/SIGHUP 处理，只能在主线程调用"""
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGTERM, self.request_stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self.request_reload)
+
+    def reload_model(self, model_path=None):
+        """
+        不停止流水线切换到新模型，切换在后台进行，失败时继续使用当前模型
+
+        Args:
+            model_path (str, optional): 新模型路径，默认重新加载当前路径（文件被替换时生效）
+
+        Returns:
+            ModelSwap: 切换状态，切换已在进行中时返回 None
+        """
+        model_path = model_path or self.model_path
+        try:
+            swap = self.pipeline.swap_model(model_path)
+        except RuntimeError as e:
+            self.logger.warning(str(e))
+            return None
+        self.model_path = model_path
+        return swap
+
+    def run(self):
+        """
+        运行直到收到停止请求
+
+        Returns:
+            int: 进程退出码
+        """
+        self.install_signal_handlers()
+        try:
+            self.setup()
+            self.pipeline.start()
+            self.pipeline.export_metrics()
+            if self.adaptive_rate is not None:
+                from workflows.frame_rate_controller import FrameRateController
+                min_fps, max_fps = self.adaptive_rate
+                self.rate_controller = FrameRateController(self.pipeline, self.camera,
+                                                           min_period_us=int(1e6 / max_fps),
+                                                           max_period_us=int(1e6 / min_fps))
+                self.rate_controller.start()
+            if self.metrics_port is not None:
+                from Qcommon.metrics_server import MetricsServer
+                labels = {"cell": self.cell} if self.cell else None
+                self.metrics_server = MetricsServer(port=self.metrics_port, labels=labels)
+                self.metrics_server.start()
+            last_stats = time.monotonic()
+            while not self._stop_event.wait(0.5):
+                if self._reload_event.is_set():
+                    self._reload_event.clear()
+                    self.reload_model()
+                if self.stats_interval > 0 and time.monotonic() - last_stats >= self.stats_interval:
+                    last_stats = time.monotonic()
+                    print(self.pipeline.format_metrics(), flush=True)
+                    print(MetricsRegistry().format_text(), flush=True)
+            return 0
+        except Exception as e:
+            self.logger.error(f"无界面运行失败: {str(e)}")
+            return 1
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """按 流水线 -> 相机 -> 机器人 -> 模型 的顺序释放资源"""
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if self.rate_controller is not None:
+            self.rate_controller.stop()
+            self.rate_controller = None
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            print(self.pipeline.format_metrics(), flush=True)
+            # 运行中切换过模型时，流水线持有的是新模型
+            self.detector = self.pipeline.detector
+        if self.discovery is not None:
+            self.discovery.stop()
+            self.discovery = None
+        if self.camera is not None:
+            try:
+                self.camera.disconnect()
+            except Exception as e:
+                self.logger.warning(f"断开相机时出错: {str(e)}")
+        for name, robot in self.robots.items():
+            try:
+                robot.disconnect()
+            except Exception as e:
+                self.logger.warning(f"断开机器人 {name} 时出错: {str(e)}")
+        if self.detector is not None:
+            # 无界面运行器独占进程，退出前释放模型管理器中的全部实例（包括切换前的旧模型）
+            from rknn.ModelManager import ModelManager
+            ModelManager().release()
+        self.pipeline = None
+        self.camera = None
+        self.robots = {}
+        self.detector = None
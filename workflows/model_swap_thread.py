@@ -0,0 +1,75 @@
+"""
+@Description :   界面运行中切换模型
+                 在后台线程中加载并预热新模型，用相机线程最近一帧做一次校验，
+                 通过后在两帧之间替换相机线程使用的模型；校验失败时继续使用旧模型
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import os
+import time
+
+from PyQt5.QtCore import pyqtSignal, QThread
+
+from Qcommon.metrics import MetricsRegistry
+from rknn.ModelManager import ModelManager
+
+
+class ModelSwapThread(QThread):
+    """
+    模型切换线程
+
+    旧模型归还给 ModelManager 由界面在收到 swapped 信号后完成，
+    此时相机线程已经不会再使用旧模型。
+
+    Example:
+        thread = ModelSwapThread(camera_thread, "models/new.rknn")
+        thread.swapped.connect(window.on_model_swapped)
+        thread.failed.connect(window.on_model_swap_failed)
+        thread.start()
+    """
+    # 模型路径, 新模型, 旧模型, 等待相机线程处理完当前帧的时间（秒）
+    swapped = pyqtSignal(str, object, object, float)
+    # 模型路径, 失败原因
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, camera_thread, model_path):
+        """
+        Args:
+            camera_thread (CameraThread): 正在运行的相机线程
+            model_path (str): 新模型路径
+        """
+        super().__init__()
+        self.camera_thread = camera_thread
+        self.model_path = model_path
+
+    def run(self):
+        manager = ModelManager()
+        name = os.path.basename(self.model_path)
+        try:
+            detector = manager.get(self.model_path)
+        except Exception as e:
+            self.failed.emit(self.model_path, f"模型 {name} 加载失败: {str(e)}")
+            return
+        if detector is self.camera_thread.detector:
+            manager.release(detector)  # 归还本次 get 增加的引用
+            self.failed.emit(self.model_path, f"模型 {name} 已在使用中，无需切换")
+            return
+
+        # 校验：新模型必须能处理相机最近的一帧
+        frame = self.camera_thread.last_frame
+        if frame is not None:
+            try:
+                detector.detect(frame)
+            except Exception as e:
+                manager.release(detector)
+                MetricsRegistry().counter("model.swap_rollbacks").inc()
+                self.failed.emit(self.model_path, f"模型 {name} 校验失败，继续使用当前模型: {str(e)}")
+                return
+
+        # 相机线程只在两帧之间让出模型，取帧和显示不会停顿
+        start = time.perf_counter()
+        previous = self.camera_thread.set_detector(detector)
+        wait_s = time.perf_counter() - start
+        MetricsRegistry().counter("model.swaps").inc()
+        self.swapped.emit(self.model_path, detector, previous, wait_s)
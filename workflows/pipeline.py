@@ -0,0 +1,846 @@
+"""
+@Description :   视觉生产流水线
+                 采集 -> 解析 -> 推理 -> 跟踪 -> 位姿计算 -> 机器人下发，
+                 每个阶段运行在独立的工作线程中，阶段之间用有界队列连接，
+                 不依赖 Qt，界面和无界面运行方式都可以直接使用；
+                 推理阶段支持运行中热切换模型，校验或试运行失败时回退到旧模型
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import math
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+
+from Qcommon.LogManager import LogManager
+
+
+class BoundedQueue:
+    """
+    带丢帧/背压策略的有界队列
+
+    策略:
+        block       : 队列满时上游阻塞等待（背压），保证不丢数据
+        drop_oldest : 队列满时丢弃最旧的数据，保证下游拿到的是最新帧
+        drop_newest : 队列满时丢弃新到的数据
+    """
+
+    POLICY_BLOCK = "block"
+    POLICY_DROP_OLDEST = "drop_oldest"
+    POLICY_DROP_NEWEST = "drop_newest"
+    POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST)
+
+    def __init__(self, maxsize=2, policy=POLICY_DROP_OLDEST):
+        """
+        Args:
+            maxsize (int): 队列容量
+            policy (str): 队列满时的处理策略
+        """
+        if maxsize < 1:
+            raise ValueError("队列容量必须大于0")
+        if policy not in self.POLICIES:
+            raise ValueError(f"未知的队列策略: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.max_depth = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, item, timeout=None):
+        """
+        放入数据
+
+        Args:
+            item: 数据
+            timeout (float, optional): block 策略下的最长等待时间
+
+        Returns:
+            bool: 数据是否进入队列
+        """
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                if self.policy == self.POLICY_DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                if self.policy == self.POLICY_DROP_OLDEST:
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    while len(self._items) >= self.maxsize and not self._closed:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            return False
+                        self._cond.wait(remaining)
+                    if self._closed:
+                        return False
+            self._items.append(item)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """
+        取出数据
+
+        Raises:
+            queue.Empty: 超时或队列已关闭且为空
+        """
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._items:
+                if self._closed:
+                    raise queue.Empty
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._cond.wait(remaining)
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """关闭队列，唤醒所有等待的线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        """重新打开已关闭的队列，并丢弃上次运行残留的数据"""
+        with self._cond:
+            self._items.clear()
+            self._closed = False
+            self._cond.notify_all()
+
+    def clear(self):
+        """清空队列"""
+        with self._cond:
+            self._items.clear()
+            self._cond.notify_all()
+
+    @property
+    def depth(self):
+        """当前队列深度"""
+        return len(self._items)
+
+
+class StageMetrics:
+    """单个阶段的吞吐与耗时统计"""
+
+    def __init__(self, window=64):
+        self.processed = 0
+        self.errors = 0
+        self.busy_s = 0.0
+        self.last_s = 0.0
+        self._done_times = deque(maxlen=window)
+        self._durations = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_s):
+        """记录一次处理耗时"""
+        with self._lock:
+            self.processed += 1
+            self.busy_s += elapsed_s
+            self.last_s = elapsed_s
+            self._done_times.append(time.perf_counter())
+            self._durations.append(elapsed_s)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    @property
+    def fps(self):
+        """最近窗口内的吞吐率"""
+        with self._lock:
+            if len(self._done_times) < 2:
+                return 0.0
+            span = self._done_times[-1] - self._done_times[0]
+            return (len(self._done_times) - 1) / span if span > 0 else 0.0
+
+    @property
+    def avg_s(self):
+        return self.busy_s / self.processed if self.processed else 0.0
+
+    @property
+    def recent_avg_s(self):
+        """最近窗口内的平均耗时，反映当前的处理能力"""
+        with self._lock:
+            if not self._durations:
+                return 0.0
+            return sum(self._durations) / len(self._durations)
+
+
+class FramePacket:
+    """在各阶段之间传递的一帧数据"""
+
+    def __init__(self, frame_id):
+        self.frame_id = frame_id
+        self.t_acquired = time.perf_counter()
+        self.receive_time_s = None   # 主机接收时间（time.time()）
+        self.capture_time_s = None   # 设备采集时间换算到主机时钟，时钟未同步时为 None
+        self.raw = None
+        self.depth = None
+        self.image = None
+        self.detections = []
+        self.tracks = []
+        self.poses = []
+
+
+class Stage(threading.Thread):
+    """
+    流水线阶段
+    从输入队列取数据，调用处理函数，把非 None 的结果放入输出队列。
+    没有输入队列的阶段作为数据源，循环调用处理函数。
+    """
+
+    def __init__(self, name, func, in_queue=None, out_queue=None, error_delay=0.0):
+        """
+        Args:
+            name (str): 阶段名称
+            func (callable): 处理函数，源阶段无参数，其余阶段接收上游数据
+            in_queue (BoundedQueue, optional): 输入队列
+            out_queue (BoundedQueue, optional): 输出队列
+            error_delay (float): 处理出错后的等待时间，避免错误风暴
+        """
+        super().__init__(name=f"pipeline-{name}", daemon=True)
+        self.stage_name = name
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.error_delay = error_delay
+        self.metrics = StageMetrics()
+        self.logger = LogManager().get_logger()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if self.in_queue is not None:
+                try:
+                    item = self.in_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                args = (item,)
+            else:
+                args = ()
+
+            start = time.perf_counter()
+            try:
+                result = self.func(*args)
+            except Exception as e:
+                self.metrics.record_error()
+                self.logger.warning(f"流水线阶段 {self.stage_name} 处理失败: {str(e)}")
+                if self.error_delay > 0:
+                    self._stop_event.wait(self.error_delay)
+                continue
+            self.metrics.record(time.perf_counter() - start)
+
+            if result is not None and self.out_queue is not None:
+                # block 策略下分段等待，便于及时响应停止请求
+                while not self.out_queue.put(result, timeout=0.1):
+                    if self.out_queue.policy != BoundedQueue.POLICY_BLOCK or self._stop_event.is_set():
+                        break
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def default_pose_fn(packet):
+    """
+    默认位姿计算：取旋转框中心像素、角度以及中心处的深度值
+    需要机器人坐标时通过 VisionPipeline 的 pixel_to_robot 做手眼标定转换
+
+    Returns:
+        list: [{"track_id", "x", "y", "z", "u"}]，x/y 为像素坐标，z 为深度(mm)，u 为角度(度)
+    """
+    poses = []
+    width = packet.image.shape[1] if packet.image is not None else 0
+    track_centers = []
+    for track in packet.tracks:
+        x, y, w, h = track["bbox"]
+        track_centers.append((track["track_id"], x + w / 2, y + h / 2))
+
+    for box in packet.detections:
+        cx = (box.pt1x + box.pt2x + box.pt3x + box.pt4x) / 4
+        cy = (box.pt1y + box.pt2y + box.pt3y + box.pt4y) / 4
+        z = 0.0
+        if packet.depth is not None and width:
+            index = int(cy) * width + int(cx)
+            if 0 <= index < len(packet.depth):
+                z = float(packet.depth[index])
+        # 以中心距离最近的跟踪目标作为该检测框的跟踪ID
+        track_id = -1
+        best = None
+        for tid, tx, ty in track_centers:
+            dist = (tx - cx) ** 2 + (ty - cy) ** 2
+            if best is None or dist < best:
+                best, track_id = dist, tid
+        poses.append({"track_id": track_id, "x": cx, "y": cy, "z": z, "u": math.degrees(box.angle)})
+    return poses
+
+
+class ModelSwap:
+    """
+    一次模型热切换的状态
+
+    状态流转:
+        loading -> validating -> pending -> probation -> done
+    加载或校验失败时新模型被释放，状态为 failed / rolled_back；
+    试运行期间新模型推理出错时切回旧模型，状态为 rolled_back。
+    切换过程中旧模型一直在推理，pending 之后由推理阶段在两帧之间替换模型引用。
+    """
+
+    LOADING = "loading"
+    VALIDATING = "validating"
+    PENDING = "pending"
+    PROBATION = "probation"
+    DONE = "done"
+    ROLLED_BACK = "rolled_back"
+    FAILED = "failed"
+    ACTIVE = (LOADING, VALIDATING, PENDING, PROBATION)
+
+    def __init__(self, model_path, probation_frames):
+        self.model_path = model_path
+        self.probation_frames = probation_frames
+        self.state = self.LOADING
+        self.detector = None
+        self.previous = None
+        self.error = None
+        self.validation = {}
+        self.frames = 0
+        self.commit_s = 0.0
+        self.baseline_s = 0.0
+        self.pause_s = None
+        self.release_previous = True
+        self.started_at = time.time()
+        self._done = threading.Event()
+
+    @property
+    def active(self):
+        return self.state in self.ACTIVE
+
+    def finish(self, state, error=None):
+        self.state = state
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """
+        等待切换结束
+
+        Returns:
+            str: 最终状态，超时返回当前状态
+        """
+        self._done.wait(timeout)
+        return self.state
+
+    def to_dict(self):
+        return {
+            "model_path": self.model_path,
+            "state": self.state,
+            "error": self.error,
+            "validation": dict(self.validation),
+            "pause_ms": None if self.pause_s is None else self.pause_s * 1000,
+            "started_at": self.started_at,
+        }
+
+
+class VisionPipeline:
+    """
+    视觉生产流水线
+
+    Example:
+        pipeline = VisionPipeline(camera, detector, robots)
+        pipeline.start()
+        ...
+        print(pipeline.format_metrics())
+        pipeline.stop()
+    """
+
+    STAGES = ("acquire", "decode", "inference", "tracking", "pose", "dispatch")
+
+    # 各阶段输入队列的默认配置: (容量, 策略)
+    DEFAULT_QUEUES = {
+        "decode": (2, BoundedQueue.POLICY_DROP_OLDEST),
+        "inference": (2, BoundedQueue.POLICY_DROP_OLDEST),
+        "tracking": (4, BoundedQueue.POLICY_BLOCK),
+        "pose": (4, BoundedQueue.POLICY_BLOCK),
+        "dispatch": (8, BoundedQueue.POLICY_BLOCK),
+    }
+
+    def __init__(self, camera, detector, robots=None, tracker=None, queue_config=None,
+                 pose_fn=None, pixel_to_robot=None, move_flag="Go", validation_frames=8):
+        """
+        Args:
+            camera (QtVisionSick): 已连接的相机
+            detector (RKNN_YOLO): 已加载的检测模型
+            robots (dict, optional): {名称: EpsonRobot}，为空时不下发机器人指令
+            tracker (ByteTracker, optional): 跟踪器，默认使用检测器自带的跟踪器
+            queue_config (dict, optional): 覆盖默认队列配置 {阶段名: (容量, 策略)}
+            pose_fn (callable, optional): 位姿计算函数，接收 FramePacket 返回位姿列表
+            pixel_to_robot (callable, optional): 手眼标定转换，(x, y, z, u) -> (x, y, z, u)
+            move_flag (str): 下发的运动指令
+            validation_frames (int): 保留最近多少帧图像，用于模型热切换前的校验
+        """
+        self.camera = camera
+        self.detector = detector
+        self.robots = robots or {}
+        self.tracker = tracker if tracker is not None else getattr(detector, "tracker", None)
+        self.pose_fn = pose_fn or default_pose_fn
+        self.pixel_to_robot = pixel_to_robot
+        self.move_flag = move_flag
+        self.logger = LogManager().get_logger()
+
+        config = dict(self.DEFAULT_QUEUES)
+        config.update(queue_config or {})
+        self.queues = {name: BoundedQueue(*config[name]) for name in self.STAGES[1:]}
+
+        self._frame_counter = 0
+        self._robot_cycle = deque(self.robots.keys())
+        self._dispatched_ids = deque(maxlen=256)
+        self._listeners = []
+        self.stages = []
+        self.running = False
+        # 端到端延迟：从收到原始帧到完成下发
+        self.latency = StageMetrics()
+        # 传感器延迟：从设备采集时刻（换算到主机时钟）到完成下发
+        self.sensor_latency = StageMetrics()
+
+        # 模型热切换：最近的 (图像, 检测数) 用于校验新模型，切换停顿取历史最大值
+        self._recent_frames = deque(maxlen=validation_frames)
+        self._recent_lock = threading.Lock()
+        # 切换状态的变化（包括 stop 时的处理）都在这把锁下进行
+        self._swap_lock = threading.RLock()
+        self._swap = None
+        self.swap_history = deque(maxlen=16)
+        self.max_swap_pause_s = 0.0
+
+    # ------------------ 各阶段处理函数 ------------------
+    def _acquire(self):
+        raw = self.camera.grab_raw_frame()
+        # 收到数据后再创建数据包，端到端延迟不包含等待下一帧的空闲时间
+        packet = FramePacket(self._frame_counter)
+        packet.raw = raw
+        packet.receive_time_s = getattr(self.camera, "last_receive_time_s", None)
+        self._frame_counter += 1
+        return packet
+
+    def _decode(self, packet):
+        success, packet.depth, packet.image = self.camera.decode_frame(packet.raw, packet.receive_time_s)
+        packet.capture_time_s = getattr(self.camera, "last_capture_time_s", None)
+        packet.raw = None  # 原始数据不再需要，尽早释放
+        return packet if success else None
+
+    def _inference(self, packet):
+        swap = self._swap
+        if swap is not None and swap.state == ModelSwap.PENDING:
+            with self._swap_lock:
+                if swap.state == ModelSwap.PENDING:
+                    self._commit_swap(swap)
+        detector = self.detector
+        start = time.perf_counter()
+        try:
+            packet.detections = detector.detect(packet.image)
+        except Exception as e:
+            if swap is None or detector is not swap.detector:
+                raise
+            with self._swap_lock:
+                if swap.state != ModelSwap.PROBATION:
+                    raise
+                # 新模型试运行出错，切回旧模型重新处理这一帧
+                self._rollback_swap(swap, f"试运行第 {swap.frames + 1} 帧推理失败: {str(e)}")
+            start = time.perf_counter()
+            packet.detections = self.detector.detect(packet.image)
+        elapsed = time.perf_counter() - start
+        if swap is not None and swap.state == ModelSwap.PROBATION and detector is swap.detector:
+            self._probation_frame(swap, elapsed)
+        with self._recent_lock:
+            self._recent_frames.append((packet.image, len(packet.detections)))
+        return packet
+
+    def _tracking(self, packet):
+        if self.tracker is not None:
+            packet.tracks = self.tracker.update(packet.detections)
+        return packet
+
+    def _pose(self, packet):
+        poses = self.pose_fn(packet)
+        if self.pixel_to_robot is not None:
+            for pose in poses:
+                pose["x"], pose["y"], pose["z"], pose["u"] = self.pixel_to_robot(
+                    pose["x"], pose["y"], pose["z"], pose["u"])
+        packet.poses = poses
+        return packet
+
+    def _dispatch(self, packet):
+        for pose in packet.poses:
+            if not self._robot_cycle:
+                break
+            track_id = pose.get("track_id", -1)
+            # 同一个跟踪目标只下发一次
+            if track_id != -1 and track_id in self._dispatched_ids:
+                continue
+            name = self._robot_cycle[0]
+            self._robot_cycle.rotate(-1)
+            robot = self.robots[name]
+            if robot.move_to_position(self.move_flag, pose["x"], pose["y"], pose["z"], pose["u"]):
+                if track_id != -1:
+                    self._dispatched_ids.append(track_id)
+            else:
+                self.logger.warning(f"向机器人 {name} 下发位姿失败")
+        self.latency.record(time.perf_counter() - packet.t_acquired)
+        if packet.capture_time_s is not None:
+            # 真实的传感器采集到下发完成的延迟
+            self.sensor_latency.record(time.time() - packet.capture_time_s)
+        for listener in self._listeners:
+            try:
+                listener(packet)
+            except Exception as e:
+                self.logger.warning(f"流水线结果回调出错: {str(e)}")
+        return None
+
+    # ------------------ 控制接口 ------------------
+    def add_listener(self, callback):
+        """注册结果回调，每帧处理完成后在下发线程中调用 callback(packet)"""
+        self._listeners.append(callback)
+
+    def start(self):
+        """创建并启动所有阶段线程"""
+        if self.running:
+            return
+        funcs = {
+            "acquire": self._acquire,
+            "decode": self._decode,
+            "inference": self._inference,
+            "tracking": self._tracking,
+            "pose": self._pose,
+            "dispatch": self._dispatch,
+        }
+        # stop() 会关闭所有队列，重新启动时需要先打开
+        for q in self.queues.values():
+            q.reopen()
+        self.stages = []
+        for index, name in enumerate(self.STAGES):
+            in_queue = self.queues.get(name)
+            out_queue = self.queues[self.STAGES[index + 1]] if index + 1 < len(self.STAGES) else None
+            error_delay = 0.5 if name == "acquire" else 0.0
+            self.stages.append(Stage(name, funcs[name], in_queue, out_queue, error_delay))
+        for stage in self.stages:
+            stage.start()
+        self.running = True
+        self.logger.info("视觉流水线已启动")
+
+    def stop(self, timeout=2.0):
+        """停止所有阶段线程"""
+        if not self.running:
+            return
+        for stage in self.stages:
+            stage.stop()
+        for q in self.queues.values():
+            q.close()
+        for stage in self.stages:
+            stage.join(timeout)
+        self.running = False
+        # 停止时还没替换的新模型不再使用；试运行中没有出错的新模型保留；
+        # 仍在加载或校验的切换直接取消，新模型由后台线程在下一个检查点释放
+        with self._swap_lock:
+            swap = self._swap
+            if swap is not None and swap.state == ModelSwap.PENDING:
+                self._abort_swap(swap, ModelSwap.FAILED, "流水线已停止")
+            elif swap is not None and swap.state == ModelSwap.PROBATION:
+                self._complete_swap(swap)
+            elif swap is not None and swap.active:
+                self.logger.warning(f"流水线已停止，取消模型 {os.path.basename(swap.model_path)} 的切换")
+                self._finish_swap(swap, ModelSwap.FAILED, "流水线已停止")
+        self.logger.info("视觉流水线已停止")
+
+    # ------------------ 模型热切换 ------------------
+    def swap_model(self, model_path, warmup_runs=None, probation_frames=10, min_detection_ratio=0.5,
+                   max_latency_ratio=3.0, release_previous=True, **options):
+        """
+        在后台加载并预热新模型，校验通过后在两帧之间替换推理阶段使用的模型，
+        整个过程中旧模型继续处理图像，不需要停止流水线或重连相机和机器人。
+        跟踪器不随模型替换，已有的跟踪ID保持连续。
+
+        Args:
+            model_path (str): 新模型文件路径
+            warmup_runs (int, optional): 预热推理次数，默认使用 ModelManager 的设置
+            probation_frames (int): 替换后的试运行帧数，期间新模型推理出错则切回旧模型
+            min_detection_ratio (float): 校验时新模型在最近帧上的检出总数至少为旧模型的多少倍
+            max_latency_ratio (float, optional): 校验时新模型平均推理耗时最多为旧模型的多少倍，None 不检查
+            release_previous (bool): 切换完成后是否通过 ModelManager 释放旧模型
+            **options: RKNN_YOLO 的构造参数，默认沿用当前模型的参数
+
+        Returns:
+            ModelSwap: 切换状态，可用 wait() 等待结束
+
+        Raises:
+            RuntimeError: 上一次切换还没有结束
+        """
+        with self._swap_lock:
+            if self._swap is not None and self._swap.active:
+                raise RuntimeError(f"模型 {os.path.basename(self._swap.model_path)} 正在切换中")
+            swap = ModelSwap(model_path, max(1, probation_frames))
+            swap.release_previous = release_previous
+            self._swap = swap
+        threading.Thread(target=self._prepare_swap, name="model-swap", daemon=True,
+                         args=(swap, warmup_runs, min_detection_ratio, max_latency_ratio, options)).start()
+        return swap
+
+    def swap_status(self):
+        """
+        Returns:
+            dict: {"current": 最近一次切换的状态, "history": 已结束的切换, "max_pause_ms": 最大切换停顿}
+        """
+        swap = self._swap
+        return {
+            "current": swap.to_dict() if swap is not None else None,
+            "history": list(self.swap_history),
+            "max_pause_ms": self.max_swap_pause_s * 1000,
+        }
+
+    def _prepare_swap(self, swap, warmup_runs, min_detection_ratio, max_latency_ratio, options):
+        """后台线程：加载、预热并校验新模型，通过后交给推理阶段替换"""
+        from rknn.ModelManager import ModelManager
+        manager = ModelManager()
+        if not options:
+            info = manager.info(self.detector)
+            options = info["options"] if info is not None else {}
+        self.logger.info(f"后台加载模型 {swap.model_path}，切换期间继续使用当前模型")
+        try:
+            swap.detector = manager.get(swap.model_path, warmup_runs, **options)
+        except Exception as e:
+            with self._swap_lock:
+                if swap.active:
+                    self._abort_swap(swap, ModelSwap.FAILED, f"模型加载失败: {str(e)}")
+            return
+        with self._swap_lock:
+            cancelled = not swap.active
+            unchanged = swap.detector is self.detector
+            if cancelled or unchanged:
+                manager.release(swap.detector)  # 归还本次 get 增加的引用
+            if unchanged and not cancelled:
+                # 模型文件没有变化，缓存返回的就是当前实例
+                self.logger.info(f"模型 {os.path.basename(swap.model_path)} 已在使用中，无需切换")
+                swap.finish(ModelSwap.DONE)
+            if cancelled or unchanged:
+                return
+            swap.state = ModelSwap.VALIDATING
+
+        try:
+            reason = self._validate_swap(swap, min_detection_ratio, max_latency_ratio)
+        except Exception as e:
+            reason = f"校验推理失败: {str(e)}"
+
+        # 检查运行状态和改变切换状态在同一把锁下，与 stop() 互斥
+        with self._swap_lock:
+            if not swap.active:
+                # 校验期间流水线已停止
+                manager.release(swap.detector)
+            elif reason is not None:
+                self._abort_swap(swap, ModelSwap.ROLLED_BACK, reason)
+            elif self.running:
+                # 由推理阶段在处理下一帧之前替换，不会有一帧用到一半被换掉
+                swap.state = ModelSwap.PENDING
+            else:
+                self._commit_swap(swap)
+                self._complete_swap(swap)
+
+    def _inference_baseline_s(self):
+        """推理阶段最近的平均耗时"""
+        for stage in self.stages:
+            if stage.stage_name == "inference":
+                return stage.metrics.recent_avg_s
+        return 0.0
+
+    def _validate_swap(self, swap, min_detection_ratio, max_latency_ratio):
+        """
+        用新模型处理最近的几帧，并与旧模型当时的结果比较
+
+        Returns:
+            str: 校验失败的原因，通过时返回 None
+        """
+        with self._recent_lock:
+            frames = list(self._recent_frames)
+        if not frames:
+            swap.validation = {"frames": 0}
+            self.logger.warning("还没有可用于校验的图像，跳过新模型校验")
+            return None
+
+        old_total = sum(count for _, count in frames)
+        new_total = 0
+        busy_s = 0.0
+        for image, _ in frames:
+            start = time.perf_counter()
+            new_total += len(swap.detector.detect(image))
+            busy_s += time.perf_counter() - start
+        new_avg_s = busy_s / len(frames)
+        old_avg_s = self._inference_baseline_s()
+        swap.validation = {
+            "frames": len(frames),
+            "old_detections": old_total,
+            "new_detections": new_total,
+            "old_avg_ms": old_avg_s * 1000,
+            "new_avg_ms": new_avg_s * 1000,
+        }
+        if old_total and new_total < old_total * min_detection_ratio:
+            return f"最近 {len(frames)} 帧新模型检出 {new_total} 个目标，旧模型检出 {old_total} 个"
+        if max_latency_ratio is not None and old_avg_s > 0 and new_avg_s > old_avg_s * max_latency_ratio:
+            return f"新模型平均推理耗时 {new_avg_s * 1000:.1f} ms，超过旧模型 {old_avg_s * 1000:.1f} ms 的 {max_latency_ratio} 倍"
+        return None
+
+    def _commit_swap(self, swap):
+        """替换模型引用，只在推理阶段两帧之间或流水线未运行时调用"""
+        start = time.perf_counter()
+        swap.previous = self.detector
+        self.detector = swap.detector
+        swap.state = ModelSwap.PROBATION
+        swap.commit_s = time.perf_counter() - start
+        swap.baseline_s = self._inference_baseline_s()
+
+    def _probation_frame(self, swap, elapsed_s):
+        """新模型成功处理一帧；第一帧比平时多出的耗时计入切换停顿"""
+        if swap.frames == 0:
+            self._record_pause(swap, swap.commit_s + max(0.0, elapsed_s - swap.baseline_s))
+        swap.frames += 1
+        if swap.frames >= swap.probation_frames:
+            with self._swap_lock:
+                if swap.state == ModelSwap.PROBATION:
+                    self._complete_swap(swap)
+
+    def _complete_swap(self, swap):
+        if swap.pause_s is None:
+            self._record_pause(swap, swap.commit_s)
+        previous, swap.previous = swap.previous, None
+        self._registry().counter("model.swaps").inc()
+        self.logger.info(f"模型已切换为 {os.path.basename(swap.model_path)}，"
+                         f"切换停顿 {swap.pause_s * 1000:.2f} ms")
+        if swap.release_previous and previous is not None:
+            self._release_detector(previous)
+        self._finish_swap(swap, ModelSwap.DONE)
+
+    def _rollback_swap(self, swap, reason):
+        """试运行失败，切回旧模型"""
+        self.detector, swap.previous = swap.previous, None
+        self._abort_swap(swap, ModelSwap.ROLLED_BACK, reason)
+
+    def _abort_swap(self, swap, state, reason):
+        """切换失败，继续使用旧模型并释放新模型"""
+        self.logger.warning(f"模型 {os.path.basename(swap.model_path)} 切换失败，继续使用当前模型: {reason}")
+        if state == ModelSwap.ROLLED_BACK:
+            self._registry().counter("model.swap_rollbacks").inc()
+        if swap.detector is not None and swap.detector is not self.detector:
+            self._release_detector(swap.detector)
+        self._finish_swap(swap, state, reason)
+
+    def _finish_swap(self, swap, state, error=None):
+        swap.finish(state, error)
+        self.swap_history.append(swap.to_dict())
+
+    def _record_pause(self, swap, pause_s):
+        swap.pause_s = pause_s
+        self.max_swap_pause_s = max(self.max_swap_pause_s, pause_s)
+        self._registry().observe("model.swap_pause", pause_s)
+
+    def _release_detector(self, detector):
+        """在后台释放模型，推理阶段不等待 NPU 资源释放"""
+        def release():
+            from rknn.ModelManager import ModelManager
+            try:
+                ModelManager().release(detector)
+            except Exception as e:
+                self.logger.warning(f"释放模型时出错: {str(e)}")
+        threading.Thread(target=release, name="model-release", daemon=True).start()
+
+    @staticmethod
+    def _registry():
+        from Qcommon.metrics import MetricsRegistry
+        return MetricsRegistry()
+
+    def metrics(self):
+        """
+        获取各阶段统计
+
+        Returns:
+            dict: {阶段名: {"processed", "errors", "fps", "avg_ms", "last_ms", "queue_depth", "dropped"}}
+        """
+        result = {}
+        for stage in self.stages:
+            q = stage.in_queue
+            result[stage.stage_name] = {
+                "processed": stage.metrics.processed,
+                "errors": stage.metrics.errors,
+                "fps": stage.metrics.fps,
+                "avg_ms": stage.metrics.avg_s * 1000,
+                "last_ms": stage.metrics.last_s * 1000,
+                "queue_depth": q.depth if q is not None else 0,
+                "dropped": q.dropped if q is not None else 0,
+            }
+        return result
+
+    def export_metrics(self, registry=None):
+        """
+        把各阶段帧率、队列深度、丢帧数和端到端延迟注册为回调型 gauge，
+        只在读取指标（例如被 Prometheus 抓取）时才计算
+
+        Args:
+            registry (MetricsRegistry, optional): 默认使用全局单例
+        """
+        from Qcommon.metrics import MetricsRegistry
+        registry = registry or MetricsRegistry()
+        # 回调只通过弱引用访问流水线，流水线及其持有的相机和模型可以被正常回收；
+        # 阶段按名称查找，重新启动后读到的是新的阶段线程
+        pipeline_ref = weakref.ref(self)
+
+        def read(getter):
+            def value():
+                pipeline = pipeline_ref()
+                return getter(pipeline) if pipeline is not None else 0
+            return value
+
+        for stage in self.stages:
+            name = stage.stage_name
+            prefix = f"pipeline.{name}"
+            registry.gauge(f"{prefix}.fps", read(lambda p, n=name: p._stage(n).metrics.fps))
+            registry.gauge(f"{prefix}.errors", read(lambda p, n=name: p._stage(n).metrics.errors))
+            if name in self.queues:
+                registry.gauge(f"{prefix}.queue_depth", read(lambda p, n=name: p.queues[n].depth))
+                registry.gauge(f"{prefix}.dropped", read(lambda p, n=name: p.queues[n].dropped))
+        registry.gauge("pipeline.end2end_ms", read(lambda p: p.latency.avg_s * 1000))
+        registry.gauge("pipeline.sensor_to_robot_ms", read(lambda p: p.sensor_latency.avg_s * 1000))
+        registry.gauge("pipeline.max_swap_pause_ms", read(lambda p: p.max_swap_pause_s * 1000))
+
+    def _stage(self, name):
+        return next(stage for stage in self.stages if stage.stage_name == name)
+
+    def end_to_end_ms(self):
+        """
+        端到端延迟统计
+
+        Returns:
+            tuple: (平均延迟ms, 最近一帧延迟ms)
+        """
+        return self.latency.avg_s * 1000, self.latency.last_s * 1000
+
+    def format_metrics(self):
+        """以文本表格形式输出各阶段统计"""
+        lines = [f"{'stage':<10} {'fps':>7} {'avg_ms':>8} {'last_ms':>8} {'queue':>6} {'dropped':>8} {'errors':>7}"]
+        for name, m in self.metrics().items():
+            lines.append(f"{name:<10} {m['fps']:7.1f} {m['avg_ms']:8.1f} {m['last_ms']:8.1f} "
+                         f"{m['queue_depth']:6d} {m['dropped']:8d} {m['errors']:7d}")
+        avg_ms, last_ms = self.end_to_end_ms()
+        lines.append(f"{'end2end':<10} {self.latency.fps:7.1f} {avg_ms:8.1f} {last_ms:8.1f}")
+        if self.sensor_latency.processed:
+            lines.append(f"{'sensor':<10} {self.sensor_latency.fps:7.1f} {self.sensor_latency.avg_s * 1000:8.1f} "
+                         f"{self.sensor_latency.last_s * 1000:8.1f}")
+        if self.swap_history:
+            swaps = sum(1 for swap in self.swap_history if swap["state"] == ModelSwap.DONE)
+            lines.append(f"model swaps {swaps}/{len(self.swap_history)}, "
+                         f"max pause {self.max_swap_pause_s * 1000:.2f} ms")
+        return "\n".join(lines)
@@ -1,50 +1,179 @@
+"""
+@Description :   系统启动加载器
+                 相机连接、各机器人连接、模型加载与预热在线程池中并发执行，
+                 每个任务开始/结束时发出进度和耗时信号；部分就绪模式下相机和模型就绪即可开始运行，
+                 之后陆续连上的机器人通过 robot_ready 信号交给界面
+@Author      :   Cao Yingjie
+@Time        :   2026/10/18
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from PyQt5.QtCore import QObject, pyqtSignal
 from sick.SickSDK import QtVisionSick
 from epson.EpsonRobot import EpsonRobot
-from rknn.RknnYolo import RKNN_YOLO
 from Qcommon.decorators import catch_and_log
+from Qcommon.LogManager import LogManager
+from Qcommon.metrics import MetricsRegistry
+from rknn.ModelManager import ModelManager
+
+# 最多支持的机器人数量
+MAX_ROBOTS = 4
+
 
 class SystemLoader(QObject):
     progress = pyqtSignal(str, str)
     finished = pyqtSignal(object, dict, object)
     error    = pyqtSignal(str)
+    # 任务名称
+    task_started = pyqtSignal(str)
+    # 任务名称, 是否成功, 耗时（秒）
+    task_finished = pyqtSignal(str, bool, float)
+    # 部分就绪后连上的机器人: 名称, EpsonRobot
+    robot_ready = pyqtSignal(str, object)
+    # 所有任务（包括部分就绪后仍在连接的机器人）都已结束
+    all_done = pyqtSignal()
 
-    def __init__(self, camera_cfg, robots_cfg, model_path):
+    def __init__(self, camera_cfg, robots_cfg, model_path, partial_ready=False, max_workers=None, discovery=None):
+        """
+        Args:
+            camera_cfg (dict): QtVisionSick 的构造参数
+            robots_cfg (list): 机器人配置 [{name, ip, cmd_port, status_port}]
+            model_path (str): 模型文件路径
+            partial_ready (bool): 相机和模型就绪后立即发出 finished，不等待所有机器人连接完成
+            max_workers (int, optional): 线程池大小，默认每个任务一个线程
+            discovery (Discovery, optional): 设备发现服务，缓存中已知的相机连接前不再探测
+        """
         super().__init__()
         self.camera_cfg = camera_cfg
         self.robots_cfg = robots_cfg
         self.model_path = model_path
+        self.partial_ready = partial_ready
+        self.max_workers = max_workers
+        self.discovery = discovery
+        self.logger = LogManager().get_logger()
+        self.metrics = MetricsRegistry()
+        self.timings = {}
+
+    # ------------------ 启动任务 ------------------
+    def _connect_camera(self):
+        cam_svc = QtVisionSick(discovery=self.discovery, **self.camera_cfg)
+        if not cam_svc.connect(use_single_step=False):
+            raise RuntimeError("相机连接失败")
+        return cam_svc
+
+    def _connect_robot(self, cfg):
+        bot_svc = EpsonRobot(cfg["ip"], cfg["cmd_port"], cfg["status_port"])
+        if not bot_svc.connect():
+            return None
+        return bot_svc
+
+    def _load_model(self):
+        # 模型管理器缓存已加载并预热的实例，测试模型时加载过的这里直接复用
+        return ModelManager().get(self.model_path)
+
+    def _timed(self, name, func, *args):
+        """在线程池中执行一个启动任务，发出开始/结束信号并记录耗时"""
+        self.task_started.emit(name)
+        self.progress.emit(f"{name}…", "info")
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = func(*args)
+            ok = result is not None
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = elapsed
+            self.metrics.observe(f"startup.{name}", elapsed)
+            self.task_finished.emit(name, ok, elapsed)
+            self.progress.emit(f"{name}{'完成' if ok else '失败'}，耗时 {elapsed:.2f} 秒",
+                               "info" if ok else "warning")
+
+    @staticmethod
+    def _collect(future):
+        """等待任务结束，返回其结果；任务被取消或出错时返回 None"""
+        if future.cancelled() or future.exception() is not None:
+            return None
+        return future.result()
+
+    @staticmethod
+    def _release(cam_svc, robots, vision_svc):
+        """启动失败时释放已经就绪的资源"""
+        if cam_svc is not None:
+            cam_svc.disconnect()
+        for bot_svc in robots.values():
+            bot_svc.disconnect()
+        if vision_svc is not None:
+            ModelManager().release(vision_svc)
 
     @catch_and_log()
     def run(self):
+        start = time.perf_counter()
+        pool = None
         try:
-            # 1. 相机
-            self.progress.emit("连接相机…", "info")
-            cam_svc = QtVisionSick(**self.camera_cfg)
-            if not cam_svc.connect(use_single_step=False):
-                raise RuntimeError("相机连接失败")
+            if len(self.robots_cfg) > MAX_ROBOTS:
+                raise BufferError(f"最大支持{MAX_ROBOTS}个机器人的连接")
+
+            pool = ThreadPoolExecutor(max_workers=self.max_workers or len(self.robots_cfg) + 2,
+                                      thread_name_prefix="startup")
+            camera_future = pool.submit(self._timed, "连接相机", self._connect_camera)
+            model_future = pool.submit(self._timed, "加载模型", self._load_model)
+            robot_futures = {pool.submit(self._timed, f"连接机器人 {cfg['name']}", self._connect_robot, cfg): cfg["name"]
+                             for cfg in self.robots_cfg}
+
+            # 相机和模型是必需的，任一失败则整体失败
+            try:
+                cam_svc = camera_future.result()
+                vision_svc = model_future.result()
+            except Exception:
+                for future in robot_futures:
+                    future.cancel()
+                # 等待仍在执行的任务结束，释放它们已经得到的资源
+                robots = {name: self._collect(future) for future, name in robot_futures.items()}
+                self._release(self._collect(camera_future),
+                              {name: bot for name, bot in robots.items() if bot is not None},
+                              self._collect(model_future))
+                raise
 
-            # 2. 机器人
             robots = {}
-            for cfg in self.robots_cfg:
-                self.progress.emit(f"连接机器人 {cfg['name']}…", "info")
-                bot_svc = EpsonRobot(cfg["ip"], cfg["cmd_port"], cfg["status_port"])
-                if bot_svc.connect():
-                    robots[cfg["name"]] = bot_svc
-                    self.progress.emit(f"{cfg['name']} 连接成功", "info")
-                else:
-                    self.progress.emit(f"{cfg['name']} 连接失败", "warning")
-            if(len(robots) > 4):
-                raise BufferError("最大支持4个机器人的连接")
-            # 3. 模型加载
-            vision_svc = RKNN_YOLO(self.model_path)
-            if vision_svc.pc_yolo is None and vision_svc.rknn is None:
-                raise RuntimeError("模型加载失败")
-
-            self.finished.emit(cam_svc, robots, vision_svc)
+            ready = False
+            if self.partial_ready:
+                robots = {name: future.result() for future, name in robot_futures.items()
+                          if future.done() and self._collect(future) is not None}
+                pending = sum(1 for future in robot_futures if not future.done())
+                self._emit_ready(cam_svc, robots, vision_svc, start, pending)
+                ready = True
+
+            for future in as_completed(robot_futures):
+                name = robot_futures[future]
+                bot_svc = self._collect(future)
+                if bot_svc is None or name in robots:
+                    continue
+                robots[name] = bot_svc
+                if ready:
+                    self.robot_ready.emit(name, bot_svc)
+
+            if not ready:
+                self._emit_ready(cam_svc, robots, vision_svc, start, 0)
+            self.logger.info(f"启动任务全部结束，总耗时 {time.perf_counter() - start:.2f} 秒: "
+                             + ", ".join(f"{k} {v:.2f}s" for k, v in self.timings.items()))
 
         except Exception as e:
             self.error.emit(str(e))
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+            self.all_done.emit()
+
+    def _emit_ready(self, cam_svc, robots, vision_svc, start, pending):
+        elapsed = time.perf_counter() - start
+        self.metrics.observe("startup.ready", elapsed)
+        suffix = f"，{pending} 个机器人仍在连接" if pending else ""
+        self.progress.emit(f"系统就绪，耗时 {elapsed:.2f} 秒{suffix}", "info")
+        # 之后连上的机器人通过 robot_ready 交给界面，这里传出副本
+        self.finished.emit(cam_svc, dict(robots), vision_svc)
 
 
 # class CameraStream(QObject):
@@ -53,4 +182,3 @@ class SystemLoader(QObject):
 #         self.camera_cfg = camera_cfg
 
 #     def run(self):
-